@@ -1,9 +1,10 @@
 import sys
+import threading
+import multiprocessing
 from PySide6 import QtCore, QtWidgets, QtGui
 from datetime import datetime
-import os
-import re
 import json
+import numpy as np
 
 from scrapers.aliexpress import aliexpress
 from scrapers.amazon import amazon
@@ -11,6 +12,192 @@ from scrapers.kabum import kabum
 from scrapers.mercadolivre import mercadolivre
 from scrapers.pichau import pichau
 from scrapers.terabyteshop import terabyte
+from scrapers.pipeline import executar_pipeline
+from utils.historico import HistoricoPrecos
+from utils.mudancas import DetectorMudancas
+
+# Quanto o fechamento da janela espera a busca cancelada soltar o histórico
+ESPERA_FECHAR_MS = 5000
+
+
+class ModeloResultados(QtCore.QAbstractTableModel):
+    """
+    Guarda as linhas da busca e mostra uma visão delas: '_visiveis' é só uma
+    lista de posições em '_linhas', então filtrar e ordenar não copia os
+    registros. Lotes novos entram no fim com beginInsertRows, sem recriar o
+    que já está na tabela.
+    """
+
+    COLUNAS = ("Site", "Nome do Produto", "Preço Bruto", "Link do Produto", "Data do Scraping")
+    COLUNA_PRECO = 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._linhas = []
+        self._precos = []
+        self._visiveis = []
+        self._ordem = None
+        self.texto = ""
+        self.preco_minimo = None
+        self.preco_maximo = None
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._visiveis)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUNAS)
+
+    def headerData(self, secao, orientacao, papel=QtCore.Qt.DisplayRole):
+        if papel == QtCore.Qt.DisplayRole and orientacao == QtCore.Qt.Horizontal:
+            return self.COLUNAS[secao]
+        return None
+
+    def data(self, indice, papel=QtCore.Qt.DisplayRole):
+        if papel != QtCore.Qt.DisplayRole or not indice.isValid():
+            return None
+        return self._linhas[self._visiveis[indice.row()]].get(self.COLUNAS[indice.column()]) or ""
+
+    @property
+    def total(self):
+        return len(self._linhas)
+
+    def limpar(self):
+        self.beginResetModel()
+        self._linhas, self._precos, self._visiveis = [], [], []
+        self.endResetModel()
+
+    def acrescentar(self, registros, precos):
+        if not registros:
+            return
+        inicio = len(self._linhas)
+        self._linhas.extend(registros)
+        self._precos.extend(precos)
+        novos = self._filtrar(range(inicio, len(self._linhas)))
+        if not novos:
+            return
+        if self._ordem is None:
+            fim = len(self._visiveis)
+            self.beginInsertRows(QtCore.QModelIndex(), fim, fim + len(novos) - 1)
+            self._visiveis.extend(novos)
+            self.endInsertRows()
+        else:
+            self._reorganizar(lambda: self._visiveis.extend(novos))
+
+    def definir_filtro(self, texto=None, preco_minimo=None, preco_maximo=None):
+        self.texto = (texto or "").lower()
+        self.preco_minimo = preco_minimo
+        self.preco_maximo = preco_maximo
+        self.beginResetModel()
+        self._visiveis = self._filtrar(range(len(self._linhas)))
+        if self._ordem is not None:
+            self._ordenar()
+        self.endResetModel()
+
+    def sort(self, coluna, ordem=QtCore.Qt.AscendingOrder):
+        # coluna < 0 tira a ordenação: as linhas voltam para a ordem em que chegaram
+        self._ordem = (coluna, ordem) if coluna >= 0 else None
+        self._reorganizar(lambda: None)
+
+    def _filtrar(self, posicoes):
+        posicoes = np.fromiter(posicoes, dtype=np.int64)
+        if self.preco_minimo is not None or self.preco_maximo is not None:
+            precos = np.asarray(self._precos, dtype=float)[posicoes]
+            # Comparação com NaN dá False: produto sem preço sai quando há faixa
+            manter = ~np.isnan(precos)
+            if self.preco_minimo is not None:
+                manter &= precos >= self.preco_minimo
+            if self.preco_maximo is not None:
+                manter &= precos <= self.preco_maximo
+            posicoes = posicoes[manter]
+        posicoes = posicoes.tolist()
+        if self.texto:
+            linhas = self._linhas
+            posicoes = [i for i in posicoes if self.texto in (linhas[i].get("Nome do Produto") or "").lower()]
+        return posicoes
+
+    def _ordenar(self):
+        if self._ordem is None:
+            # '_visiveis' guarda posições em '_linhas': em ordem crescente é a ordem de chegada (com o filtro atual)
+            self._visiveis.sort()
+            return
+        coluna, ordem = self._ordem
+        decrescente = ordem == QtCore.Qt.DescendingOrder
+        if coluna == self.COLUNA_PRECO:
+            visiveis = np.asarray(self._visiveis, dtype=np.int64)
+            precos = np.asarray(self._precos, dtype=float)[visiveis]
+            # Sem preço fica sempre no fim
+            chaves = np.where(np.isnan(precos), np.inf, -precos if decrescente else precos)
+            self._visiveis = visiveis[np.argsort(chaves, kind="stable")].tolist()
+        else:
+            campo, linhas = self.COLUNAS[coluna], self._linhas
+            self._visiveis.sort(key=lambda i: str(linhas[i].get(campo) or "").lower(), reverse=decrescente)
+
+    def _reorganizar(self, alterar):
+        # Mudança de ordem sem reset: a seleção acompanha as linhas
+        self.layoutAboutToBeChanged.emit()
+        antigos = self.persistentIndexList()
+        origem = [self._visiveis[indice.row()] for indice in antigos]
+        alterar()
+        self._ordenar()
+        if antigos:
+            posicao = {linha: n for n, linha in enumerate(self._visiveis)}
+            novos = [
+                self.index(posicao[linha], indice.column()) if linha in posicao else QtCore.QModelIndex()
+                for linha, indice in zip(origem, antigos)
+            ]
+            self.changePersistentIndexList(antigos, novos)
+        self.layoutChanged.emit()
+
+
+class TrabalhadorBusca(QtCore.QObject):
+    """Roda a busca (pipeline) fora da thread da interface e entrega um lote por página."""
+
+    lote = QtCore.Signal(str, list, list)
+    novidades = QtCore.Signal(int)
+    erro = QtCore.Signal(str, str)
+    terminou = QtCore.Signal(int)
+
+    def __init__(self, termo, paginas, lojas, mudancas):
+        super().__init__()
+        self.termo = termo
+        self.paginas = paginas
+        self.lojas = lojas
+        self.mudancas = mudancas
+        self._cancelar = threading.Event()
+
+    def cancelar(self):
+        """Chamado da thread da interface: a busca para sem esperar as páginas que faltam."""
+        self._cancelar.set()
+
+    def _gravar(self, registros):
+        # O pipeline chama em lotes; o histórico recebe só as novidades
+        self.novidades.emit(len(self.mudancas.processar(registros, termo=self.termo)))
+
+    @QtCore.Slot()
+    def executar(self):
+        tempo = datetime.now().strftime("%H:%M:%S")
+        total = 0
+        busca = executar_pipeline(self.termo, self.paginas, tempo, lojas=list(self.lojas), gravar=self._gravar,
+                                  cancelar=self._cancelar)
+        try:
+            for loja, itens, erro in busca:
+                if self._cancelar.is_set():
+                    break
+                if erro is not None:
+                    self.erro.emit(loja, str(erro))
+                    continue
+                if not itens:
+                    continue
+                # Os preços já chegam convertidos dos processos de parse
+                precos = [item["Preço Numérico"] for item in itens]
+                total += len(itens)
+                self.lote.emit(loja, itens, precos)
+        except Exception as e:
+            self.erro.emit("", str(e))
+        finally:
+            busca.close()
+            self.terminou.emit(total)
+
 
 class Aplicativo(QtWidgets.QWidget):
     def __init__(self):
@@ -29,13 +216,46 @@ class Aplicativo(QtWidgets.QWidget):
         self.button = QtWidgets.QPushButton("Pesquisar")
         self.label = QtWidgets.QLabel("Esperando entrada...", alignment=QtCore.Qt.AlignCenter)
 
+        self.filtro_texto = QtWidgets.QLineEdit()
+        self.filtro_texto.setPlaceholderText("Filtrar pelo nome...")
+        self.preco_minimo = QtWidgets.QLineEdit()
+        self.preco_minimo.setPlaceholderText("Preço mínimo")
+        self.preco_maximo = QtWidgets.QLineEdit()
+        self.preco_maximo.setPlaceholderText("Preço máximo")
+        filtros = QtWidgets.QHBoxLayout()
+        filtros.addWidget(self.filtro_texto)
+        filtros.addWidget(self.preco_minimo)
+        filtros.addWidget(self.preco_maximo)
+
+        self.modelo = ModeloResultados(self)
+        self.tabela = QtWidgets.QTableView()
+        self.tabela.setModel(self.modelo)
+        self.tabela.horizontalHeader().setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+        self.tabela.setSortingEnabled(True)
+        self.tabela.setAlternatingRowColors(True)
+        self.tabela.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        # Altura fixa: a view não mede cada linha, então a rolagem continua leve com muitas linhas
+        self.tabela.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.tabela.verticalHeader().setDefaultSectionSize(22)
+        self.tabela.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.Stretch)
+
         layout = QtWidgets.QVBoxLayout(self)
         layout.addWidget(self.input)
         layout.addWidget(self.pages)
         layout.addWidget(self.combo)
         layout.addWidget(self.button)
         layout.addWidget(self.label)
+        layout.addLayout(filtros)
+        layout.addWidget(self.tabela)
         self.button.clicked.connect(self.executar)
+        self.filtro_texto.textChanged.connect(self.aplicar_filtro)
+        self.preco_minimo.textChanged.connect(self.aplicar_filtro)
+        self.preco_maximo.textChanged.connect(self.aplicar_filtro)
+
+        self.historico = HistoricoPrecos()
+        self.mudancas = DetectorMudancas(self.historico)
+        self._thread = None
+        self._novidades = 0
 
         self.funcoes = {
             "AliExpress": aliexpress,
@@ -44,62 +264,85 @@ class Aplicativo(QtWidgets.QWidget):
             "Mercado Livre": mercadolivre,
             "Pichau": pichau,
             "Terabyte Shop": terabyte,
-            "Todas as Lojas": lambda termo, paginas, tempo: self.todas_as_lojas()
         }
 
     def executar(self):
         termo = self.input.text()
         paginas = self.pages.text()
-        tempo = datetime.now().strftime("%H:%M:%S")
 
         loja = self.combo.currentText()
-        funcao = self.funcoes.get(loja)
-
-        if funcao:
-            resultados = funcao(termo, paginas, tempo)
+        if loja == "Todas as Lojas":
+            lojas = self.funcoes
+        elif loja in self.funcoes:
+            lojas = {loja: self.funcoes[loja]}
+        else:
+            self.label.setText("Erro: Selecione uma loja válida.")
+            return
 
-            self.label.setText(f"Resultados encontrados: {len(resultados)}\nTempo: {tempo}")
+        self.modelo.limpar()
+        self._novidades = 0
+        self.button.setEnabled(False)
+        self.label.setText(f"Buscando '{termo}'...")
 
-            if not os.path.exists("resultados"):
-                os.makedirs("resultados")
+        # A busca roda numa QThread; os resultados chegam por sinais, na thread da interface
+        self._thread = QtCore.QThread(self)
+        self._trabalhador = TrabalhadorBusca(termo, paginas, lojas, self.mudancas)
+        self._trabalhador.moveToThread(self._thread)
+        self._thread.started.connect(self._trabalhador.executar)
+        self._trabalhador.lote.connect(self.receber_lote)
+        self._trabalhador.novidades.connect(self.receber_novidades)
+        self._trabalhador.erro.connect(self.receber_erro)
+        self._trabalhador.terminou.connect(self.busca_terminada)
+        self._trabalhador.terminou.connect(self._thread.quit)
+        self._thread.finished.connect(self._trabalhador.deleteLater)
+        self._thread.start()
 
-            nome_limpo = re.sub(r'[\\/*?:"<>|]', "_", f"{termo}_{loja}")
+    def receber_lote(self, loja, itens, precos):
+        self.modelo.acrescentar(itens, precos)
+        # Mostra o progresso assim que cada página fica pronta
+        self.label.setText(f"{loja}: {len(itens)} resultados (total parcial: {self.modelo.total})")
 
-            caminho = f"resultados/{nome_limpo}.txt"
+    def receber_novidades(self, quantidade):
+        self._novidades += quantidade
 
-            with open(caminho, "w", encoding="utf-8") as f:
-                for item in resultados:
-                    if isinstance(item, dict):
-                        for chave, valor in item.items():
-                            if isinstance(valor, str):
-                                valor = valor.replace('\xa0', ' ')
-                            f.write(f"{chave}: {valor}\n")
-                        f.write("-" * 30 + "\n")  
-                    else:
-                        f.write(f"{str(item)}\n")
-        else:
-            self.label.setText("Erro: Selecione uma loja válida.")
+    def receber_erro(self, loja, mensagem):
+        print(f"Erro na loja {loja}: {mensagem}")
 
-    def todas_as_lojas(self):
-        termo = self.input.text()
-        paginas = self.pages.text()
+    def busca_terminada(self, total):
         tempo = datetime.now().strftime("%H:%M:%S")
-        resultados = []
-        for func in [aliexpress, amazon, kabum, mercadolivre, pichau, terabyte]:
+        self.label.setText(f"Resultados encontrados: {total} ({self._novidades} novidades)\nTempo: {tempo}")
+        self.button.setEnabled(True)
+
+    def aplicar_filtro(self):
+        def _valor(campo):
+            texto = campo.text().strip().replace(",", ".")
             try:
-                resultados.extend(func(termo, paginas, tempo))
-            except Exception as e:
-                print(f"Erro na loja {func.__name__}: {e}")
-        return resultados
+                return float(texto) if texto else None
+            except ValueError:
+                return None
+        self.modelo.definir_filtro(self.filtro_texto.text(), _valor(self.preco_minimo), _valor(self.preco_maximo))
+
+    def closeEvent(self, evento):
+        # Cancela a busca em andamento e espera ela soltar o histórico antes de fechá-lo
+        if self._thread is not None and self._thread.isRunning():
+            self._trabalhador.cancelar()
+            self._thread.quit()
+            if not self._thread.wait(ESPERA_FECHAR_MS):
+                # Ainda gravando: o histórico fica aberto e o processo termina assim mesmo
+                print("Aviso: a busca não terminou a tempo; fechando sem esperar.")
+                super().closeEvent(evento)
+                return
+        self.mudancas.fechar()
+        self.historico.fechar()
+        super().closeEvent(evento)
 
 
 if __name__ == "__main__":
+    # No executável do PyInstaller, os processos de parse do pipeline reabrem este
+    # mesmo .exe; freeze_support faz eles rodarem o trabalho em vez da interface
+    multiprocessing.freeze_support()
     app = QtWidgets.QApplication([])
     janela = Aplicativo()
-    janela.resize(600, 200)
+    janela.resize(900, 600)
     janela.show()
     sys.exit(app.exec())
-
-
-
-
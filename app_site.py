@@ -1,18 +1,149 @@
-from fastapi import FastAPI
-from scrapers.aliexpress import aliexpress
-from scrapers.amazon import amazon
-from scrapers.kabum import kabum
-from scrapers.mercadolivre import mercadolivre
-from scrapers.pichau import pichau
-from scrapers.terabyteshop import terabyte
+import os
+import json
+import uuid
+import asyncio
 from datetime import datetime
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+
+from scrapers.crawler import interpretar_paginas
+from scrapers.executor import LOJAS, executar_lojas
+from utils.metricas import texto_prometheus
 
 app = FastAPI()
 #criar uma funçao no fastapi para linkar com o html um que seja o de buscar, select boxl, e um buscar
 #ver o melhor modo de fazer isso, e de maneira geral pivotar o projeto para um site, na verdade ter os 2
 #no final de tudo, com tudo feito criar um mini saas vendendo isso e fazer um dashboard de b.i com os
-#melhores preços um dashboar geral, 
-@app.get()
-async def buscar():
-    1
-     
+#melhores preços um dashboar geral,
+
+PASTA_SITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "site")
+MAX_TRABALHOS_GUARDADOS = 200
+
+
+class Trabalho:
+    """Uma busca em andamento (ou terminada). Guarda os eventos para quem conectar depois."""
+
+    def __init__(self, chave):
+        self.id = uuid.uuid4().hex
+        self.chave = chave
+        self.eventos = []
+        self.concluido = False
+        self._novidade = asyncio.Event()
+
+    def publicar(self, evento):
+        self.eventos.append(evento)
+        self._avisar()
+
+    def concluir(self):
+        self.concluido = True
+        self._avisar()
+
+    def _avisar(self):
+        # Acorda quem está esperando e prepara um evento novo para a próxima espera
+        novidade, self._novidade = self._novidade, asyncio.Event()
+        novidade.set()
+
+    async def aguardar_novidade(self):
+        await self._novidade.wait()
+
+
+# Trabalhos por id e buscas em andamento por (termo, loja, páginas)
+_trabalhos = {}
+_em_andamento = {}
+# O asyncio só guarda referência fraca às tasks: sem esta, uma busca pode ser coletada no meio
+_tarefas = set()
+
+def _chave_busca(termo, loja, paginas):
+    # Páginas já interpretadas: "1-3", "3" e "1,2,3" são a mesma busca
+    return (" ".join(termo.lower().split()), loja, tuple(interpretar_paginas(paginas)))
+
+def _rodar_busca(loop, trabalho, termo, loja, paginas):
+    # Roda numa thread: os scrapers são bloqueantes
+    lojas = LOJAS if loja == "Todas as Lojas" else {loja: LOJAS[loja]}
+    tempo = datetime.now().strftime("%H:%M:%S")
+    for nome_loja, resultados, erro in executar_lojas(termo, paginas, tempo, lojas=lojas):
+        # Produto não é serializável em JSON: os eventos levam dicts
+        evento = {"loja": nome_loja, "resultados": [dict(item) for item in resultados], "erro": str(erro) if erro else None}
+        loop.call_soon_threadsafe(trabalho.publicar, evento)
+
+async def _executar(trabalho, termo, loja, paginas):
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, _rodar_busca, loop, trabalho, termo, loja, paginas)
+    except Exception as e:
+        trabalho.publicar({"loja": loja, "resultados": [], "erro": str(e)})
+    finally:
+        _em_andamento.pop(trabalho.chave, None)
+        trabalho.concluir()
+        # Descarta os trabalhos terminados mais antigos
+        while len(_trabalhos) > MAX_TRABALHOS_GUARDADOS:
+            mais_antigo = next(iter(_trabalhos))
+            if not _trabalhos[mais_antigo].concluido:
+                break
+            del _trabalhos[mais_antigo]
+
+@app.get("/")
+async def index():
+    return FileResponse(os.path.join(PASTA_SITE, "index.html"))
+
+@app.post("/buscar")
+async def buscar(termo: str, loja: str = "Todas as Lojas", paginas: str = "1"):
+    if loja != "Todas as Lojas" and loja not in LOJAS:
+        raise HTTPException(status_code=400, detail=f"Loja inválida: {loja}")
+    if not termo.strip():
+        raise HTTPException(status_code=400, detail="Informe um termo de busca.")
+
+    try:
+        chave = _chave_busca(termo, loja, paginas)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    trabalho = _em_andamento.get(chave)
+    if trabalho is not None:
+        # Mesma busca já rodando: todo mundo acompanha o mesmo trabalho
+        return {"job_id": trabalho.id, "reaproveitado": True}
+
+    trabalho = Trabalho(chave)
+    _trabalhos[trabalho.id] = trabalho
+    _em_andamento[chave] = trabalho
+    tarefa = asyncio.create_task(_executar(trabalho, termo, loja, paginas))
+    _tarefas.add(tarefa)
+    tarefa.add_done_callback(_tarefas.discard)
+    return {"job_id": trabalho.id, "reaproveitado": False}
+
+def _obter_trabalho(job_id):
+    trabalho = _trabalhos.get(job_id)
+    if trabalho is None:
+        raise HTTPException(status_code=404, detail="Busca não encontrada.")
+    return trabalho
+
+@app.get("/buscar/{job_id}")
+async def situacao(job_id: str):
+    trabalho = _obter_trabalho(job_id)
+    return {"job_id": trabalho.id, "concluido": trabalho.concluido, "eventos": trabalho.eventos}
+
+@app.get("/buscar/{job_id}/eventos")
+async def eventos(job_id: str):
+    trabalho = _obter_trabalho(job_id)
+
+    async def fluxo():
+        enviados = 0
+        while True:
+            while enviados < len(trabalho.eventos):
+                yield f"event: loja\ndata: {json.dumps(trabalho.eventos[enviados], ensure_ascii=False)}\n\n"
+                enviados += 1
+            if trabalho.concluido:
+                yield "event: fim\ndata: {}\n\n"
+                return
+            await trabalho.aguardar_novidade()
+
+    return StreamingResponse(fluxo(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/metrics")
+async def metricas():
+    # Só tem conteúdo com as métricas ligadas (PRICEWATCHER_METRICAS=1)
+    return PlainTextResponse(texto_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=8000)
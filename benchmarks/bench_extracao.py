@@ -0,0 +1,115 @@
+# benchmarks/bench_extracao.py
+#
+# Compara a extração antiga (BeautifulSoup + html.parser + regex nas classes)
+# com a nova (lxml + XPath pré-compilado) nas páginas de cada loja.
+#
+#   python -m benchmarks.bench_extracao [--rodadas 20]
+
+import os
+import re
+import time
+import argparse
+from bs4 import BeautifulSoup
+
+from scrapers.extracao import extrair_produtos
+from benchmarks.paginas_sinteticas import PASTA_PAGINAS, gerar_pagina
+
+def _bs4_zip(site, classe_nome, classe_preco, com_link=False):
+    def extrair(html, time_str):
+        soup = BeautifulSoup(html, "html.parser")
+        nomes_elems = soup.find_all(class_=re.compile(rf"\b{classe_nome}\b"))
+        preco_elems = soup.find_all(class_=re.compile(rf"\b{classe_preco}\b"))
+        produtos_raspados = []
+        for nome_elem, preco_elem in zip(nomes_elems, preco_elems):
+            produto = {
+                "Site": site,
+                "Nome do Produto": nome_elem.get_text(strip=True),
+                "Preço Bruto": preco_elem.get_text(strip=True),
+            }
+            if com_link:
+                produto["Link do Produto"] = nome_elem.get('href') if nome_elem else "N/A"
+            produto["Data do Scraping"] = time_str
+            produtos_raspados.append(produto)
+        return produtos_raspados
+    return extrair
+
+def _bs4_aliexpress(html, time_str):
+    soup = BeautifulSoup(html, "html.parser")
+    nomes_elems = soup.find_all(class_=re.compile(r"\bkr_j0\b"))
+    precos_divs = soup.find_all(class_=re.compile(r"\bkr_kj\b"))
+    produtos_raspados = []
+    for nome_elem, preco_div in zip(nomes_elems, precos_divs):
+        spans = preco_div.find_all('span')
+        produtos_raspados.append({
+            "Site": "AliExpress",
+            "Nome do Produto": nome_elem.get_text(strip=True),
+            "Preço Bruto": ''.join(span.get_text() for span in spans).strip(),
+            "Data do Scraping": time_str
+        })
+    return produtos_raspados
+
+def _bs4_mercadolivre(html, time_str):
+    soup = BeautifulSoup(html, "html.parser")
+    produtos_raspados = []
+    for item in soup.find_all('li', class_='ui-search-layout__item'):
+        nome_elem = item.find('h3', class_='poly-component__title-wrapper')
+        link_elem = nome_elem.find('a') if nome_elem else None
+        preco_text_bruto = "N/A"
+        preco_container = item.find('div', class_='poly-price__current')
+        if preco_container:
+            preco_frac = preco_container.find('span', class_='andes-money-amount__fraction')
+            preco_simbolo = preco_container.find('span', class_='andes-money-amount__currency-symbol')
+            preco_text_bruto = ""
+            if preco_simbolo:
+                preco_text_bruto += preco_simbolo.get_text(strip=True)
+            if preco_frac:
+                preco_text_bruto += preco_frac.get_text(strip=True)
+        produtos_raspados.append({
+            "Site": "Mercado Livre",
+            "Nome do Produto": nome_elem.get_text(strip=True) if nome_elem else "N/A",
+            "Preço Bruto": preco_text_bruto,
+            "Link do Produto": link_elem.get('href') if link_elem else "N/A",
+            "Data do Scraping": time_str
+        })
+    return produtos_raspados
+
+# Implementação antiga de cada loja, copiada dos scrapers antes da troca para lxml
+EXTRACAO_BS4 = {
+    "aliexpress": _bs4_aliexpress,
+    "amazon": _bs4_zip("Amazon", "a-text-normal", "a-offscreen"),
+    "kabum": _bs4_zip("Kabum", "nameCard", "priceCard"),
+    "mercadolivre": _bs4_mercadolivre,
+    "pichau": _bs4_zip("Pichau", "MuiTypography-root", "mui-1q2ojdg-price_vista"),
+    "terabyte": _bs4_zip("TerabyteShop", "product-item__name", "product-item__new-price", com_link=True),
+}
+
+def carregar_pagina(loja):
+    caminho = os.path.join(PASTA_PAGINAS, f"{loja}.html")
+    if os.path.exists(caminho):
+        with open(caminho, "r", encoding="utf-8") as f:
+            return f.read()
+    return gerar_pagina(loja)
+
+def cronometrar(funcao, rodadas):
+    tempos = []
+    for _ in range(rodadas):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), sum(tempos) / len(tempos)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rodadas", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'loja':<14}{'itens':>7}{'bs4 (ms)':>12}{'lxml (ms)':>12}{'ganho':>8}")
+    for loja, antiga in EXTRACAO_BS4.items():
+        html = carregar_pagina(loja)
+        itens = len(extrair_produtos(loja, html, "00:00:00"))
+        _, media_bs4 = cronometrar(lambda: antiga(html, "00:00:00"), args.rodadas)
+        _, media_lxml = cronometrar(lambda: extrair_produtos(loja, html, "00:00:00"), args.rodadas)
+        print(f"{loja:<14}{itens:>7}{media_bs4 * 1000:>12.2f}{media_lxml * 1000:>12.2f}{media_bs4 / media_lxml:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# benchmarks/bench_memoria.py
+#
+# Memória de uma busca grande guardada como lista de dicts (formato antigo)
+# e como lista de Produto (utils/produto.py), e o tempo de montar o
+# DataFrame a partir de cada uma. Os registros saem da extração e da
+# normalização do pipeline, como numa busca de verdade.
+#
+# Cada formato é medido num processo novo: tracemalloc conta só o que o
+# Python alocou e continua vivo; o RSS (memória do processo para o sistema)
+# pega também a fragmentação e o que o alocador não devolveu.
+#
+#   python -m benchmarks.bench_memoria [--anuncios 100000]
+
+import gc
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tracemalloc
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from scrapers.extracao import REGRAS
+from scrapers.pipeline import processar_pagina
+from utils.produto import para_dataframe
+from benchmarks.bench_extracao import carregar_pagina
+
+def raspar(anuncios, como_dict):
+    """'anuncios' registros extraídos das páginas de exemplo, uma loja de cada vez."""
+    paginas = [(loja, carregar_pagina(loja)) for loja in REGRAS]
+    registros = []
+    while len(registros) < anuncios:
+        for loja, html in paginas:
+            pagina = processar_pagina(loja, html, "00:00:00")
+            if como_dict:
+                pagina = [dict(item) for item in pagina]
+            registros.extend(pagina)
+    del registros[anuncios:]
+    return registros
+
+def conferir_textos(registros):
+    # Um _ElementUnicodeResult (smart string do lxml) prende a árvore da página inteira na memória
+    for registro in registros:
+        for campo, valor in registro.items():
+            if campo != "Preço Numérico" and type(valor) is not str:
+                raise AssertionError(f"{campo} é {type(valor).__name__}, não str: {valor!r}")
+
+def rss_atual():
+    """RSS do processo em bytes (Linux), ou None."""
+    try:
+        with open("/proc/self/statm") as arquivo:
+            return int(arquivo.read().split()[1]) * resource.getpagesize()
+    except (OSError, AttributeError):
+        return None
+
+def rss_pico():
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB no Linux, bytes no macOS
+    return pico if sys.platform == "darwin" else pico * 1024
+
+def medir_memoria(anuncios, como_dict):
+    # Só o que continua vivo no fim (registros e os textos deles), não o pico da extração
+    gc.collect()
+    rss_antes = rss_atual()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    registros = raspar(anuncios, como_dict)
+    gc.collect()
+    depois = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    rss_depois = rss_atual()
+    conferir_textos(registros)
+    return registros, {
+        "tracemalloc": depois - antes,
+        "rss": None if rss_antes is None else rss_depois - rss_antes,
+        "rss_pico": rss_pico(),
+    }
+
+def medir_em_processo(anuncios, formato):
+    saida = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_memoria", "--anuncios", str(anuncios), "--medir", formato],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(saida.splitlines()[-1])
+
+def cronometrar(funcao, rodadas):
+    tempos = []
+    for _ in range(rodadas):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+def _mib(valor):
+    return "-" if valor is None else f"{valor / 2**20:.1f}"
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--anuncios", type=int, default=100_000)
+    parser.add_argument("--rodadas", type=int, default=5)
+    parser.add_argument("--medir", choices=("dict", "Produto"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        # Processo filho: mede um formato e devolve os números em JSON
+        _, medidas = medir_memoria(args.anuncios, como_dict=args.medir == "dict")
+        print(json.dumps(medidas))
+        return
+
+    medidas = {formato: medir_em_processo(args.anuncios, formato) for formato in ("dict", "Produto")}
+
+    print(f"{args.anuncios} anúncios (MiB)")
+    print(f"{'formato':<10}{'tracemalloc':>14}{'bytes/anúncio':>16}{'RSS':>10}{'pico RSS':>12}")
+    for formato, medida in medidas.items():
+        print(f"{formato:<10}{_mib(medida['tracemalloc']):>14}{medida['tracemalloc'] / args.anuncios:>16.0f}"
+              f"{_mib(medida['rss']):>10}{_mib(medida['rss_pico']):>12}")
+    print(f"redução (tracemalloc): {1 - medidas['Produto']['tracemalloc'] / medidas['dict']['tracemalloc']:.0%}")
+    if medidas["dict"]["rss"]:
+        print(f"redução (RSS): {1 - medidas['Produto']['rss'] / medidas['dict']['rss']:.0%}")
+
+    dicts, _ = medir_memoria(args.anuncios, como_dict=True)
+    produtos, _ = medir_memoria(args.anuncios, como_dict=False)
+    print(f"\n{'DataFrame':<34}{'ms':>10}")
+    casos = (
+        ("pd.DataFrame(dicts)", lambda: pd.DataFrame(dicts)),
+        ("para_dataframe(dicts)", lambda: para_dataframe(dicts)),
+        ("para_dataframe(produtos)", lambda: para_dataframe(produtos)),
+    )
+    for nome, funcao in casos:
+        print(f"{nome:<34}{cronometrar(funcao, args.rodadas) * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
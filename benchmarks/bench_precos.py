@@ -0,0 +1,85 @@
+# benchmarks/bench_precos.py
+#
+# Compara a conversão de preços antiga (apply com re.sub por linha) com a
+# versão vetorizada de utils/data_processor.py.
+#
+#   python -m benchmarks.bench_precos [--linhas 200000]
+
+import io
+import re
+import time
+import random
+import argparse
+import contextlib
+import pandas as pd
+
+from utils.data_processor import limpar_e_converter_preco
+
+EXEMPLOS = [
+    "R$ {r},{c}", "R$\xa0{r},{c}", "R${r}", "US$ {u}.{c}", "R$ {r},{c} à vista", "{r},{c}", "N/A", "2 tamanhos",
+]
+
+def gerar_precos(linhas, distintos=None, semente=7):
+    # 'distintos' simula o histórico, em que os mesmos anúncios voltam com o mesmo preço
+    rng = random.Random(semente)
+    total = distintos or linhas
+    base = []
+    for _ in range(total):
+        valor = rng.randint(10, 15000)
+        base.append(rng.choice(EXEMPLOS).format(
+            r=f"{valor:,}".replace(",", "."), u=f"{valor:,}", c=f"{rng.randint(0, 99):02d}"
+        ))
+    if distintos is None:
+        return base
+    return [rng.choice(base) for _ in range(linhas)]
+
+def limpar_e_converter_preco_antigo(df):
+    # Versão anterior, mantida só para comparação
+    df['Preço Bruto'] = df['Preço Bruto'].astype(str)
+
+    def _limpar_preco_individual(preco_str):
+        if not isinstance(preco_str, str):
+            return None
+        preco_str = preco_str.replace('R$', '').replace('US$', '').strip()
+        if ',' in preco_str and '.' in preco_str:
+            preco_limpo = preco_str.replace('.', '').replace(',', '.')
+        elif ',' in preco_str:
+            preco_limpo = preco_str.replace(',', '.')
+        else:
+            preco_limpo = preco_str
+        preco_limpo = re.sub(r'[^\d.]', '', preco_limpo)
+        try:
+            return float(preco_limpo)
+        except ValueError:
+            print(f"Não foi possível converter o preço: '{preco_str}' para numérico.")
+            return None
+
+    df['Preço Numérico'] = df['Preço Bruto'].apply(_limpar_preco_individual)
+    return df
+
+def cronometrar(funcao, precos, rodadas):
+    tempos = []
+    for _ in range(rodadas):
+        df = pd.DataFrame({"Preço Bruto": precos})
+        inicio = time.perf_counter()
+        # A versão antiga imprime cada falha; o custo do print faz parte da medição
+        with contextlib.redirect_stdout(io.StringIO()):
+            funcao(df)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, default=200_000)
+    parser.add_argument("--distintos", type=int, default=5_000)
+    parser.add_argument("--rodadas", type=int, default=3)
+    args = parser.parse_args()
+
+    for descricao, distintos in [(f"{args.distintos} preços distintos", args.distintos), ("todos distintos", None)]:
+        precos = gerar_precos(args.linhas, distintos)
+        antigo = cronometrar(limpar_e_converter_preco_antigo, precos, args.rodadas)
+        novo = cronometrar(limpar_e_converter_preco, precos, args.rodadas)
+        print(f"{args.linhas} linhas ({descricao}): antigo {antigo:.3f}s, vetorizado {novo:.3f}s ({antigo / novo:.1f}x)")
+
+if __name__ == "__main__":
+    main()
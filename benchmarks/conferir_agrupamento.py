@@ -0,0 +1,78 @@
+# benchmarks/conferir_agrupamento.py
+#
+# Confere o agrupamento com índice de blocos (utils/agrupamento.py) contra a
+# comparação de todos com todos (process.cdist na matriz inteira) numa
+# amostra de nomes com variações (erros de digitação, tokens a menos, tokens
+# colados). Sai com código 1 se algum nome ficar em grupo diferente.
+#
+#   python -m benchmarks.conferir_agrupamento [--nomes 3000] [--threshold 80]
+
+import sys
+import random
+import argparse
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from utils.agrupamento import UniaoBusca, agrupar_nomes
+from utils.data_processor import limpar_nome_produto
+from benchmarks.suite import _nomes_sujos
+
+def _variacao(nome, rng):
+    tokens = nome.split()
+    escolha = rng.random()
+    if escolha < 0.3 and tokens:
+        # Troca uma letra de um token
+        i = rng.randrange(len(tokens))
+        if tokens[i]:
+            j = rng.randrange(len(tokens[i]))
+            tokens[i] = tokens[i][:j] + rng.choice("abcdefghijklmnopqrstuvwxyz") + tokens[i][j + 1:]
+    elif escolha < 0.5 and len(tokens) > 1:
+        del tokens[rng.randrange(len(tokens))]
+    elif escolha < 0.7 and len(tokens) > 1:
+        i = rng.randrange(len(tokens) - 1)
+        tokens[i:i + 2] = [tokens[i] + tokens[i + 1]]
+    elif escolha < 0.8:
+        # Nome curto: só um ou dois tokens do original
+        tokens = tokens[:rng.randint(1, 2)]
+    return " ".join(tokens)
+
+def gerar_amostra(quantidade, semente=5):
+    rng = random.Random(semente)
+    base = [limpar_nome_produto(nome) for nome in _nomes_sujos(quantidade, semente=semente)]
+    nomes = {_variacao(nome, rng) for nome in base} | set(base)
+    return sorted(nome for nome in nomes if nome)
+
+def agrupar_forca_bruta(nomes, threshold=80):
+    """Mesmo critério de agrupar_nomes, comparando cada nome com todos."""
+    ordenados = [" ".join(sorted(nome.split())) for nome in nomes]
+    notas = process.cdist(ordenados, ordenados, scorer=fuzz.ratio, score_cutoff=threshold - 0.5,
+                          dtype=np.float32, workers=-1)
+    uniao = UniaoBusca(len(nomes))
+    linhas, colunas = np.nonzero(notas)
+    pares = linhas < colunas
+    for a, b in zip(linhas[pares].tolist(), colunas[pares].tolist()):
+        uniao.unir(a, b)
+    return np.array([uniao.raiz(i) for i in range(len(nomes))])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nomes", type=int, default=3000)
+    parser.add_argument("--threshold", type=int, default=80)
+    args = parser.parse_args()
+
+    nomes = gerar_amostra(args.nomes)
+    blocos = agrupar_nomes(nomes, threshold=args.threshold)
+    bruto = agrupar_forca_bruta(nomes, threshold=args.threshold)
+    diferentes = [i for i in range(len(nomes)) if blocos[i] != bruto[i]]
+
+    print(f"{len(nomes)} nomes: {len(set(blocos.tolist()))} grupos com blocos, "
+          f"{len(set(bruto.tolist()))} comparando todos com todos")
+    for i in diferentes[:20]:
+        print(f"  '{nomes[i]}': grupo de '{nomes[blocos[i]]}', deveria ser o de '{nomes[bruto[i]]}'")
+    if diferentes:
+        print(f"{len(diferentes)} nomes em grupo diferente")
+        sys.exit(1)
+    print("Grupos idênticos")
+
+if __name__ == "__main__":
+    main()
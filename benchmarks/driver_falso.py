@@ -0,0 +1,147 @@
+# benchmarks/driver_falso.py
+#
+# Ambiente offline para os benchmarks: um WebDriver falso que devolve as
+# páginas de benchmarks/paginas/ e um servidor HTTP local no lugar da Kabum
+# e do Mercado Livre (as lojas com busca sem navegador). Os dois esperam
+# 'latencia' segundos por página, simulando a rede.
+
+import time
+import importlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scrapers import cache, driver_pool, http_fetch
+from scrapers.extracao import extrair_produtos
+from benchmarks.bench_extracao import carregar_pagina
+
+# Trecho do domínio -> loja (nome usado em scrapers/extracao.py)
+LOJA_POR_DOMINIO = {
+    "aliexpress": "aliexpress",
+    "amazon": "amazon",
+    "kabum": "kabum",
+    "mercadolivre": "mercadolivre",
+    "pichau": "pichau",
+    "terabyteshop": "terabyte",
+}
+
+def loja_da_url(url):
+    host = urlparse(url).hostname or ""
+    for trecho, loja in LOJA_POR_DOMINIO.items():
+        if trecho in host:
+            return loja
+    raise ValueError(f"Nenhuma página gravada para {url}")
+
+
+class DriverFalso:
+    """Imita o pedaço da API do WebDriver que os scrapers, o pool e a espera usam."""
+
+    def __init__(self, latencia=0.2):
+        self.latencia = latencia
+        self.current_url = "about:blank"
+        self.page_source = "<html><head></head><body></body></html>"
+        self.window_handles = ["principal"]
+        self._itens = 0
+        self.paginas_servidas = 0
+
+    def get(self, url):
+        time.sleep(self.latencia)
+        loja = loja_da_url(url)
+        self.current_url = url
+        self.page_source = carregar_pagina(loja)
+        # Quantidade de cards que o seletor da espera encontraria
+        self._itens = len(extrair_produtos(loja, self.page_source, ""))
+        self.paginas_servidas += 1
+
+    def execute_script(self, script, *args):
+        # Só o script de estado de scrapers/espera.py é chamado nos scrapers
+        return [self._itens, 0, "complete"]
+
+    def quit(self):
+        self.window_handles = []
+
+
+class _ManipuladorLojas(BaseHTTPRequestHandler):
+    latencia = 0.2
+
+    def do_GET(self):
+        time.sleep(self.latencia)
+        # O primeiro trecho do caminho diz a loja: /kabum/busca/..., /mercadolivre/...
+        loja = self.path.lstrip("/").split("/", 1)[0]
+        try:
+            corpo = carregar_pagina(loja).encode("utf-8")
+        except KeyError:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+@contextmanager
+def servidor_local(latencia=0.2):
+    """Sobe o servidor HTTP das páginas gravadas numa porta livre e devolve a URL base."""
+    manipulador = type("Manipulador", (_ManipuladorLojas,), {"latencia": latencia})
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), manipulador)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+@contextmanager
+def ambiente_offline(latencia=0.2, http=True):
+    """
+    Troca, enquanto o bloco roda, a criação de navegadores pelo DriverFalso,
+    desliga o cache de buscas e aponta Kabum e Mercado Livre para o servidor
+    local (ou desliga o HTTP, com http=False, para tudo passar pelo driver).
+    """
+    # import_module devolve o módulo, não a função de mesmo nome reexportada
+    modulo_kabum = importlib.import_module("scrapers.kabum")
+    modulo_ml = importlib.import_module("scrapers.mercadolivre")
+    modulo_terabyte = importlib.import_module("scrapers.terabyteshop")
+    originais = {
+        "fabricas": dict(driver_pool.FABRICAS),
+        "cache": cache.CACHE_ATIVO,
+        "http": http_fetch.HTTP_ATIVO,
+        "kabum": modulo_kabum.URL_BASE,
+        "ml": modulo_ml.URL_BASE,
+        "perfil": modulo_terabyte.carregar_caminho_perfil,
+    }
+    drivers = []
+
+    def _fabrica(opcoes):
+        driver = DriverFalso(latencia)
+        drivers.append(driver)
+        return driver
+
+    driver_pool.encerrar_pools()
+    driver_pool._pools.clear()
+    with servidor_local(latencia) as url_base, tempfile.TemporaryDirectory() as perfil:
+        driver_pool.FABRICAS.update(chrome=_fabrica, firefox=_fabrica)
+        cache.CACHE_ATIVO = False
+        http_fetch.HTTP_ATIVO = http
+        modulo_kabum.URL_BASE = f"{url_base}/kabum"
+        modulo_ml.URL_BASE = f"{url_base}/mercadolivre"
+        # A Terabyte pede o caminho do perfil do Firefox no terminal
+        modulo_terabyte.carregar_caminho_perfil = lambda: perfil
+        try:
+            yield drivers
+        finally:
+            driver_pool.encerrar_pools()
+            driver_pool._pools.clear()
+            driver_pool.FABRICAS.clear()
+            driver_pool.FABRICAS.update(originais["fabricas"])
+            cache.CACHE_ATIVO = originais["cache"]
+            http_fetch.HTTP_ATIVO = originais["http"]
+            modulo_kabum.URL_BASE = originais["kabum"]
+            modulo_ml.URL_BASE = originais["ml"]
+            modulo_terabyte.carregar_caminho_perfil = originais["perfil"]
@@ -0,0 +1,114 @@
+# benchmarks/paginas_sinteticas.py
+
+import os
+import random
+
+# Gera páginas de busca com a mesma marcação que os scrapers procuram em cada
+# loja, cercadas de "ruído" (menus, scripts, divs aninhadas) para o tamanho
+# ficar parecido com o das páginas reais.
+#
+# As páginas em benchmarks/paginas/ saíram daqui (não são gravações das lojas):
+#   python -m benchmarks.paginas_sinteticas
+# Para medir com páginas reais, salve o page_source de uma busca por cima do
+# arquivo da loja; os benchmarks usam o que estiver na pasta.
+
+PASTA_PAGINAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "paginas")
+
+NOMES = [
+    "Placa de Vídeo RTX 4060 8GB GDDR6", "SSD Kingston NV2 1TB NVMe M.2", "Mouse Logitech G305 Sem Fio",
+    "Monitor Gamer LG 24GB 144Hz IPS", "Teclado Mecânico Redragon Kumara", "Memória RAM Kingston Fury 16GB 3200MHz",
+    "Headset HyperX Cloud Stinger", "Processador Ryzen 5 5600 3.5GHz", "Celular Samsung Galaxy A15 128GB",
+    "Notebook Lenovo IdeaPad 3 15.6 8GB",
+]
+
+def _ruido(rng, quantidade=40):
+    blocos = []
+    for i in range(quantidade):
+        blocos.append(
+            f'<div class="nav-item x{rng.randint(0, 999)}"><span class="label">Categoria {i}</span>'
+            f'<a href="/c/{i}" class="link muted">Ver mais</a><script>window.__d{i}={{a:{i}}}</script></div>'
+        )
+    return "".join(blocos)
+
+def _preco(rng):
+    reais = rng.randint(29, 8999)
+    centavos = rng.randint(0, 99)
+    return f"{reais:,}".replace(",", "."), f"{centavos:02d}"
+
+def _cartao_aliexpress(i, nome, rng):
+    reais, centavos = _preco(rng)
+    return (
+        f'<div class="search-card-item"><div class="kr_ab"><h3 class="kr_j0">{nome} #{i}</h3></div>'
+        f'<div class="kr_kj"><span>R$</span><span>{reais}</span><span>,</span><span>{centavos}</span></div></div>'
+    )
+
+def _cartao_amazon(i, nome, rng):
+    reais, centavos = _preco(rng)
+    return (
+        f'<div data-component-type="s-search-result" data-asin="B0{i:08d}" class="s-result-item"><div class="a-section">'
+        f'<h2 class="a-size-mini"><a href="/dp/B0{i:08d}"><span class="a-size-base-plus a-color-base a-text-normal">{nome} #{i}</span></a></h2>'
+        f'<span class="a-price"><span class="a-offscreen">R$\xa0{reais},{centavos}</span><span aria-hidden="true">R${reais}</span></span>'
+        f'</div></div>'
+    )
+
+def _cartao_kabum(i, nome, rng):
+    reais, centavos = _preco(rng)
+    return (
+        f'<article class="productCard sc-abc"><a href="/produto/{i}"><span class="nameCard sc-xyz">{nome} #{i}</span></a>'
+        f'<span class="priceCard sc-def">R$\xa0{reais},{centavos}</span></article>'
+    )
+
+def _cartao_mercadolivre(i, nome, rng):
+    reais, _ = _preco(rng)
+    return (
+        f'<li class="ui-search-layout__item"><div class="poly-card">'
+        f'<h3 class="poly-component__title-wrapper"><a href="https://produto.mercadolivre.com.br/MLB-{i}">{nome} #{i}</a></h3>'
+        f'<div class="poly-price__current"><span class="andes-money-amount">'
+        f'<span class="andes-money-amount__currency-symbol">R$</span><span class="andes-money-amount__fraction">{reais}</span>'
+        f'</span></div></div></li>'
+    )
+
+def _cartao_pichau(i, nome, rng):
+    reais, centavos = _preco(rng)
+    return (
+        f'<a data-cy="list-product" href="/produto-{i}"><div class="MuiCardContent-root">'
+        f'<h2 class="MuiTypography-root MuiTypography-h6">{nome} #{i}</h2>'
+        f'<div class="mui-1q2ojdg-price_vista">R$ {reais},{centavos}</div></div></a>'
+    )
+
+def _cartao_terabyte(i, nome, rng):
+    reais, centavos = _preco(rng)
+    return (
+        f'<div class="product-item"><a class="product-item__name" href="https://www.terabyteshop.com.br/produto/{i}">'
+        f'<h2>{nome} #{i}</h2></a><div class="product-item__new-price"><span>R$ {reais},{centavos}</span></div></div>'
+    )
+
+CARTOES = {
+    "aliexpress": _cartao_aliexpress,
+    "amazon": _cartao_amazon,
+    "kabum": _cartao_kabum,
+    "mercadolivre": _cartao_mercadolivre,
+    "pichau": _cartao_pichau,
+    "terabyte": _cartao_terabyte,
+}
+
+def gerar_pagina(loja, produtos=60, semente=42):
+    rng = random.Random(f"{loja}-{semente}")
+    cartoes = "".join(
+        CARTOES[loja](i, NOMES[i % len(NOMES)], rng) + _ruido(rng, 5)
+        for i in range(produtos)
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>Busca {loja}</title></head><body>"
+        f"<header>{_ruido(rng)}</header><main>{cartoes}</main><footer>{_ruido(rng)}</footer>"
+        f"</body></html>"
+    )
+
+def salvar_paginas(pasta=PASTA_PAGINAS):
+    os.makedirs(pasta, exist_ok=True)
+    for loja in CARTOES:
+        with open(os.path.join(pasta, f"{loja}.html"), "w", encoding="utf-8") as f:
+            f.write(gerar_pagina(loja))
+
+if __name__ == "__main__":
+    salvar_paginas()
@@ -0,0 +1,196 @@
+# benchmarks/suite.py
+#
+# Suite de benchmarks offline: extração de cada loja, conversão de preços,
+# normalização de nomes, agrupamento (do zero e incremental no catálogo) e
+# uma busca "Todas as Lojas" completa com o driver falso e o servidor local
+# (benchmarks/driver_falso.py).
+# Grava os tempos em JSON para comparar commits:
+#
+#   python -m benchmarks.suite                          # grava benchmarks/resultados/<commit>.json
+#   python -m benchmarks.suite --comparar antes.json    # e compara com uma execução anterior
+#   python -m benchmarks.suite --filtro extracao        # só os benchmarks com "extracao" no nome
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import statistics
+import contextlib
+import tempfile
+import subprocess
+from datetime import datetime
+import pandas as pd
+
+from scrapers.extracao import REGRAS, extrair_produtos
+from scrapers.executor import executar_lojas
+from scrapers.pipeline import executar_pipeline
+from utils import data_processor
+from utils.catalogo import CatalogoProdutos
+from benchmarks.bench_extracao import carregar_pagina
+from benchmarks.bench_precos import gerar_precos
+from benchmarks.paginas_sinteticas import NOMES
+from benchmarks.driver_falso import ambiente_offline
+
+PASTA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+
+# Diferença de mediana (em %) a partir da qual a comparação acusa regressão
+TOLERANCIA_PADRAO = 10.0
+
+def medir(funcao, rodadas, preparar=None, aquecimento=1):
+    """
+    Roda 'funcao' várias vezes e devolve as estatísticas em segundos.
+    'preparar' (opcional) roda antes de cada rodada, fora da medição, e o
+    que ele devolver é passado para 'funcao'.
+    """
+    tempos = []
+    for rodada in range(aquecimento + rodadas):
+        argumentos = preparar() if preparar else ()
+        inicio = time.perf_counter()
+        funcao(*argumentos)
+        decorrido = time.perf_counter() - inicio
+        if rodada >= aquecimento:
+            tempos.append(decorrido)
+    media = statistics.fmean(tempos)
+    return {
+        "min": min(tempos),
+        "max": max(tempos),
+        "media": media,
+        "mediana": statistics.median(tempos),
+        "desvio": statistics.stdev(tempos) if len(tempos) > 1 else 0.0,
+        "rodadas": len(tempos),
+        "ops": 1 / media if media else None,
+    }
+
+def _nomes_sujos(quantidade, semente=3):
+    rng = random.Random(semente)
+    sufixos = ["Novo", "Oferta", "Frete Grátis", "Pronta Entrega", "Preto", "Branco", "Edição 2024", ""]
+    return [f"{rng.choice(NOMES)} {rng.choice(sufixos)} {rng.randint(1, quantidade // 10)}" for _ in range(quantidade)]
+
+def _casos(args):
+    """Lista de (nome, função, rodadas, preparar, extra)."""
+    casos = []
+    for loja in REGRAS:
+        html = carregar_pagina(loja)
+        casos.append((f"extracao/{loja}", lambda html=html, loja=loja: extrair_produtos(loja, html, "00:00:00"),
+                      args.rodadas, None, {"bytes_html": len(html)}))
+
+    precos = gerar_precos(args.linhas, distintos=args.linhas // 40)
+    casos.append(("precos/limpar_e_converter_preco", data_processor.limpar_e_converter_preco, args.rodadas,
+                  lambda: (pd.DataFrame({"Preço Bruto": precos}),), {"linhas": args.linhas}))
+
+    nomes = _nomes_sujos(args.linhas // 4)
+    def _preparar_nomes():
+        # Mede a normalização sem o lru_cache já aquecido pela rodada anterior
+        data_processor._normalizar_nome.cache_clear()
+        return ()
+    casos.append(("nomes/limpar_nome_produto", lambda: [data_processor.limpar_nome_produto(n) for n in nomes],
+                  args.rodadas, _preparar_nomes, {"nomes": len(nomes)}))
+
+    grupos = _nomes_sujos(args.grupos)
+    casos.append(("grupos/agrupar_produtos_similares", data_processor.agrupar_produtos_similares,
+                  max(args.rodadas // 5, 1), lambda: (pd.DataFrame({"Nome do Produto": grupos}),),
+                  {"linhas": len(grupos)}))
+
+    # Lote de 500 nomes inéditos num catálogo que já tem o histórico de 'args.grupos' nomes
+    pasta_catalogo = tempfile.TemporaryDirectory()
+    catalogo = CatalogoProdutos(os.path.join(pasta_catalogo.name, "catalogo.db"))
+    catalogo.atribuir(grupos)
+    lotes = iter(_nomes_sujos(500 * (args.rodadas + 1) * 4, semente=11))
+    def _preparar_lote():
+        return ([f"{next(lotes)} lote" for _ in range(500)],)
+    # '_pasta' segura a pasta temporária enquanto o caso existir
+    casos.append(("grupos/catalogo_lote_500", lambda nomes, _pasta=pasta_catalogo: catalogo.atribuir(nomes),
+                  args.rodadas, _preparar_lote, {"historico": len(grupos)}))
+
+    def _todas_as_lojas():
+        tempo = datetime.now().strftime("%H:%M:%S")
+        return sum(len(resultados) for _, resultados, _ in executar_lojas("ssd", args.paginas, tempo))
+    casos.append(("e2e/todas_as_lojas", _todas_as_lojas, max(args.rodadas // 10, 1), None,
+                  {"paginas": args.paginas, "latencia": args.latencia}))
+
+    def _pipeline():
+        tempo = datetime.now().strftime("%H:%M:%S")
+        return sum(len(registros) for _, registros, _ in executar_pipeline("ssd", args.paginas, tempo))
+    casos.append(("e2e/pipeline", _pipeline, max(args.rodadas // 10, 1), None,
+                  {"paginas": args.paginas, "latencia": args.latencia}))
+    return casos
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def executar(args):
+    resultados = {}
+    with ambiente_offline(latencia=args.latencia):
+        for nome, funcao, rodadas, preparar, extra in _casos(args):
+            if args.filtro and args.filtro not in nome:
+                continue
+            # Os scrapers imprimem avisos; não entram na saída da suite
+            with contextlib.redirect_stdout(io.StringIO()):
+                estatisticas = medir(funcao, rodadas, preparar)
+            estatisticas.update(extra)
+            resultados[nome] = estatisticas
+            print(f"{nome:<40}{estatisticas['mediana'] * 1000:>12.2f} ms  (±{estatisticas['desvio'] * 1000:.2f}, "
+                  f"{estatisticas['rodadas']} rodadas)")
+    return {
+        "commit": _commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "maquina": {"python": platform.python_version(), "sistema": platform.platform(), "cpus": os.cpu_count()},
+        "benchmarks": resultados,
+    }
+
+def comparar(atual, anterior, tolerancia=TOLERANCIA_PADRAO):
+    """Imprime a variação das medianas. Retorna os nomes que ficaram mais lentos que a tolerância."""
+    regressoes = []
+    print(f"\n{'benchmark':<40}{'antes (ms)':>12}{'agora (ms)':>12}{'variação':>10}")
+    for nome, estatisticas in atual["benchmarks"].items():
+        antes = anterior["benchmarks"].get(nome)
+        if antes is None:
+            print(f"{nome:<40}{'-':>12}{estatisticas['mediana'] * 1000:>12.2f}{'novo':>10}")
+            continue
+        variacao = (estatisticas["mediana"] / antes["mediana"] - 1) * 100
+        marca = "  REGRESSÃO" if variacao > tolerancia else ""
+        if marca:
+            regressoes.append(nome)
+        print(f"{nome:<40}{antes['mediana'] * 1000:>12.2f}{estatisticas['mediana'] * 1000:>12.2f}"
+              f"{variacao:>+9.1f}%{marca}")
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks offline do Price Watcher.")
+    parser.add_argument("--rodadas", type=int, default=20)
+    parser.add_argument("--linhas", type=int, default=200_000, help="linhas do benchmark de preços")
+    parser.add_argument("--grupos", type=int, default=5_000, help="nomes do benchmark de agrupamento")
+    parser.add_argument("--paginas", default="2", help="páginas por loja na busca completa")
+    parser.add_argument("--latencia", type=float, default=0.2, help="segundos por página no driver/servidor falsos")
+    parser.add_argument("--filtro", default=None)
+    parser.add_argument("--saida", default=None, help="arquivo JSON (padrão: benchmarks/resultados/<commit>.json)")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO, help="%% de piora aceita na mediana")
+    args = parser.parse_args()
+
+    resultado = executar(args)
+
+    saida = args.saida
+    if saida is None:
+        os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+        saida = os.path.join(PASTA_RESULTADOS, f"{resultado['commit'] or datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+        if comparar(resultado, anterior, args.tolerancia):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# scrapers/cache.py
+
+import os
+import time
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from utils.metricas import contar
+from utils.produto import Produto
+
+# Permite desligar o cache (ex.: PRICEWATCHER_CACHE=0)
+CACHE_ATIVO = os.environ.get("PRICEWATCHER_CACHE", "1") != "0"
+
+PASTA_CACHE = os.path.join("data", ".cache", "buscas")
+MAX_ITENS_MEMORIA = 256
+MAX_BYTES_DISCO = 200 * 1024 * 1024
+
+
+class CacheResultados:
+    """
+    Cache de duas camadas: LRU em memória na frente de arquivos pickle em
+    disco. O disco é limitado por tamanho total; os arquivos mais antigos
+    saem primeiro.
+    """
+
+    def __init__(self, pasta=PASTA_CACHE, max_itens_memoria=MAX_ITENS_MEMORIA, max_bytes_disco=MAX_BYTES_DISCO):
+        self.pasta = pasta
+        self.max_itens_memoria = max_itens_memoria
+        self.max_bytes_disco = max_bytes_disco
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _arquivo(self, chave):
+        nome = hashlib.sha1(repr(chave).encode("utf-8")).hexdigest()
+        return os.path.join(self.pasta, f"{nome}.pkl")
+
+    def obter(self, chave):
+        """Retorna (valor, salvo_em) ou None."""
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                return self._memoria[chave]
+
+        try:
+            with open(self._arquivo(chave), "rb") as f:
+                entrada = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+        self._guardar_memoria(chave, entrada)
+        return entrada
+
+    def salvar(self, chave, valor):
+        entrada = (valor, time.time())
+        self._guardar_memoria(chave, entrada)
+        try:
+            os.makedirs(self.pasta, exist_ok=True)
+            caminho = self._arquivo(chave)
+            temporario = f"{caminho}.{threading.get_ident()}.tmp"
+            with open(temporario, "wb") as f:
+                pickle.dump(entrada, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporario, caminho)
+            self._limitar_disco()
+        except OSError as e:
+            print(f"Aviso: não foi possível salvar o cache em disco: {e}")
+
+    def _guardar_memoria(self, chave, entrada):
+        with self._lock:
+            self._memoria[chave] = entrada
+            self._memoria.move_to_end(chave)
+            while len(self._memoria) > self.max_itens_memoria:
+                self._memoria.popitem(last=False)
+
+    def _limitar_disco(self):
+        arquivos = []
+        with os.scandir(self.pasta) as entradas:
+            for entrada in entradas:
+                if entrada.name.endswith(".pkl"):
+                    info = entrada.stat()
+                    arquivos.append((info.st_mtime, info.st_size, entrada.path))
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= self.max_bytes_disco:
+                break
+            try:
+                os.remove(caminho)
+                total -= tamanho
+            except OSError:
+                pass
+
+
+_cache = CacheResultados()
+_atualizando = set()
+_atualizando_lock = threading.Lock()
+
+def _normalizar_termo(produto):
+    return " ".join(str(produto).lower().split())
+
+def _copiar(resultados):
+    # Quem chama pode alterar os registros; o cache guarda os seus próprios.
+    # Entradas antigas em disco ainda são dicts: viram Produto aqui
+    return [item.copy() if type(item) is Produto else Produto.de_dict(item) for item in resultados]
+
+def com_cache(ttl, stale=None):
+    """
+    Decorador para as funções das lojas: (produto, página, time_str, ...).
+    Até 'ttl' segundos devolve o resultado guardado; entre 'ttl' e
+    'ttl + stale' devolve o guardado e atualiza em segundo plano; depois
+    disso busca de novo. Resultados vazios não são guardados (normalmente
+    são erro ou bloqueio da loja).
+    """
+    stale = ttl if stale is None else stale
+
+    def decorador(funcao):
+        def _buscar_e_guardar(chave, produto, pagina, time_str, args, kwargs):
+            resultados = funcao(produto, pagina, time_str, *args, **kwargs)
+            if resultados:
+                _cache.salvar(chave, _copiar(resultados))
+            return resultados
+
+        def _atualizar_em_segundo_plano(chave, produto, pagina, args, kwargs):
+            try:
+                time_str = datetime.now().strftime("%H:%M:%S")
+                _buscar_e_guardar(chave, produto, pagina, time_str, args, kwargs)
+            except Exception as e:
+                print(f"Aviso: falha ao atualizar o cache de {funcao.__name__}: {e}")
+            finally:
+                with _atualizando_lock:
+                    _atualizando.discard(chave)
+
+        def _chave(produto, pagina, args, kwargs):
+            return (funcao.__name__, _normalizar_termo(produto), str(pagina), args, tuple(sorted(kwargs.items())))
+
+        @wraps(funcao)
+        def wrapper(produto, pagina, time_str, *args, **kwargs):
+            if not CACHE_ATIVO:
+                return funcao(produto, pagina, time_str, *args, **kwargs)
+
+            chave = _chave(produto, pagina, args, kwargs)
+            entrada = _cache.obter(chave)
+            if entrada is not None:
+                resultados, salvo_em = entrada
+                idade = time.time() - salvo_em
+                if idade <= ttl:
+                    contar("cache", loja=funcao.__name__, resultado="acerto")
+                    return _copiar(resultados)
+                if idade <= ttl + stale:
+                    contar("cache", loja=funcao.__name__, resultado="antigo")
+                    with _atualizando_lock:
+                        ja_atualizando = chave in _atualizando
+                        _atualizando.add(chave)
+                    if not ja_atualizando:
+                        threading.Thread(
+                            target=_atualizar_em_segundo_plano,
+                            args=(chave, produto, pagina, args, kwargs),
+                            daemon=True,
+                        ).start()
+                    return _copiar(resultados)
+
+            contar("cache", loja=funcao.__name__, resultado="falta")
+            return _buscar_e_guardar(chave, produto, pagina, time_str, args, kwargs)
+
+        def consultar(produto, pagina, *args, **kwargs):
+            """Resultado guardado ainda dentro do ttl, sem buscar nada; None se não houver."""
+            if not CACHE_ATIVO:
+                return None
+            entrada = _cache.obter(_chave(produto, pagina, args, kwargs))
+            if entrada is None or time.time() - entrada[1] > ttl:
+                contar("cache", loja=funcao.__name__, resultado="falta")
+                return None
+            contar("cache", loja=funcao.__name__, resultado="acerto")
+            return _copiar(entrada[0])
+
+        def guardar(produto, pagina, resultados, *args, **kwargs):
+            """Guarda resultados obtidos por fora da função (ex.: pelo pipeline)."""
+            if CACHE_ATIVO and resultados:
+                _cache.salvar(_chave(produto, pagina, args, kwargs), _copiar(resultados))
+
+        # Acesso direto à função original, para quem precisa de dados frescos
+        wrapper.sem_cache = funcao
+        wrapper.consultar = consultar
+        wrapper.guardar = guardar
+        return wrapper
+
+    return decorador
@@ -0,0 +1,142 @@
+# scrapers/crawler.py
+
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from scrapers.kabum import kabum
+from scrapers.mercadolivre import mercadolivre
+from scrapers.terabyteshop import terabyte
+from utils.metricas import span, contar
+
+# Mercado Livre pagina por deslocamento: _Desde_1, _Desde_49, _Desde_97...
+ITENS_POR_PAGINA_ML = 48
+
+# A Kabum mostra 20 itens por página no site, mas a busca aceita páginas maiores
+ITENS_POR_PAGINA_KABUM = 20
+PAGE_SIZE_MAXIMO_KABUM = 100
+
+MAX_PAGINAS_SIMULTANEAS = 4
+
+def interpretar_paginas(texto):
+    """
+    Converte o campo 'paginas' numa lista de páginas:
+    "" -> [1], "3" -> [1, 2, 3] (primeiras 3), "2-5" -> [2, 3, 4, 5], "1,4" -> [1, 4]
+    """
+    texto = str(texto or "").strip()
+    if not texto:
+        return [1]
+
+    paginas = set()
+    for parte in texto.split(","):
+        parte = parte.strip()
+        intervalo = re.fullmatch(r"(\d+)\s*-\s*(\d+)", parte)
+        if intervalo:
+            inicio, fim = sorted((int(intervalo.group(1)), int(intervalo.group(2))))
+            paginas.update(range(max(inicio, 1), fim + 1))
+        elif parte.isdigit():
+            if "," in texto:
+                paginas.add(max(int(parte), 1))
+            else:
+                paginas.update(range(1, max(int(parte), 1) + 1))
+        elif parte:
+            raise ValueError(f"Valor de páginas inválido: '{parte}'")
+    return sorted(paginas)
+
+def _plano_kabum(paginas):
+    # Faixas contínuas de páginas de 20 itens viram poucas páginas de 100 itens.
+    # Retorna (argumentos da chamada, fatia a manter do resultado concatenado)
+    if paginas != list(range(paginas[0], paginas[-1] + 1)):
+        return [((pagina,), {}) for pagina in paginas], None
+
+    primeiro_item = (paginas[0] - 1) * ITENS_POR_PAGINA_KABUM
+    ultimo_item = paginas[-1] * ITENS_POR_PAGINA_KABUM
+    primeira = primeiro_item // PAGE_SIZE_MAXIMO_KABUM + 1
+    ultima = math.ceil(ultimo_item / PAGE_SIZE_MAXIMO_KABUM)
+    deslocamento = (primeira - 1) * PAGE_SIZE_MAXIMO_KABUM
+    chamadas = [((pagina,), {"page_size": PAGE_SIZE_MAXIMO_KABUM}) for pagina in range(primeira, ultima + 1)]
+    return chamadas, slice(primeiro_item - deslocamento, ultimo_item - deslocamento)
+
+def fatia_da_chamada(indice, fatia, kwargs):
+    """
+    A parte da fatia do plano que cai na chamada 'indice' (páginas de 100
+    itens da Kabum), em posições da própria chamada. Assim cada resultado é
+    cortado sozinho: uma página que falhou ou veio incompleta não desloca
+    os itens das outras.
+    """
+    if fatia is None:
+        return None
+    inicio = indice * kwargs.get("page_size", PAGE_SIZE_MAXIMO_KABUM)
+    return slice(max(fatia.start - inicio, 0), max(fatia.stop - inicio, 0))
+
+def _mesma_loja(funcao, loja):
+    # Compara também a versão sem cache (funcao.sem_cache) da loja
+    return getattr(funcao, "sem_cache", funcao) is getattr(loja, "sem_cache", loja)
+
+def planejar(funcao, paginas):
+    if _mesma_loja(funcao, mercadolivre):
+        return [(((pagina - 1) * ITENS_POR_PAGINA_ML + 1,), {}) for pagina in paginas], None
+    if _mesma_loja(funcao, kabum):
+        return _plano_kabum(paginas)
+    if _mesma_loja(funcao, terabyte):
+        # A busca da Terabyte não é paginada: tudo vem na primeira página
+        return [((1,), {})], None
+    return [((pagina,), {}) for pagina in paginas], None
+
+def chave_produto(item):
+    link = item.get("Link do Produto")
+    if link and link != "N/A":
+        return link
+    return (item.get("Site"), item.get("Nome do Produto"), item.get("Preço Bruto"))
+
+def deduplicar(itens):
+    vistos = set()
+    unicos = []
+    for item in itens:
+        chave = chave_produto(item)
+        if chave in vistos:
+            continue
+        vistos.add(chave)
+        unicos.append(item)
+    return unicos
+
+def rastrear(funcao, produto, paginas, time_str, semaforo=None):
+    """
+    Busca várias páginas de uma loja ao mesmo tempo (cada página usa um
+    navegador do pool) e junta os resultados sem produtos repetidos.
+    """
+    if not isinstance(paginas, list):
+        paginas = interpretar_paginas(paginas)
+    chamadas, fatia = planejar(funcao, paginas)
+
+    loja = funcao.__name__
+
+    def _buscar(chamada):
+        args, kwargs = chamada
+        contar("paginas", loja=loja)
+        with span("pagina", loja=loja):
+            if semaforo is None:
+                return funcao(produto, *args, time_str, **kwargs)
+            with semaforo:
+                return funcao(produto, *args, time_str, **kwargs)
+
+    def _buscar_sem_falhar(chamada):
+        try:
+            return _buscar(chamada)
+        except Exception as e:
+            print(f"Erro em {loja} (página {chamada[0][0]}): {e}")
+            return []
+
+    with span("busca", loja=loja):
+        if len(chamadas) == 1:
+            resultados_por_pagina = [_buscar(chamadas[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(chamadas), MAX_PAGINAS_SIMULTANEAS)) as executor:
+                # map mantém a ordem das páginas: cada resultado fica com a sua chamada
+                resultados_por_pagina = list(executor.map(_buscar_sem_falhar, chamadas))
+
+    itens = []
+    for indice, (chamada, resultado) in enumerate(zip(chamadas, resultados_por_pagina)):
+        fatia_chamada = fatia_da_chamada(indice, fatia, chamada[1])
+        itens.extend(resultado if fatia_chamada is None else resultado[fatia_chamada])
+    return deduplicar(itens)
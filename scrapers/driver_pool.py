@@ -0,0 +1,191 @@
+# scrapers/driver_pool.py
+
+import os
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.firefox.service import Service as FirefoxService
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from scrapers.perfis import configurar_driver
+from scrapers.provisionamento import caminho_driver, invalidar
+from utils.metricas import span, contar
+
+# Quantidade máxima de navegadores vivos por tipo (pode ser alterada por variável de ambiente)
+TAMANHO_POOL = {
+    "chrome": int(os.environ.get("PRICEWATCHER_POOL_CHROME", 4)),
+    "firefox": int(os.environ.get("PRICEWATCHER_POOL_FIREFOX", 2)),
+}
+
+# Depois de quantas páginas um navegador é reciclado (fechado e recriado)
+MAX_PAGINAS_POR_DRIVER = int(os.environ.get("PRICEWATCHER_POOL_MAX_PAGINAS", 25))
+
+def _criar(navegador, classe, servico, options):
+    try:
+        return classe(service=servico(executable_path=caminho_driver(navegador)), options=options)
+    except WebDriverException:
+        # O driver em cache pode não servir mais (navegador atualizado): resolve de novo e tenta uma vez
+        invalidar(navegador)
+        return classe(service=servico(executable_path=caminho_driver(navegador)), options=options)
+
+def criar_chrome(options):
+    return _criar("chrome", webdriver.Chrome, ChromeService, options)
+
+def criar_firefox(options):
+    return _criar("firefox", webdriver.Firefox, FirefoxService, options)
+
+FABRICAS = {
+    "chrome": criar_chrome,
+    "firefox": criar_firefox,
+}
+
+
+class _DriverEmUso:
+    def __init__(self, driver, chave):
+        self.driver = driver
+        self.chave = chave
+        self.paginas = 0
+        self.criado_em = time.monotonic()
+
+
+class DriverPool:
+    """
+    Mantém navegadores "quentes" de um mesmo tipo (chrome ou firefox) para
+    serem reaproveitados entre as buscas, em vez de abrir um navegador novo
+    a cada página.
+
+    Cada driver é criado para uma 'chave' (normalmente o nome da loja), porque
+    as lojas usam opções diferentes (headless, perfil do Firefox, user-agent...).
+    """
+
+    def __init__(self, navegador, tamanho, max_paginas=MAX_PAGINAS_POR_DRIVER):
+        self.navegador = navegador
+        self.tamanho = tamanho
+        self.max_paginas = max_paginas
+        self._livres = []
+        self._total = 0
+        self._condicao = threading.Condition()
+
+    def checkout(self, chave, criar_opcoes, timeout=None):
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._condicao:
+            while True:
+                entrada = self._pegar_livre(chave)
+                if entrada is not None:
+                    break
+
+                if self._total >= self.tamanho and self._livres:
+                    # Pool cheio, mas há navegador parado de outra loja: recicla ele
+                    self._fechar(self._livres.pop(0))
+
+                if self._total < self.tamanho:
+                    self._total += 1
+                    entrada = None
+                    break
+
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    raise TimeoutError(f"Nenhum navegador {self.navegador} livre no pool.")
+                self._condicao.wait(restante)
+
+        if entrada is not None:
+            return entrada
+
+        # Criação fora do lock: abrir um navegador leva alguns segundos
+        try:
+            with span("driver_inicio", navegador=self.navegador, loja=chave):
+                driver = FABRICAS[self.navegador](criar_opcoes())
+                configurar_driver(driver, self.navegador, chave)
+        except Exception:
+            with self._condicao:
+                self._total -= 1
+                self._condicao.notify()
+            raise
+        return _DriverEmUso(driver, chave)
+
+    def devolver(self, entrada, descartar=False):
+        entrada.paginas += 1
+        if descartar or entrada.paginas >= self.max_paginas:
+            if descartar:
+                contar("drivers_descartados", navegador=self.navegador, loja=entrada.chave)
+            self._fechar(entrada)
+            with self._condicao:
+                self._condicao.notify()
+            return
+        with self._condicao:
+            self._livres.append(entrada)
+            self._condicao.notify()
+
+    def encerrar(self):
+        with self._condicao:
+            livres, self._livres = self._livres, []
+        for entrada in livres:
+            self._fechar(entrada)
+
+    def _pegar_livre(self, chave):
+        # Chamado com o lock adquirido
+        for i, entrada in enumerate(self._livres):
+            if entrada.chave != chave:
+                continue
+            del self._livres[i]
+            if self._saudavel(entrada.driver):
+                return entrada
+            self._fechar(entrada)
+            return None
+        return None
+
+    def _saudavel(self, driver):
+        try:
+            driver.current_url
+            return len(driver.window_handles) > 0
+        except Exception:
+            return False
+
+    def _fechar(self, entrada):
+        try:
+            entrada.driver.quit()
+        except Exception as e:
+            print(f"Aviso: erro ao fechar navegador {self.navegador}: {e}")
+        with self._condicao:
+            self._total -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def obter_pool(navegador):
+    with _pools_lock:
+        if navegador not in _pools:
+            _pools[navegador] = DriverPool(navegador, TAMANHO_POOL[navegador])
+        return _pools[navegador]
+
+@contextmanager
+def usar_driver(navegador, chave, criar_opcoes, timeout=None):
+    """
+    Empresta um driver do pool e devolve ao final do bloco 'with'.
+    Se o navegador travar/cair durante o uso ele é descartado em vez de voltar ao pool.
+    """
+    pool = obter_pool(navegador)
+    entrada = pool.checkout(chave, criar_opcoes, timeout=timeout)
+    descartar = False
+    try:
+        yield entrada.driver
+    except TimeoutException:
+        # Timeout de espera não significa navegador quebrado
+        raise
+    except WebDriverException:
+        descartar = True
+        raise
+    finally:
+        pool.devolver(entrada, descartar=descartar)
+
+def encerrar_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.encerrar()
+
+atexit.register(encerrar_pools)
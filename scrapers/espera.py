@@ -0,0 +1,96 @@
+# scrapers/espera.py
+
+import time
+import threading
+from collections import deque
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+from scrapers.perfis import medir_pagina
+from utils.metricas import span, contar
+
+# Timeout usado enquanto ainda não há histórico suficiente da loja (segundos)
+TIMEOUT_INICIAL = {
+    "aliexpress": 15,
+    "amazon": 10,
+    "kabum": 10,
+    "mercadolivre": 20,
+    "pichau": 10,
+    "terabyte": 30,
+}
+TIMEOUT_MINIMO = 3
+TIMEOUT_MAXIMO = 45
+AMOSTRAS_HISTORICO = 20
+INTERVALO_VERIFICACAO = 0.25
+
+_historico = {}
+_historico_lock = threading.Lock()
+
+# Conta os cards de produto, os recursos de rede já carregados e o estado do documento
+_SCRIPT_ESTADO = """
+return [
+    document.querySelectorAll(arguments[0]).length,
+    performance.getEntriesByType('resource').length,
+    document.readyState
+];
+"""
+
+class _ResultadosProntos:
+    """
+    Condição para o WebDriverWait: fica verdadeira quando a quantidade de
+    produtos na página e a quantidade de requisições de rede param de mudar
+    entre duas verificações seguidas (listagem renderizada e rede ociosa).
+    """
+
+    def __init__(self, seletor, minimo_itens=1, leituras_estaveis=2):
+        self.seletor = seletor
+        self.minimo_itens = minimo_itens
+        self.leituras_estaveis = leituras_estaveis
+        self._ultimo = None
+        self._iguais = 0
+
+    def __call__(self, driver):
+        itens, recursos, estado = driver.execute_script(_SCRIPT_ESTADO, self.seletor)
+        atual = (itens, recursos)
+        if itens >= self.minimo_itens and estado != "loading" and atual == self._ultimo:
+            self._iguais += 1
+        else:
+            self._iguais = 0
+        self._ultimo = atual
+        return self._iguais + 1 >= self.leituras_estaveis
+
+def timeout_adaptativo(loja):
+    """Timeout calculado a partir das últimas latências da loja (p90 com folga)."""
+    with _historico_lock:
+        amostras = sorted(_historico.get(loja, ()))
+    if len(amostras) < 3:
+        return TIMEOUT_INICIAL.get(loja, 10)
+    p90 = amostras[int(0.9 * (len(amostras) - 1))]
+    return min(max(p90 * 2 + 1, TIMEOUT_MINIMO), TIMEOUT_MAXIMO)
+
+def registrar_latencia(loja, segundos):
+    with _historico_lock:
+        _historico.setdefault(loja, deque(maxlen=AMOSTRAS_HISTORICO)).append(segundos)
+
+def aguardar_resultados(driver, loja, seletor, minimo_itens=1):
+    """
+    Espera até os resultados da busca estarem prontos, em vez de um sleep fixo.
+    Retorna False se estourar o timeout (a página é lida assim mesmo).
+    """
+    timeout = timeout_adaptativo(loja)
+    inicio = time.monotonic()
+    try:
+        with span("espera", loja=loja):
+            WebDriverWait(driver, timeout, poll_frequency=INTERVALO_VERIFICACAO).until(
+                _ResultadosProntos(seletor, minimo_itens=minimo_itens)
+            )
+    except TimeoutException:
+        # Registra o próprio timeout para que a próxima espera seja mais longa
+        registrar_latencia(loja, timeout)
+        contar("timeouts_espera", loja=loja)
+        print(f"Aviso: resultados de '{loja}' não ficaram prontos em {timeout:.1f}s.")
+        medir_pagina(driver, loja)
+        return False
+    registrar_latencia(loja, time.monotonic() - inicio)
+    medir_pagina(driver, loja)
+    return True
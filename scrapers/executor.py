@@ -0,0 +1,59 @@
+# scrapers/executor.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from scrapers.aliexpress import aliexpress
+from scrapers.amazon import amazon
+from scrapers.kabum import kabum
+from scrapers.mercadolivre import mercadolivre
+from scrapers.pichau import pichau
+from scrapers.terabyteshop import terabyte
+from scrapers.crawler import rastrear
+
+LOJAS = {
+    "AliExpress": aliexpress,
+    "Amazon": amazon,
+    "Kabum": kabum,
+    "Mercado Livre": mercadolivre,
+    "Pichau": pichau,
+    "Terabyte Shop": terabyte,
+}
+
+# Quantas buscas simultâneas cada loja aceita (somando todas as buscas em andamento)
+LIMITE_POR_LOJA = {
+    "AliExpress": 2,
+    "Amazon": 2,
+    "Kabum": 2,
+    "Mercado Livre": 2,
+    "Pichau": 2,
+    "Terabyte Shop": 1,
+}
+
+_semaforos = {loja: threading.BoundedSemaphore(limite) for loja, limite in LIMITE_POR_LOJA.items()}
+
+def semaforo_da_loja(loja):
+    """Semáforo com o limite de buscas simultâneas da loja (None se ela não tiver limite)."""
+    return _semaforos.get(loja)
+
+def _executar_loja(loja, funcao, termo, paginas, tempo):
+    # O limite da loja vale para cada página buscada, não para a loja inteira
+    return rastrear(funcao, termo, paginas, tempo, semaforo=_semaforos.get(loja))
+
+def executar_lojas(termo, paginas, tempo, lojas=None):
+    """
+    Roda as lojas ao mesmo tempo e entrega (loja, resultados, erro) conforme
+    cada uma termina, sem esperar pelas outras.
+    """
+    lojas = lojas or LOJAS
+    with ThreadPoolExecutor(max_workers=len(lojas)) as executor:
+        futuros = {
+            executor.submit(_executar_loja, loja, funcao, termo, paginas, tempo): loja
+            for loja, funcao in lojas.items()
+        }
+        for futuro in as_completed(futuros):
+            loja = futuros[futuro]
+            try:
+                yield loja, futuro.result(), None
+            except Exception as e:
+                yield loja, [], e
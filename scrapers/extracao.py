@@ -0,0 +1,149 @@
+# scrapers/extracao.py
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from utils.metricas import span, observar
+from utils.produto import Produto
+
+def _classe(nome):
+    # Equivalente XPath do seletor CSS ".nome" (classe exata, não substring)
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {nome} ')"
+
+def _texto(elem):
+    # Mesmo resultado do get_text(strip=True) do BeautifulSoup
+    if elem is None:
+        return ""
+    return "".join(parte.strip() for parte in elem.itertext())
+
+def _compilar(expressao):
+    # smart_strings=False: textos/atributos (ex.: @href) saem como str comum. Os
+    # "smart strings" do lxml guardam referência ao elemento e, com ele, à página
+    # inteira, que ficaria viva no cache, na tabela do app e nos resultados da fila
+    return etree.XPath(expressao, smart_strings=False)
+
+def _primeiro(xpath, raiz):
+    achados = xpath(raiz)
+    return achados[0] if achados else None
+
+
+class RegraLoja:
+    """
+    Seletores XPath pré-compilados de uma loja. Quando 'cartao' encontra os
+    cards de produto, nome/preço/link são lidos dentro de cada card; se não
+    encontrar nenhum (layout mudou), cai no modo antigo de juntar a lista de
+    nomes com a lista de preços da página inteira. 'identificador', lido no
+    card, é um id estável do anúncio (ASIN, href do card) para as lojas sem
+    link: é a chave do anúncio no detector de mudanças.
+    """
+
+    def __init__(self, site, nome, preco, cartao=None, link=None, preco_partes=None, com_link=False,
+                 identificador=None):
+        self.site = site
+        self.cartao = _compilar(cartao) if cartao else None
+        self.nome = _compilar(nome)
+        self.preco = _compilar(preco)
+        self.link = _compilar(link) if link else None
+        # Quando o preço é montado juntando vários pedaços (símbolo + valor, spans...)
+        self.preco_partes = _compilar(preco_partes) if preco_partes else None
+        self.com_link = com_link
+        self.identificador = _compilar(identificador) if identificador else None
+
+    def _preco_texto(self, preco_elem):
+        if preco_elem is None:
+            return "N/A"
+        if self.preco_partes is None:
+            return _texto(preco_elem)
+        return "".join("".join(parte.itertext()) for parte in self.preco_partes(preco_elem)).strip()
+
+    def _link_texto(self, raiz, nome_elem):
+        if self.link is None:
+            return nome_elem.get("href") if nome_elem is not None and nome_elem.get("href") else "N/A"
+        link = _primeiro(self.link, raiz)
+        return link if link else "N/A"
+
+    def linhas(self, doc):
+        cartoes = self.cartao(doc) if self.cartao is not None else []
+        if cartoes:
+            for cartao in cartoes:
+                nome_elem = _primeiro(self.nome, cartao)
+                preco_elem = _primeiro(self.preco, cartao)
+                if nome_elem is None and preco_elem is None:
+                    continue
+                link = self._link_texto(cartao, nome_elem) if self.com_link else None
+                identificador = _primeiro(self.identificador, cartao) if self.identificador is not None else None
+                yield _texto(nome_elem) or "N/A", self._preco_texto(preco_elem), link, identificador or None
+            return
+
+        for nome_elem, preco_elem in zip(self.nome(doc), self.preco(doc)):
+            link = self._link_texto(nome_elem, nome_elem) if self.com_link else None
+            yield _texto(nome_elem), self._preco_texto(preco_elem), link, None
+
+
+REGRAS = {
+    "aliexpress": RegraLoja(
+        "AliExpress",
+        nome=f"//*[{_classe('kr_j0')}]",
+        preco=f"//*[{_classe('kr_kj')}]",
+        preco_partes=".//span",
+    ),
+    "amazon": RegraLoja(
+        "Amazon",
+        cartao="//div[@data-component-type='s-search-result']",
+        nome=".//h2//span",
+        preco=f".//span[{_classe('a-price')}]/span[{_classe('a-offscreen')}]",
+        identificador="@data-asin",
+    ),
+    "kabum": RegraLoja(
+        "Kabum",
+        cartao=f"//article[{_classe('productCard')}]",
+        nome=f".//*[{_classe('nameCard')}]",
+        preco=f".//*[{_classe('priceCard')}]",
+        identificador=".//a/@href",
+    ),
+    "mercadolivre": RegraLoja(
+        "Mercado Livre",
+        cartao=f"//li[{_classe('ui-search-layout__item')}]",
+        nome=f".//h3[{_classe('poly-component__title-wrapper')}]",
+        preco=f".//div[{_classe('poly-price__current')}]",
+        preco_partes=(
+            f".//span[{_classe('andes-money-amount__currency-symbol')}][1]"
+            f" | .//span[{_classe('andes-money-amount__fraction')}][1]"
+        ),
+        link=f".//h3[{_classe('poly-component__title-wrapper')}]//a/@href",
+        com_link=True,
+    ),
+    "pichau": RegraLoja(
+        "Pichau",
+        cartao="//a[@data-cy='list-product']",
+        nome=".//h2",
+        preco=f".//*[{_classe('mui-1q2ojdg-price_vista')}]",
+        identificador="@href",
+    ),
+    "terabyte": RegraLoja(
+        "TerabyteShop",
+        cartao=f"//div[{_classe('product-item')}]",
+        nome=f".//a[{_classe('product-item__name')}]",
+        preco=f".//*[{_classe('product-item__new-price')}]",
+        com_link=True,
+    ),
+}
+
+def extrair_produtos(loja, html, time_str):
+    regra = REGRAS[loja]
+    if not html or not html.strip():
+        observar("itens_por_pagina", 0, loja=loja)
+        return []
+
+    produtos_raspados = []
+    with span("extracao", loja=loja):
+        doc = lxml_html.document_fromstring(html)
+        for nome_text, preco_text_bruto, link_produto, identificador in regra.linhas(doc):
+            produto = Produto(regra.site, nome_text, preco_text_bruto, time_str)
+            if regra.com_link:
+                produto.link = link_produto
+            if identificador is not None:
+                produto.identificador = identificador
+            produtos_raspados.append(produto)
+    observar("itens_por_pagina", len(produtos_raspados), loja=loja)
+    return produtos_raspados
@@ -0,0 +1,103 @@
+# scrapers/http_fetch.py
+
+import os
+import asyncio
+import threading
+from urllib.parse import urlsplit
+import httpx
+
+from utils.metricas import span, contar
+
+try:
+    import h2  # noqa: F401  (necessário para o httpx falar HTTP/2)
+    HTTP2_DISPONIVEL = True
+except ImportError:
+    HTTP2_DISPONIVEL = False
+
+# Permite desligar o caminho sem navegador (ex.: PRICEWATCHER_HTTP=0)
+HTTP_ATIVO = os.environ.get("PRICEWATCHER_HTTP", "1") != "0"
+
+LIMITE_PADRAO_POR_DOMINIO = 4
+LIMITE_POR_DOMINIO = {
+    "www.kabum.com.br": 4,
+    "lista.mercadolivre.com.br": 3,
+}
+TIMEOUT_HTTP = 15
+
+CABECALHOS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
+}
+
+
+class ClienteHTTP:
+    """
+    Cliente HTTP assíncrono compartilhado pelos scrapers. Roda num event loop
+    próprio (thread de fundo), assim as threads dos scrapers reaproveitam as
+    mesmas conexões keep-alive.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name="cliente-http")
+        self._thread.start()
+        self._cliente = None
+        self._semaforos = {}
+
+    def _semaforo(self, dominio):
+        # Só é chamado dentro do event loop, não precisa de lock
+        if dominio not in self._semaforos:
+            limite = LIMITE_POR_DOMINIO.get(dominio, LIMITE_PADRAO_POR_DOMINIO)
+            self._semaforos[dominio] = asyncio.Semaphore(limite)
+        return self._semaforos[dominio]
+
+    async def buscar_async(self, url):
+        if self._cliente is None:
+            self._cliente = httpx.AsyncClient(
+                http2=HTTP2_DISPONIVEL,
+                headers=CABECALHOS,
+                follow_redirects=True,
+                timeout=TIMEOUT_HTTP,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            )
+        async with self._semaforo(urlsplit(url).hostname):
+            resposta = await self._cliente.get(url)
+        resposta.raise_for_status()
+        return resposta.text
+
+    def buscar(self, url):
+        return asyncio.run_coroutine_threadsafe(self.buscar_async(url), self._loop).result()
+
+
+_cliente = None
+_cliente_lock = threading.Lock()
+
+def obter_cliente():
+    global _cliente
+    with _cliente_lock:
+        if _cliente is None:
+            _cliente = ClienteHTTP()
+        return _cliente
+
+def buscar_sem_navegador(url, marcador):
+    """
+    Tenta baixar a página de busca direto por HTTP. Retorna None (para o
+    scraper cair no Selenium) se der erro ou se o HTML não tiver o marcador
+    esperado dos resultados.
+    """
+    if not HTTP_ATIVO:
+        return None
+    dominio = urlsplit(url).hostname
+    try:
+        with span("http", dominio=dominio):
+            html = obter_cliente().buscar(url)
+    except Exception as e:
+        print(f"Aviso: busca HTTP falhou para {url}: {e}")
+        contar("retentativas", dominio=dominio, motivo="erro_http")
+        return None
+    if marcador not in html:
+        # O scraper tenta de novo pelo navegador
+        contar("retentativas", dominio=dominio, motivo="sem_resultados")
+        return None
+    return html
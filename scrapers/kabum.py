@@ -1,53 +1,41 @@
 # scrapers/kabum.py
 
-import sys
 import os
-from bs4 import BeautifulSoup
-from time import sleep
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
-import re
-
-def get_driver_path(driver_name):
-    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
-        bundle_dir = sys._MEIPASS
-    else:
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        bundle_dir = project_root
-    return os.path.join(bundle_dir, 'drivers', driver_name)
-
-def kabum(produto, page_number, time_str):
+
+from scrapers.cache import com_cache
+from scrapers.driver_pool import usar_driver
+from scrapers.espera import aguardar_resultados
+from scrapers.extracao import extrair_produtos
+from scrapers.http_fetch import buscar_sem_navegador
+from scrapers.perfis import aplicar_chrome
+from utils.metricas import span
+
+# A busca da Kabum vem renderizada no servidor: dá para ler sem abrir o navegador
+SUPORTA_HTTP = True
+MARCADOR_RESULTADOS = "nameCard"
+URL_BASE = os.environ.get("PRICEWATCHER_URL_KABUM", "https://www.kabum.com.br")
+
+def _opcoes_chrome():
     options = webdriver.ChromeOptions()
     options.add_argument("--headless=new")
+    return aplicar_chrome(options, "kabum")
+
+def baixar_kabum(produto, page_number, page_size=20):
+    """HTML da página de busca, por HTTP quando der e pelo navegador quando não."""
+    url = f"{URL_BASE}/busca/{produto}?page_number={page_number}&page_size={page_size}&facet_filters=&sort=most_searched"
+
+    html = buscar_sem_navegador(url, MARCADOR_RESULTADOS) if SUPORTA_HTTP else None
+    if html is None:
+        with usar_driver("chrome", "kabum", _opcoes_chrome) as driver:
+            with span("navegacao", loja="kabum"):
+                driver.get(url)
+
+            aguardar_resultados(driver, "kabum", ".nameCard")
+
+            html = driver.page_source
+    return html
 
-    driver_executable_path = get_driver_path("chromedriver.exe")
-    if not os.path.exists(driver_executable_path):
-        raise FileNotFoundError(f"Erro: Driver '{driver_executable_path}' não encontrado. Baixe-o e coloque na pasta 'drivers/' do seu projeto.")
-
-    service = ChromeService(executable_path=driver_executable_path)
-    driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()))
-
-    url = f"https://www.kabum.com.br/busca/{produto}?page_number={page_number}&page_size=20&facet_filters=&sort=most_searched"
-    driver.get(url)
-
-    sleep(4)
-
-    html = driver.page_source
-    soup = BeautifulSoup(html, "html.parser")
-
-    nomes_elems = soup.find_all(class_=re.compile(r"\bnameCard\b"))
-    preco_elems = soup.find_all(class_=re.compile(r"\bpriceCard\b"))
-    
-    produtos_raspados = []
-    for nome_elem, preco_elem in zip(nomes_elems, preco_elems):
-        nome_text = nome_elem.get_text(strip=True)
-        preco_text_bruto = preco_elem.get_text(strip=True)
-        produtos_raspados.append({
-            "Site": "Kabum",
-            "Nome do Produto": nome_text,
-            "Preço Bruto": preco_text_bruto,
-            "Data do Scraping": time_str
-        })
-    driver.quit()
-    return produtos_raspados
+@com_cache(ttl=10 * 60)
+def kabum(produto, page_number, time_str, page_size=20):
+    return extrair_produtos("kabum", baixar_kabum(produto, page_number, page_size), time_str)
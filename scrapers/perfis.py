@@ -0,0 +1,121 @@
+# scrapers/perfis.py
+
+import os
+
+from utils import metricas
+
+# Liga/desliga o perfil leve (PRICEWATCHER_PERFIL_LEVE=0 carrega as páginas completas,
+# útil para comparar bytes e tempo entre os dois perfis nas métricas)
+PERFIL_LEVE_ATIVO = os.environ.get("PRICEWATCHER_PERFIL_LEVE", "1") != "0"
+
+# Analytics, anúncios e afins: nenhum deles muda a listagem de produtos
+HOSTS_TERCEIROS = [
+    "google-analytics.com", "googletagmanager.com", "googleadservices.com", "doubleclick.net",
+    "googlesyndication.com", "facebook.net", "connect.facebook.net", "hotjar.com", "criteo.com",
+    "criteo.net", "clarity.ms", "tiktok.com", "analytics.tiktok.com", "bat.bing.com", "taboola.com",
+    "outbrain.com", "scorecardresearch.com",
+]
+# Hosts extras por variável de ambiente: PRICEWATCHER_HOSTS_BLOQUEADOS="a.com,b.com"
+HOSTS_TERCEIROS += [h.strip() for h in os.environ.get("PRICEWATCHER_HOSTS_BLOQUEADOS", "").split(",") if h.strip()]
+
+# O que cada loja bloqueia. Imagens, fontes e mídia nunca entram na extração.
+PERFIS = {
+    "aliexpress": {"hosts": ["aplus.aliexpress.com", "mmstat.com", "arms-retcode.aliyuncs.com"]},
+    "amazon": {"hosts": ["amazon-adsystem.com", "fls-na.amazon.com", "unagi.amazon.com.br"]},
+    "kabum": {"hosts": ["static.hotjar.com", "cdn.dynamicyield.com"]},
+    "mercadolivre": {"hosts": ["adservice.mercadolivre.com.br", "events.mercadolibre.com"]},
+    "pichau": {"hosts": []},
+    # A Terabyte tem proteção anti-bot: só os bloqueios de conteúdo, nada de mexer nos hosts dela
+    "terabyte": {"hosts": []},
+}
+
+_EXTENSOES_BLOQUEADAS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+]
+
+def hosts_bloqueados(loja):
+    return HOSTS_TERCEIROS + PERFIS.get(loja, {}).get("hosts", [])
+
+def aplicar_chrome(options, loja):
+    """Estratégia 'eager' e sem imagens; fontes, mídia e hosts vão em configurar_driver (CDP)."""
+    if not PERFIL_LEVE_ATIVO:
+        return options
+    # 'eager' devolve o driver.get no DOMContentLoaded; quem espera os produtos é o aguardar_resultados
+    options.page_load_strategy = "eager"
+    # Junta com as prefs que a loja já tenha definido em vez de sobrescrever
+    prefs = dict(options.experimental_options.get("prefs", {}))
+    prefs.update({
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    options.add_experimental_option("prefs", prefs)
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--autoplay-policy=user-gesture-required")
+    return options
+
+def aplicar_firefox(options, loja):
+    """
+    Estratégia 'eager', sem imagens, fontes baixadas e autoplay. O Firefox não
+    aceita lista de URLs bloqueadas por preferência: os hosts de terceiros
+    são resolvidos para 127.0.0.1 (network.dns.localDomains, só nomes exatos)
+    e o resto fica com a proteção contra rastreamento dele.
+    """
+    if not PERFIL_LEVE_ATIVO:
+        return options
+    options.page_load_strategy = "eager"
+    options.set_preference("permissions.default.image", 2)
+    options.set_preference("gfx.downloadable_fonts.enabled", False)
+    options.set_preference("browser.display.use_document_fonts", 0)
+    options.set_preference("media.autoplay.default", 5)
+    options.set_preference("media.autoplay.blocking_policy", 2)
+    options.set_preference("privacy.trackingprotection.enabled", True)
+    hosts = hosts_bloqueados(loja)
+    if hosts:
+        options.set_preference("network.dns.localDomains", ",".join(hosts))
+    return options
+
+def configurar_driver(driver, navegador, loja):
+    """Chamado uma vez por driver criado. No Chrome bloqueia fontes, mídia e hosts via CDP."""
+    if not PERFIL_LEVE_ATIVO or navegador != "chrome" or not hasattr(driver, "execute_cdp_cmd"):
+        return
+    padroes = _EXTENSOES_BLOQUEADAS + [f"*://*.{host}/*" for host in hosts_bloqueados(loja)]
+    padroes += [f"*://{host}/*" for host in hosts_bloqueados(loja)]
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": padroes})
+    except Exception as e:
+        print(f"Aviso: não foi possível bloquear recursos no Chrome de {loja}: {e}")
+
+# Bytes transferidos (documento + recursos) e tempos da navegação, pela API performance do navegador
+_SCRIPT_CARGA = """
+const nav = performance.getEntriesByType('navigation')[0] || {};
+const recursos = performance.getEntriesByType('resource');
+let bytes = nav.transferSize || 0;
+for (const r of recursos) { bytes += r.transferSize || 0; }
+return [bytes, recursos.length, nav.domContentLoadedEventEnd || 0, nav.loadEventEnd || 0, performance.now()];
+"""
+
+def medir_pagina(driver, loja):
+    """
+    Registra nas métricas, com o rótulo perfil=leve/completo, os bytes e
+    recursos baixados e o tempo da navegação até a página ser lida. O tempo
+    poupado por página é a diferença entre os dois perfis (rode uma vez com
+    PRICEWATCHER_PERFIL_LEVE=0 para ter a base); as páginas lidas antes da
+    carga completa terminar são contadas à parte.
+    """
+    if not metricas.ativas():
+        return
+    try:
+        bytes_, recursos, dom_pronto, carga_completa, agora = driver.execute_script(_SCRIPT_CARGA)
+    except Exception:
+        return
+    perfil = "leve" if PERFIL_LEVE_ATIVO else "completo"
+    metricas.observar("bytes_por_pagina", bytes_, loja=loja, perfil=perfil)
+    metricas.observar("recursos_por_pagina", recursos, loja=loja, perfil=perfil)
+    metricas.observar("segundos_ate_leitura", agora / 1000, loja=loja, perfil=perfil)
+    if dom_pronto:
+        metricas.observar("segundos_ate_dom_pronto", dom_pronto / 1000, loja=loja, perfil=perfil)
+    if not carga_completa:
+        metricas.contar("paginas_lidas_antes_da_carga_completa", loja=loja, perfil=perfil)
@@ -0,0 +1,358 @@
+# scrapers/pipeline.py
+#
+# Busca em estágios, com filas limitadas entre eles:
+#
+#   threads de busca (navegador/HTTP) --fila_html--> processos de parse e
+#   normalização --fila_saida--> consumidor (grava em lotes e entrega as páginas)
+#
+# O navegador volta ao pool assim que o HTML é lido, e o parse/normalização
+# (CPU, preso ao GIL) roda em outros processos, então rede, CPU e disco se
+# sobrepõem. Se um estágio atrasa, a fila dele enche e o anterior espera:
+# a memória fica limitada ao tamanho das filas, não ao tamanho da busca.
+# Páginas ainda no cache das lojas (scrapers/cache.py) pulam a busca.
+
+import os
+import time
+import queue
+import atexit
+import threading
+import multiprocessing
+from collections import deque
+from itertools import zip_longest
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+
+from scrapers.aliexpress import baixar_aliexpress
+from scrapers.amazon import baixar_amazon
+from scrapers.kabum import baixar_kabum
+from scrapers.mercadolivre import baixar_mercadolivre
+from scrapers.pichau import baixar_pichau
+from scrapers.terabyteshop import baixar_terabyte
+from scrapers.crawler import interpretar_paginas, planejar, chave_produto, fatia_da_chamada
+from scrapers.executor import LOJAS, LIMITE_POR_LOJA, semaforo_da_loja
+from scrapers.extracao import extrair_produtos
+from utils.data_processor import limpar_e_converter_preco, limpar_nome_produto
+from utils.metricas import span, contar, observar
+
+# Nome da loja no app -> (nome usado na extração, função que baixa o HTML)
+BAIXADORES = {
+    "AliExpress": ("aliexpress", baixar_aliexpress),
+    "Amazon": ("amazon", baixar_amazon),
+    "Kabum": ("kabum", baixar_kabum),
+    "Mercado Livre": ("mercadolivre", baixar_mercadolivre),
+    "Pichau": ("pichau", baixar_pichau),
+    "Terabyte Shop": ("terabyte", baixar_terabyte),
+}
+
+# Threads de busca: o bastante para todas as lojas usarem o próprio limite ao mesmo tempo
+BUSCAS_SIMULTANEAS = sum(LIMITE_POR_LOJA.values())
+# Processos de parse; 0 faz o parse numa thread deste processo (ex.: onde não dá para abrir processos)
+PROCESSOS_PARSE = int(os.environ.get("PRICEWATCHER_PROCESSOS_PARSE", min(4, max((os.cpu_count() or 2) - 1, 1))))
+# Páginas esperando em cada fila antes de o estágio anterior parar
+TAMANHO_FILA = 8
+# Gravação em lote: a cada TAMANHO_LOTE registros ou INTERVALO_LOTE segundos
+TAMANHO_LOTE = 500
+INTERVALO_LOTE = 2.0
+# Segundos que o fim da busca espera as threads dos estágios
+ESPERA_ENCERRAR = 2.0
+
+# Colunas que o pipeline acrescenta; não vão para o cache, que guarda o mesmo que as funções das lojas
+CAMPOS_NORMALIZADOS = ("Preço Numérico", "Moeda", "Nome Normalizado")
+
+_FIM = object()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _obter_pool(processos):
+    # Um pool por processo, reaproveitado entre buscas (abrir processos custa caro).
+    # 'spawn' em todo sistema: um fork no meio das threads de busca pode copiar um
+    # lock ocupado e deixar o processo filho travado para sempre
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+def _descartar_pool(pool):
+    # Um processo do pool morreu (kill, falta de memória): o executor fica quebrado
+    # para sempre, então sai de uso e o próximo _obter_pool abre outro
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def processar_pagina(loja, html, time_str, registros=None):
+    """
+    Extrai os produtos do HTML (ou usa 'registros', vindos do cache) e já
+    normaliza: 'Preço Numérico' e 'Moeda' como em limpar_e_converter_preco e
+    'Nome Normalizado' como em limpar_nome_produto. Roda nos processos do pool.
+    """
+    if registros is None:
+        registros = extrair_produtos(loja, html, time_str)
+    if not registros:
+        return registros
+    precos = limpar_e_converter_preco(pd.DataFrame({"Preço Bruto": [r.get("Preço Bruto") for r in registros]}))
+    for registro, preco, moeda in zip(registros, precos["Preço Numérico"].tolist(), precos["Moeda"].tolist()):
+        registro["Preço Numérico"] = None if pd.isna(preco) else preco
+        registro["Moeda"] = moeda
+        registro["Nome Normalizado"] = limpar_nome_produto(registro.get("Nome do Produto"))
+    return registros
+
+def montar_tarefas(termo, paginas, lojas=None):
+    """
+    Uma tarefa por requisição, seguindo o mesmo plano do crawler para cada
+    loja, intercaladas entre as lojas: assim nenhuma thread de busca fica
+    parada no limite de uma loja enquanto as outras estão livres.
+    """
+    if not isinstance(paginas, list):
+        paginas = interpretar_paginas(paginas)
+    por_loja = []
+    for nome in lojas or BAIXADORES:
+        loja, baixar = BAIXADORES[nome]
+        chamadas, fatia = planejar(LOJAS[nome], paginas)
+        tarefas = []
+        por_loja.append(tarefas)
+        for indice, (args, kwargs) in enumerate(chamadas):
+            tarefas.append({
+                "nome": nome, "loja": loja, "funcao": LOJAS[nome], "baixar": baixar, "termo": termo,
+                "args": args, "kwargs": kwargs, "fatia": fatia_da_chamada(indice, fatia, kwargs),
+                "em_cache": False,
+            })
+    return [tarefa for rodada in zip_longest(*por_loja) for tarefa in rodada if tarefa is not None]
+
+def _colocar(fila, item, cancelar):
+    # put() bloqueante que desiste se a busca for abandonada
+    while not cancelar.is_set():
+        try:
+            fila.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class _Estagios:
+    """As threads de busca e a de despacho para o pool; o consumo fica com executar_pipeline."""
+
+    def __init__(self, tarefas, tempo, buscas_simultaneas, processos, tamanho_fila, cancelar=None):
+        self.tempo = tempo
+        self.processos = processos
+        self.tarefas = queue.Queue()
+        for tarefa in tarefas:
+            self.tarefas.put(tarefa)
+        self.fila_html = queue.Queue(maxsize=tamanho_fila)
+        self.fila_saida = queue.Queue(maxsize=tamanho_fila)
+        self.cancelar = cancelar or threading.Event()
+        self.pool = None
+        quantidade = max(1, min(buscas_simultaneas, len(tarefas)))
+        self.buscadores = [threading.Thread(target=self._buscar, daemon=True) for _ in range(quantidade)]
+        self.despachante = threading.Thread(target=self._despachar, args=(quantidade,), daemon=True)
+
+    def iniciar(self):
+        for thread in self.buscadores:
+            thread.start()
+        self.despachante.start()
+
+    def _buscar(self):
+        # O _FIM sai mesmo se a thread cair: o despachante conta um por buscador
+        try:
+            self._buscar_tarefas()
+        finally:
+            _colocar(self.fila_html, _FIM, self.cancelar)
+
+    def _buscar_tarefas(self):
+        while not self.cancelar.is_set():
+            try:
+                tarefa = self.tarefas.get_nowait()
+            except queue.Empty:
+                return
+            html, erro, registros = None, None, None
+            consultar = getattr(tarefa["funcao"], "consultar", None)
+            if consultar:
+                try:
+                    registros = consultar(tarefa["termo"], *tarefa["args"], **tarefa["kwargs"])
+                except Exception as e:
+                    # Cache ilegível conta como ausente: a página é baixada de novo
+                    print(f"Erro lendo o cache de {tarefa['nome']} (página {tarefa['args'][0]}): {e}")
+            if registros is not None:
+                tarefa["em_cache"] = True
+                if not _colocar(self.fila_html, (tarefa, None, registros, None), self.cancelar):
+                    return
+                continue
+            contar("paginas", loja=tarefa["loja"])
+            try:
+                with span("pagina", loja=tarefa["loja"]):
+                    semaforo = semaforo_da_loja(tarefa["nome"])
+                    if semaforo is None:
+                        html = tarefa["baixar"](tarefa["termo"], *tarefa["args"], **tarefa["kwargs"])
+                    else:
+                        with semaforo:
+                            html = tarefa["baixar"](tarefa["termo"], *tarefa["args"], **tarefa["kwargs"])
+            except Exception as e:
+                print(f"Erro em {tarefa['nome']} (página {tarefa['args'][0]}): {e}")
+                contar("falhas", loja=tarefa["loja"], etapa="busca")
+                erro = e
+            if not _colocar(self.fila_html, (tarefa, html, None, erro), self.cancelar):
+                return
+            observar("profundidade_fila_html", self.fila_html.qsize())
+
+    def _processar_aqui(self, tarefa, html, registros):
+        try:
+            return processar_pagina(tarefa["loja"], html, self.tempo, registros), None
+        except Exception as e:
+            contar("falhas", loja=tarefa["loja"], etapa="parse")
+            return [], e
+
+    def _trocar_pool(self, quebrado):
+        _descartar_pool(quebrado)
+        if self.pool is quebrado:
+            self.pool = _obter_pool(self.processos)
+
+    def _entregar(self, tarefa, futuro, pool, html, registros):
+        try:
+            registros, erro = futuro.result(), None
+        except BrokenProcessPool:
+            # O processo que fazia o parse morreu: a página é refeita nesta thread
+            self._trocar_pool(pool)
+            registros, erro = self._processar_aqui(tarefa, html, registros)
+        except Exception as e:
+            registros, erro = [], e
+            contar("falhas", loja=tarefa["loja"], etapa="parse")
+        return _colocar(self.fila_saida, (tarefa, registros, erro), self.cancelar)
+
+    def _despachar(self, buscadores):
+        try:
+            self._despachar_paginas(buscadores)
+        finally:
+            _colocar(self.fila_saida, _FIM, self.cancelar)
+
+    def _despachar_paginas(self, buscadores):
+        # Mantém no máximo 2 páginas por processo em parse; o resto espera na fila_html
+        self.pool = _obter_pool(self.processos) if self.processos else None
+        em_voo = deque()
+        limite = max(self.processos, 1) * 2
+        restantes = buscadores
+        while restantes and not self.cancelar.is_set():
+            try:
+                item = self.fila_html.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if item is _FIM:
+                restantes -= 1
+                continue
+            tarefa, html, registros, erro = item
+            if erro is not None:
+                if not _colocar(self.fila_saida, (tarefa, [], erro), self.cancelar):
+                    return
+                continue
+            # Pool quebrado: tenta uma vez num pool novo; se também falhar, o parse é feito nesta thread
+            futuro = pool = None
+            for _ in range(2):
+                if self.pool is None:
+                    break
+                pool = self.pool
+                try:
+                    futuro = pool.submit(processar_pagina, tarefa["loja"], html, self.tempo, registros)
+                    break
+                except BrokenProcessPool:
+                    self._trocar_pool(pool)
+            if futuro is None:
+                registros, erro = self._processar_aqui(tarefa, html, registros)
+                if not _colocar(self.fila_saida, (tarefa, registros, erro), self.cancelar):
+                    return
+                continue
+            em_voo.append((tarefa, futuro, pool, html, registros))
+            # Entrega na ordem de chegada o que já terminou; espera se o limite de páginas em parse encheu
+            while em_voo and (len(em_voo) >= limite or em_voo[0][1].done()):
+                if not self._entregar(*em_voo.popleft()):
+                    return
+        while em_voo:
+            if not self._entregar(*em_voo.popleft()):
+                return
+
+    def proximo(self):
+        """Próximo item da fila_saida; _FIM também se a busca foi cancelada ou o despachante parou sem avisar."""
+        while True:
+            try:
+                return self.fila_saida.get(timeout=0.2)
+            except queue.Empty:
+                if self.cancelar.is_set() or not self.despachante.is_alive():
+                    # O despachante pode ter entregado o último item logo antes de terminar
+                    try:
+                        return self.fila_saida.get_nowait()
+                    except queue.Empty:
+                        return _FIM
+
+    def encerrar(self):
+        # Espera pouco: uma thread presa numa página só sai quando ela termina de carregar, e
+        # ninguém mais usa o que ela entregar (são daemon, terminam sozinhas)
+        self.cancelar.set()
+        limite = time.monotonic() + ESPERA_ENCERRAR
+        for thread in self.buscadores + [self.despachante]:
+            thread.join(max(limite - time.monotonic(), 0))
+
+
+def executar_pipeline(termo, paginas, tempo, lojas=None, gravar=None, buscas_simultaneas=BUSCAS_SIMULTANEAS,
+                      processos=PROCESSOS_PARSE, tamanho_fila=TAMANHO_FILA, tamanho_lote=TAMANHO_LOTE,
+                      intervalo_lote=INTERVALO_LOTE, cancelar=None):
+    """
+    Entrega (loja, registros, erro) por página, conforme cada uma fica pronta,
+    com os produtos já normalizados e sem repetidos dentro de cada loja.
+    'gravar(registros)', se informado, recebe os registros em lotes (ex.:
+    DetectorMudancas.processar) no mesmo thread de quem consome o gerador;
+    páginas vindas do cache são entregues mas não passam por 'gravar'.
+    'cancelar' (threading.Event), se informado, interrompe a busca de outra
+    thread: o gerador termina sem esperar as páginas que faltam.
+    """
+    estagios = _Estagios(montar_tarefas(termo, paginas, lojas), tempo, buscas_simultaneas, processos, tamanho_fila,
+                         cancelar)
+    vistos = {}
+    lote = []
+    ultima_gravacao = time.monotonic()
+
+    def _gravar():
+        nonlocal lote, ultima_gravacao
+        if lote and gravar is not None:
+            with span("gravacao"):
+                gravar(lote)
+        lote = []
+        ultima_gravacao = time.monotonic()
+
+    estagios.iniciar()
+    try:
+        while True:
+            item = estagios.proximo()
+            if item is _FIM:
+                break
+            tarefa, registros, erro = item
+            guardar = getattr(tarefa["funcao"], "guardar", None)
+            if registros and guardar and not tarefa["em_cache"]:
+                sem_normalizacao = []
+                for registro in registros:
+                    copia = registro.copy()
+                    for campo in CAMPOS_NORMALIZADOS:
+                        copia.pop(campo, None)
+                    sem_normalizacao.append(copia)
+                guardar(tarefa["termo"], tarefa["args"][0], sem_normalizacao, *tarefa["args"][1:], **tarefa["kwargs"])
+            if tarefa["fatia"] is not None:
+                registros = registros[tarefa["fatia"]]
+            vistos_loja = vistos.setdefault(tarefa["nome"], set())
+            unicos = []
+            for registro in registros:
+                chave = chave_produto(registro)
+                if chave not in vistos_loja:
+                    vistos_loja.add(chave)
+                    unicos.append(registro)
+            # Página do cache não foi raspada agora: não confirma nem grava preço nenhum
+            if gravar is not None and not tarefa["em_cache"]:
+                lote.extend(unicos)
+                if len(lote) >= tamanho_lote or time.monotonic() - ultima_gravacao >= intervalo_lote:
+                    _gravar()
+            yield tarefa["nome"], unicos, erro
+        _gravar()
+    finally:
+        estagios.encerrar()
@@ -0,0 +1,196 @@
+# scrapers/provisionamento.py
+
+import os
+import sys
+import json
+import shutil
+import threading
+import subprocess
+
+# Onde fica o caminho já resolvido de cada driver (e a versão do navegador
+# para a qual ele foi resolvido), para as próximas execuções não repetirem a busca
+ARQUIVO_CACHE_DRIVERS = os.environ.get(
+    "PRICEWATCHER_CACHE_DRIVERS",
+    os.path.join(os.path.expanduser("~"), ".pricewatcher", "drivers.json"),
+)
+
+BINARIOS = {
+    "chrome": "chromedriver",
+    "firefox": "geckodriver",
+}
+
+# Onde procurar o executável do navegador (só para ver se ele mudou, sem executá-lo)
+EXECUTAVEIS_NAVEGADOR = {
+    "chrome": {
+        "win": [r"%PROGRAMFILES%\Google\Chrome\Application\chrome.exe",
+                r"%PROGRAMFILES(X86)%\Google\Chrome\Application\chrome.exe",
+                r"%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe"],
+        "darwin": ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"],
+        "linux": ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"],
+    },
+    "firefox": {
+        "win": [r"%PROGRAMFILES%\Mozilla Firefox\firefox.exe", r"%PROGRAMFILES(X86)%\Mozilla Firefox\firefox.exe"],
+        "darwin": ["/Applications/Firefox.app/Contents/MacOS/firefox"],
+        "linux": ["firefox", "firefox-esr"],
+    },
+}
+
+_resolvidos = {}
+# Navegadores cujo driver falhou ao abrir: a próxima resolução confere as versões de novo
+_verificar = set()
+_lock = threading.Lock()
+
+def nome_binario(navegador):
+    nome = BINARIOS[navegador]
+    return f"{nome}.exe" if sys.platform.startswith("win") else nome
+
+def pasta_drivers():
+    # No executável do PyInstaller os arquivos de 'datas' ficam em sys._MEIPASS
+    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+        return os.path.join(sys._MEIPASS, 'drivers')
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_root, 'drivers')
+
+def _gerenciador(navegador):
+    if navegador == "chrome":
+        from webdriver_manager.chrome import ChromeDriverManager
+        return ChromeDriverManager()
+    from webdriver_manager.firefox import GeckoDriverManager
+    return GeckoDriverManager()
+
+def versao_navegador(navegador):
+    """Versão do navegador instalado, ou None se não der para descobrir."""
+    try:
+        return _gerenciador(navegador).driver.get_browser_version_from_os()
+    except Exception:
+        return None
+
+def executavel_navegador(navegador):
+    """Caminho real do executável do navegador instalado, ou None se não achar."""
+    sistema = "win" if sys.platform.startswith("win") else "darwin" if sys.platform == "darwin" else "linux"
+    for candidato in EXECUTAVEIS_NAVEGADOR[navegador][sistema]:
+        caminho = os.path.expandvars(candidato)
+        if not os.path.isabs(caminho):
+            caminho = shutil.which(caminho)
+        if caminho and os.path.isfile(caminho):
+            return os.path.realpath(caminho)
+    return None
+
+def _modificado_em(caminho):
+    try:
+        return os.stat(caminho).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+
+def versao_driver(caminho):
+    """Roda '<driver> --version'; None se o binário não executar."""
+    try:
+        saida = subprocess.run([caminho, "--version"], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    for parte in saida.split():
+        if parte[:1].isdigit():
+            return parte
+    return None
+
+def _mesma_versao_principal(a, b):
+    return a is None or b is None or a.split(".")[0] == b.split(".")[0]
+
+def _ler_cache():
+    try:
+        with open(ARQUIVO_CACHE_DRIVERS, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _salvar_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(ARQUIVO_CACHE_DRIVERS), exist_ok=True)
+        temporario = ARQUIVO_CACHE_DRIVERS + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(temporario, ARQUIVO_CACHE_DRIVERS)
+    except OSError as e:
+        print(f"Aviso: não foi possível salvar o cache de drivers: {e}")
+
+def _executavel(caminho):
+    return bool(caminho) and os.path.isfile(caminho) and os.access(caminho, os.X_OK)
+
+def _resolver(navegador, navegador_versao):
+    # 1. Driver que acompanha o projeto (ou o executável), se for da versão do navegador
+    local = os.path.join(pasta_drivers(), nome_binario(navegador))
+    if _executavel(local):
+        versao = versao_driver(local)
+        if versao is not None and _mesma_versao_principal(versao, navegador_versao):
+            return local, versao
+
+    # 2. Driver no PATH
+    no_path = shutil.which(nome_binario(navegador))
+    if no_path:
+        versao = versao_driver(no_path)
+        if versao is not None and _mesma_versao_principal(versao, navegador_versao):
+            return no_path, versao
+
+    # 3. Baixa (ou reaproveita o download) pelo webdriver-manager
+    try:
+        caminho = _gerenciador(navegador).install()
+    except Exception as e:
+        raise FileNotFoundError(
+            f"Erro: driver do {navegador} não encontrado. Coloque '{nome_binario(navegador)}' na pasta "
+            f"'drivers/' do projeto ou verifique a conexão para o download automático ({e})."
+        ) from e
+    return caminho, versao_driver(caminho)
+
+def _entrada_valida(entrada, executavel):
+    # Driver e navegador iguais aos da última resolução (mesmos arquivos, mesma data de modificação)
+    return (_executavel(entrada.get("caminho"))
+            and entrada.get("modificado_driver") == _modificado_em(entrada["caminho"])
+            and executavel is not None
+            and entrada.get("executavel_navegador") == executavel
+            and entrada.get("modificado_navegador") == _modificado_em(executavel))
+
+def caminho_driver(navegador):
+    """
+    Caminho do chromedriver/geckodriver, resolvido uma vez por processo. O
+    resultado fica em disco com o driver e o executável do navegador: enquanto
+    nenhum dos dois arquivos mudar, o cache vale sem executar nada. A versão
+    do navegador só é consultada (abrindo o binário) quando algo mudou ou
+    depois de um driver que não abriu (invalidar).
+    """
+    with _lock:
+        if navegador in _resolvidos:
+            return _resolvidos[navegador]
+
+        cache = _ler_cache()
+        entrada = cache.get(navegador) or {}
+        executavel = executavel_navegador(navegador)
+        verificar = navegador in _verificar
+
+        if not verificar and _entrada_valida(entrada, executavel):
+            caminho = entrada["caminho"]
+        else:
+            navegador_versao = versao_navegador(navegador)
+            if (not verificar and _executavel(entrada.get("caminho"))
+                    and (navegador_versao is None or entrada.get("versao_navegador") == navegador_versao)):
+                caminho, versao = entrada["caminho"], entrada.get("versao_driver")
+            else:
+                caminho, versao = _resolver(navegador, navegador_versao)
+            cache[navegador] = {
+                "caminho": caminho,
+                "versao_driver": versao,
+                "versao_navegador": navegador_versao,
+                "modificado_driver": _modificado_em(caminho),
+                "executavel_navegador": executavel,
+                "modificado_navegador": _modificado_em(executavel),
+            }
+            _salvar_cache(cache)
+
+        _verificar.discard(navegador)
+        _resolvidos[navegador] = caminho
+        return caminho
+
+def invalidar(navegador):
+    """Chamado quando o driver não abre: a próxima chamada a caminho_driver resolve tudo de novo."""
+    with _lock:
+        _resolvidos.pop(navegador, None)
+        _verificar.add(navegador)
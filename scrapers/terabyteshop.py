@@ -1,27 +1,21 @@
-import sys
+# scrapers/terabyteshop.py
+
 import os
-from bs4 import BeautifulSoup
-from time import sleep
-from selenium import webdriver
-from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
-import re
+
+from scrapers.cache import com_cache
+from scrapers.driver_pool import usar_driver
+from scrapers.espera import aguardar_resultados
+from scrapers.extracao import extrair_produtos
+from scrapers.perfis import aplicar_firefox
+from utils.metricas import span, contar
+
+# A Terabyte tem proteção anti-bot que exige navegador real: só Selenium
+SUPORTA_HTTP = False
 
 # Nome do arquivo que guarda o caminho do perfil do Firefox
 PERFIL_CACHE = "cache_perfil_firefox.txt"
 
-def get_driver_path(driver_name):
-    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
-        bundle_dir = sys._MEIPASS
-    else:
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        bundle_dir = project_root
-    return os.path.join(bundle_dir, 'drivers', driver_name)
-
 def carregar_caminho_perfil():
     if os.path.exists(PERFIL_CACHE):
         with open(PERFIL_CACHE, "r", encoding="utf-8") as f:
@@ -36,7 +30,7 @@ def carregar_caminho_perfil():
         f.write(caminho)
     return caminho
 
-def terabyte(produto, page_number, time_str):
+def _opcoes_firefox():
     options = FirefoxOptions()
     # options.add_argument("--headless=new")  # Descomente se quiser headless
     
@@ -48,59 +42,32 @@ def terabyte(produto, page_number, time_str):
     # Usa o perfil do Firefox do usuário
     caminho_perfil = carregar_caminho_perfil()
     options.profile = caminho_perfil
+    return aplicar_firefox(options, "terabyte")
 
-    driver_executable_path = get_driver_path("geckodriver.exe")
-    if not os.path.exists(driver_executable_path):
-        raise FileNotFoundError(f"Erro: Driver '{driver_executable_path}' não encontrado. Baixe-o e coloque na pasta 'drivers/' do seu projeto.")
-
-    driver = None
-
-    try:
-        service = FirefoxService(executable_path=driver_executable_path)
-        driver = webdriver.Firefox(service=service, options=options)
-
+def baixar_terabyte(produto, page_number):
+    """HTML da busca (a Terabyte não pagina: 'page_number' é ignorado)."""
+    with usar_driver("firefox", "terabyte", _opcoes_firefox) as driver:
         url = f"https://www.terabyteshop.com.br/busca?str={produto}"
-        driver.get(url)
+        with span("navegacao", loja="terabyte"):
+            driver.get(url)
 
         initial_page_source = driver.page_source
         print(f"DEBUG_TERABYTE: Page source inicial (primeiras 500 chars):\n{initial_page_source[:500]}")
         if "<html><head></head><body></body></html>" in initial_page_source.lower() or len(initial_page_source) < 100:
             print("DEBUG_TERABYTE: Page source inicial parece estar em branco ou muito vazio.")
 
-        WebDriverWait(driver, 30).until(
-            EC.visibility_of_element_located((By.CSS_SELECTOR, "a.product-item__name"))
-        )
-        sleep(2)
-
-        html = driver.page_source
-        soup = BeautifulSoup(html, "html.parser")
-
-        produtos_raspados = []
-
-        nomes_elems = soup.find_all(class_=re.compile(r"\bproduct-item__name\b"))
-        preco_elems = soup.find_all(class_=re.compile(r"\bproduct-item__new-price\b"))
+        aguardar_resultados(driver, "terabyte", "a.product-item__name")
 
-        for nome_elem, preco_elem in zip(nomes_elems, preco_elems):
-            nome_text = nome_elem.get_text(strip=True)
-            preco_text_bruto = preco_elem.get_text(strip=True)
-            link_produto = nome_elem.get('href') if nome_elem else "N/A"
+        return driver.page_source
 
-            produtos_raspados.append({
-                "Site": "TerabyteShop",
-                "Nome do Produto": nome_text,
-                "Preço Bruto": preco_text_bruto,
-                "Link do Produto": link_produto,
-                "Data do Scraping": time_str
-            })
-
-        return produtos_raspados
+@com_cache(ttl=10 * 60)
+def terabyte(produto, page_number, time_str):
+    try:
+        return extrair_produtos("terabyte", baixar_terabyte(produto, page_number), time_str)
 
     except Exception as e:
         print(f"DEBUG_TERABYTE: Erro inesperado na função terabyte: {e}")
+        contar("falhas", loja="terabyte", etapa="scraper")
         if "timeout" in str(e).lower():
             print("DEBUG_TERABYTE: Tempo limite excedido ao carregar a página. Site pode estar bloqueando ou muito lento.")
         return []
-    finally:
-        if driver:
-            driver.quit()
-            print("DEBUG_TERABYTE: Navegador fechado (finally block).")
@@ -0,0 +1,209 @@
+# trabalhador.py
+# Raspagem distribuída por uma fila durável (utils/fila.py):
+#
+#   python trabalhador.py coordenar --termo "ssd nvme" --paginas 1-3   # enfileira e junta os resultados
+#   python trabalhador.py trabalhar --paralelo 2                       # um por máquina/processo, quantos quiser
+#   python trabalhador.py situacao                                     # quantos trabalhos em cada estado
+#
+# --fila aceita o caminho do SQLite (padrão data/fila.db) ou redis://host:6379/0
+# para trabalhadores em várias máquinas. Cada trabalhador tem o próprio pool
+# de navegadores; só o coordenador grava no histórico.
+
+import os
+import time
+import uuid
+import socket
+import argparse
+import threading
+from datetime import datetime
+
+from scrapers.executor import LOJAS, executar_lojas
+from scrapers.crawler import interpretar_paginas, planejar
+from utils.fila import CAMINHO_FILA, CONCLUIDO, abrir_fila
+from utils.historico import HistoricoPrecos
+from utils.mudancas import DetectorMudancas
+from utils.metricas import contar
+
+# Espera entre consultas à fila quando não há trabalho / resultado novo
+INTERVALO_OCIOSO = 2.0
+INTERVALO_COLETA = 1.0
+# Quanto o coordenador espera por um lote antes de desistir dos trabalhos que faltam
+# (ex.: nenhum trabalhador rodando); os que terminarem depois ficam na fila sem coleta
+PRAZO_COORDENACAO = 30 * 60
+
+def dividir_em_trabalhos(termo, lojas, paginas):
+    """
+    Um trabalho (loja, termo, páginas) por requisição que a loja de fato faz:
+    páginas que o crawler buscaria com a mesma chamada (a Terabyte não pagina,
+    a Kabum junta 5 páginas numa de 100 itens) vão no mesmo trabalho.
+    """
+    if not isinstance(paginas, list):
+        paginas = interpretar_paginas(paginas)
+    trabalhos = []
+    for loja in lojas:
+        grupos = {}
+        for pagina in paginas:
+            chamadas, _ = planejar(LOJAS[loja], [pagina])
+            grupos.setdefault(repr(chamadas), []).append(pagina)
+        trabalhos.extend((loja, termo, grupo) for grupo in grupos.values())
+    return trabalhos
+
+def coordenar(fila, termo, lojas, paginas, esperar=True, prazo=PRAZO_COORDENACAO):
+    trabalhos = dividir_em_trabalhos(termo, lojas, paginas)
+    lote = uuid.uuid4().hex[:12]
+    fila.enfileirar(trabalhos, lote=lote)
+    print(f"Lote {lote}: {len(trabalhos)} trabalhos enfileirados para '{termo}'.")
+    if not esperar:
+        return
+
+    historico = HistoricoPrecos()
+    mudancas = DetectorMudancas(historico)
+    faltam = len(trabalhos)
+    total_produtos = 0
+    limite = time.monotonic() + prazo
+    try:
+        while faltam:
+            finalizados = fila.coletar(lote)
+            if not finalizados:
+                if time.monotonic() >= limite:
+                    print(f"Lote {lote}: prazo de {prazo:.0f}s esgotado, {faltam} trabalhos sem resposta "
+                          f"(há trabalhadores rodando?).")
+                    break
+                time.sleep(INTERVALO_COLETA)
+                continue
+            for trabalho in finalizados:
+                faltam -= 1
+                paginas_txt = ",".join(map(str, trabalho["paginas"]))
+                if trabalho["estado"] != CONCLUIDO:
+                    print(f"  {trabalho['loja']} (páginas {paginas_txt}): falhou após "
+                          f"{trabalho['tentativas']} tentativas - {trabalho['erro']}")
+                    continue
+                resultados = trabalho["resultados"]
+                total_produtos += len(resultados)
+                eventos = mudancas.processar(resultados, termo=termo)
+                print(f"  {trabalho['loja']} (páginas {paginas_txt}): {len(resultados)} produtos, "
+                      f"{len(eventos)} novidades. Faltam {faltam}.")
+    finally:
+        mudancas.fechar()
+        historico.fechar()
+    print(f"Lote {lote} terminado: {total_produtos} produtos.")
+
+
+class Trabalhador:
+    """
+    Reserva trabalhos da fila e roda cada um com o crawler. Uma thread de
+    batimento renova o lease enquanto a loja é raspada; se o processo morrer,
+    o lease expira e outro trabalhador pega o trabalho.
+    """
+
+    def __init__(self, fila, nome=None, paralelo=1, sair_quando_vazia=False):
+        self.fila = fila
+        self.nome = nome or f"{socket.gethostname()}-{os.getpid()}"
+        self.paralelo = paralelo
+        self.sair_quando_vazia = sair_quando_vazia
+        self._parar = threading.Event()
+
+    def _batimentos(self, trabalho, dono, feito):
+        intervalo = max(self.fila.duracao_lease / 3, 1)
+        while not feito.wait(intervalo):
+            if not self.fila.renovar(trabalho["id"], dono):
+                print(f"Aviso: lease do trabalho {trabalho['id']} perdido; outro trabalhador vai refazê-lo.")
+                return
+
+    def _executar(self, trabalho, dono):
+        try:
+            self._raspar(trabalho, dono)
+        except Exception as e:
+            # Sem isso a thread do trabalhador morreria e o trabalho só voltaria quando o lease vencesse
+            self.fila.falhar(trabalho["id"], dono, e)
+            contar("trabalhos", estado="falha", loja=trabalho["loja"])
+            print(f"[{dono}] {trabalho['loja']} / '{trabalho['termo']}': erro inesperado - {e}")
+
+    def _raspar(self, trabalho, dono):
+        feito = threading.Event()
+        batimento = threading.Thread(target=self._batimentos, args=(trabalho, dono, feito), daemon=True)
+        batimento.start()
+        try:
+            tempo = datetime.now().strftime("%H:%M:%S")
+            # Como no vigia: o coordenador grava os resultados com a hora de agora, então
+            # passam por fora do cache de buscas (que pode devolver até ttl + stale de idade)
+            funcao = LOJAS[trabalho["loja"]]
+            lojas = {trabalho["loja"]: getattr(funcao, "sem_cache", funcao)}
+            # executar_lojas aplica o limite de buscas simultâneas de cada loja
+            _, resultados, erro = next(executar_lojas(trabalho["termo"], trabalho["paginas"], tempo, lojas))
+        finally:
+            feito.set()
+            batimento.join()
+
+        if erro is not None:
+            self.fila.falhar(trabalho["id"], dono, erro)
+            contar("trabalhos", estado="falha", loja=trabalho["loja"])
+            print(f"[{dono}] {trabalho['loja']} / '{trabalho['termo']}': erro - {erro}")
+        elif self.fila.concluir(trabalho["id"], dono, resultados):
+            contar("trabalhos", estado="concluido", loja=trabalho["loja"])
+            print(f"[{dono}] {trabalho['loja']} / '{trabalho['termo']}' páginas {trabalho['paginas']}: "
+                  f"{len(resultados)} produtos")
+
+    def _laco(self, indice):
+        # Nome por thread: o lease de um trabalho é de uma thread, não do processo inteiro
+        dono = f"{self.nome}/{indice}"
+        while not self._parar.is_set():
+            trabalho = self.fila.reservar(dono)
+            if trabalho is None:
+                if self.sair_quando_vazia:
+                    return
+                self._parar.wait(INTERVALO_OCIOSO)
+                continue
+            self._executar(trabalho, dono)
+
+    def executar(self):
+        threads = [threading.Thread(target=self._laco, args=(i,), daemon=True) for i in range(self.paralelo)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            # Termina os trabalhos em andamento; um segundo Ctrl+C sai na hora (os leases expiram)
+            print("Parando: terminando os trabalhos em andamento...")
+            self._parar.set()
+            for thread in threads:
+                thread.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Raspagem distribuída por uma fila de trabalhos.")
+    parser.add_argument("--fila", default=CAMINHO_FILA, help="arquivo SQLite ou redis://host:porta/db")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    coordenador = comandos.add_parser("coordenar", help="enfileira uma busca e grava os resultados")
+    coordenador.add_argument("--termo", required=True)
+    coordenador.add_argument("--lojas", nargs="+", default=list(LOJAS), choices=list(LOJAS))
+    coordenador.add_argument("--paginas", default="1")
+    coordenador.add_argument("--sem-esperar", action="store_true", help="só enfileira")
+    coordenador.add_argument("--prazo", type=float, default=PRAZO_COORDENACAO,
+                             help="segundos esperando o lote antes de desistir")
+
+    trabalhador = comandos.add_parser("trabalhar", help="raspa os trabalhos da fila")
+    trabalhador.add_argument("--nome", default=None)
+    trabalhador.add_argument("--paralelo", type=int, default=2, help="trabalhos simultâneos neste processo")
+    trabalhador.add_argument("--sair-quando-vazia", action="store_true")
+
+    comandos.add_parser("situacao", help="quantos trabalhos há em cada estado")
+    args = parser.parse_args()
+
+    fila = abrir_fila(args.fila)
+    try:
+        if args.comando == "coordenar":
+            coordenar(fila, args.termo, args.lojas, args.paginas, esperar=not args.sem_esperar, prazo=args.prazo)
+        elif args.comando == "trabalhar":
+            Trabalhador(fila, args.nome, args.paralelo, args.sair_quando_vazia).executar()
+        else:
+            for estado, quantidade in fila.contagem().items():
+                print(f"{estado:<14}{quantidade:>6}")
+    finally:
+        fila.fechar()
+
+
+if __name__ == "__main__":
+    main()
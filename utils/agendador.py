@@ -0,0 +1,197 @@
+# utils/agendador.py
+
+import time
+import heapq
+import random
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Domínio de cada loja: o limite de requisições vale por domínio
+DOMINIO_POR_LOJA = {
+    "AliExpress": "pt.aliexpress.com",
+    "Amazon": "www.amazon.com.br",
+    "Kabum": "www.kabum.com.br",
+    "Mercado Livre": "lista.mercadolivre.com.br",
+    "Pichau": "www.pichau.com.br",
+    "Terabyte Shop": "www.terabyteshop.com.br",
+}
+
+# (requisições por segundo, rajada máxima) por domínio. 1/20 por segundo são 180
+# páginas por hora num domínio: uns 180 termos de uma página a cada hora. Além
+# disso o Agendador estica os intervalos do domínio (ver carga_por_dominio)
+LIMITE_PADRAO = (1 / 20, 2)
+LIMITES_POR_DOMINIO = {
+    "www.amazon.com.br": (1 / 30, 2),
+    "www.terabyteshop.com.br": (1 / 45, 1),
+}
+
+JITTER = 0.15
+INTERVALO_MINIMO = 5 * 60
+
+
+class BaldeDeFichas:
+    """Token bucket: 'taxa' fichas por segundo, acumulando no máximo 'capacidade'."""
+
+    def __init__(self, taxa, capacidade):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self._fichas = capacidade
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consumir(self, quantidade=1):
+        """
+        Consome 'quantidade' fichas e retorna 0, ou retorna quantos segundos
+        faltam para tê-las. Um pedido maior que a capacidade espera o balde
+        encher e deixa o saldo negativo, então a taxa média continua valendo.
+        """
+        with self._lock:
+            agora = time.monotonic()
+            self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.taxa)
+            self._ultimo = agora
+            necessarias = min(quantidade, self.capacidade)
+            if self._fichas >= necessarias:
+                self._fichas -= quantidade
+                return 0
+            return (necessarias - self._fichas) / self.taxa
+
+
+class TarefaVigia:
+    """Um termo da watchlist numa loja. 'requisicoes': quantas páginas a loja baixa por execução."""
+
+    def __init__(self, termo, loja, intervalo, paginas="1", requisicoes=1):
+        self.termo = termo
+        self.loja = loja
+        self.paginas = paginas
+        self.requisicoes = requisicoes
+        self.intervalo = intervalo
+        # 0 = preços nunca mudam, 1 = mudam a cada execução (média móvel)
+        self.volatilidade = 0.5
+        self.executada = False
+        self.proxima_execucao = 0
+
+    @property
+    def dominio(self):
+        return DOMINIO_POR_LOJA.get(self.loja, self.loja)
+
+    @property
+    def paginas_por_hora(self):
+        return self.requisicoes * 3600 / max(self.intervalo, INTERVALO_MINIMO)
+
+    def registrar_resultado(self, eventos):
+        """
+        'eventos': o que DetectorMudancas.processar devolveu para a execução.
+        Só conta mudança de preço de um anúncio já conhecido; anúncios que
+        entram e saem da página (patrocinados, por exemplo) não contam.
+        """
+        if self.executada:
+            mudou = 1.0 if any(evento["tipo"] == "preco" for evento in eventos) else 0.0
+            self.volatilidade = 0.7 * self.volatilidade + 0.3 * mudou
+        self.executada = True
+
+    def agendar_proxima(self, agora, carga=1.0):
+        # Preços que mudam muito são vistos até 2x mais vezes; os estáveis, até 2x menos.
+        # 'carga' > 1: o domínio não comporta a watchlist e todos os intervalos dele esticam igual
+        fator = 2 ** (1 - 2 * self.volatilidade)
+        intervalo = max(self.intervalo * fator, INTERVALO_MINIMO) * carga
+        self.proxima_execucao = agora + intervalo * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+class Agendador:
+    """
+    Reexecuta as tarefas da watchlist para sempre. Quando várias tarefas do
+    mesmo domínio vencem juntas, as mais voláteis pegam as fichas primeiro e
+    as outras voltam para a fila até o balde encher de novo. 'executar(tarefa)'
+    devolve os eventos de DetectorMudancas.processar da execução.
+    """
+
+    def __init__(self, tarefas, executar, trabalhadores=4, limites_por_dominio=None):
+        self.executar = executar
+        self.trabalhadores = trabalhadores
+        self._limites = dict(LIMITES_POR_DOMINIO, **(limites_por_dominio or {}))
+        self._baldes = {}
+        self._fila = []
+        self._contador = itertools.count()
+        self._condicao = threading.Condition()
+        self._parar = threading.Event()
+        self._vagas = threading.Semaphore(trabalhadores)
+
+        self.carga_por_dominio = self._calcular_carga(tarefas)
+
+        agora = time.time()
+        for tarefa in tarefas:
+            # Espalha a primeira rodada para não começar com uma rajada; num domínio sobrecarregado,
+            # pelo intervalo esticado inteiro, no ritmo que o limite deixa
+            carga = self.carga_por_dominio[tarefa.dominio]
+            janela = min(tarefa.intervalo, 60) if carga == 1 else tarefa.intervalo * carga
+            tarefa.proxima_execucao = agora + random.uniform(0, janela)
+            self._enfileirar(tarefa)
+
+    def _calcular_carga(self, tarefas):
+        # Páginas por hora pedidas / páginas por hora que o limite do domínio deixa. Acima de 1 as
+        # tarefas atrasariam cada vez mais; em vez disso os intervalos do domínio esticam na mesma
+        # proporção e todas continuam rodando, só que menos vezes
+        pedidas = {}
+        for tarefa in tarefas:
+            pedidas[tarefa.dominio] = pedidas.get(tarefa.dominio, 0) + tarefa.paginas_por_hora
+        carga = {}
+        for dominio, por_hora in pedidas.items():
+            capacidade = self._limites.get(dominio, LIMITE_PADRAO)[0] * 3600
+            carga[dominio] = max(1.0, por_hora / capacidade)
+            if carga[dominio] > 1:
+                print(f"Aviso: {dominio} comporta {capacidade:.0f} páginas/h e a watchlist pede {por_hora:.0f}; "
+                      f"os intervalos desse domínio ficam {carga[dominio]:.1f}x maiores.")
+        return carga
+
+    def _balde(self, dominio):
+        if dominio not in self._baldes:
+            taxa, capacidade = self._limites.get(dominio, LIMITE_PADRAO)
+            self._baldes[dominio] = BaldeDeFichas(taxa, capacidade)
+        return self._baldes[dominio]
+
+    def _enfileirar(self, tarefa):
+        with self._condicao:
+            heapq.heappush(self._fila, (tarefa.proxima_execucao, next(self._contador), tarefa))
+            self._condicao.notify()
+
+    def _vencidas(self, agora):
+        vencidas = []
+        with self._condicao:
+            while self._fila and self._fila[0][0] <= agora:
+                vencidas.append(heapq.heappop(self._fila)[2])
+        return vencidas
+
+    def _rodar(self, tarefa):
+        try:
+            tarefa.registrar_resultado(self.executar(tarefa))
+        except Exception as e:
+            print(f"Erro ao vigiar '{tarefa.termo}' em {tarefa.loja}: {e}")
+        finally:
+            self._vagas.release()
+            tarefa.agendar_proxima(time.time(), self.carga_por_dominio.get(tarefa.dominio, 1.0))
+            self._enfileirar(tarefa)
+
+    def parar(self):
+        self._parar.set()
+        with self._condicao:
+            self._condicao.notify_all()
+
+    def executar_para_sempre(self):
+        with ThreadPoolExecutor(max_workers=self.trabalhadores) as executor:
+            while not self._parar.is_set():
+                agora = time.time()
+                for tarefa in sorted(self._vencidas(agora), key=lambda t: t.volatilidade, reverse=True):
+                    # Uma ficha por página que a busca vai baixar, não por tarefa
+                    espera = self._balde(tarefa.dominio).consumir(tarefa.requisicoes)
+                    if espera > 0:
+                        tarefa.proxima_execucao = agora + espera + random.uniform(0, 1)
+                        self._enfileirar(tarefa)
+                        continue
+                    self._vagas.acquire()
+                    executor.submit(self._rodar, tarefa)
+
+                with self._condicao:
+                    espera = self._fila[0][0] - time.time() if self._fila else 60
+                    if espera > 0:
+                        self._condicao.wait(min(espera, 60))
@@ -0,0 +1,107 @@
+# utils/agrupamento.py
+
+from collections import Counter, defaultdict
+from itertools import combinations
+import numpy as np
+from rapidfuzz import fuzz, process
+
+# Cada nome entra no índice pelos pares formados com os seus 4 tokens mais
+# raros: nomes parecidos o bastante para passar no threshold quase sempre
+# compartilham pelo menos um desses pares, e um par é bem mais seletivo que
+# um token sozinho (evita blocos enormes com tokens como "gb" ou "ssd"). Com
+# 3, um erro de digitação (que vira o token mais raro do nome) já bastava
+# para separar as variações; benchmarks/conferir_agrupamento.py compara com
+# a comparação de todos com todos.
+TOKENS_RAROS_POR_NOME = 4
+# Blocos maiores que isso são comparados em fatias para limitar a memória da matriz
+LINHAS_POR_FATIA = 2000
+
+
+class UniaoBusca:
+    """Union-find com compressão de caminho, usado para juntar os pares parecidos em grupos."""
+
+    def __init__(self, tamanho):
+        self.pai = list(range(tamanho))
+
+    def raiz(self, i):
+        pai = self.pai
+        r = i
+        while pai[r] != r:
+            r = pai[r]
+        while pai[i] != r:
+            pai[i], i = r, pai[i]
+        return r
+
+    def unir(self, a, b):
+        ra, rb = self.raiz(a), self.raiz(b)
+        if ra != rb:
+            # A menor raiz vence, assim o grupo fica com o id do primeiro nome visto
+            if ra < rb:
+                self.pai[rb] = ra
+            else:
+                self.pai[ra] = rb
+
+def chaves_de_bloco(tokens, frequencia, tokens_raros=TOKENS_RAROS_POR_NOME):
+    # Token que só este nome tem não junta ninguém: não gasta vaga entre os raros
+    compartilhados = [t for t in tokens if frequencia[t] > 1]
+    raros = sorted(sorted(compartilhados, key=lambda t: (frequencia[t], t))[:tokens_raros])
+    if len(raros) < 2:
+        return [tuple(raros)] if raros else []
+    return list(combinations(raros, 2))
+
+def montar_blocos(nomes, tokens_raros=TOKENS_RAROS_POR_NOME):
+    """Índice invertido (par de tokens raros) -> nomes. Cada entrada com mais de um nome é um bloco."""
+    tokens_por_nome = [set(nome.split()) for nome in nomes]
+    frequencia = Counter(token for tokens in tokens_por_nome for token in tokens)
+
+    indice = defaultdict(list)
+    for i, tokens in enumerate(tokens_por_nome):
+        for chave in chaves_de_bloco(tokens, frequencia, tokens_raros):
+            indice[chave].append(i)
+    return [bloco for bloco in indice.values() if len(bloco) > 1]
+
+def agrupar_nomes(nomes, threshold=80):
+    """
+    Retorna, para cada nome, o índice do nome que representa o seu grupo.
+    Dois nomes ficam no mesmo grupo quando o token_sort_ratio entre eles é
+    >= threshold (ou por transitividade, via union-find).
+    """
+    uniao = UniaoBusca(len(nomes))
+    # O thefuzz arredonda a nota para inteiro; o corte com -0.5 reproduz isso
+    corte = threshold - 0.5
+
+    # token_sort_ratio é o ratio dos tokens ordenados: ordena uma vez por nome
+    # e usa o ratio simples, que o rapidfuzz calcula bem mais rápido em lote
+    ordenados = [" ".join(sorted(nome.split())) for nome in nomes]
+
+    for bloco in montar_blocos(nomes):
+        nomes_bloco = [ordenados[i] for i in bloco]
+        indices = np.asarray(bloco)
+        for inicio in range(0, len(bloco), LINHAS_POR_FATIA):
+            fatia = nomes_bloco[inicio:inicio + LINHAS_POR_FATIA]
+            notas = process.cdist(
+                fatia, nomes_bloco, scorer=fuzz.ratio,
+                score_cutoff=corte, dtype=np.float32, workers=-1,
+            )
+            linhas, colunas = np.nonzero(notas)
+            a, b = indices[linhas + inicio], indices[colunas]
+            pares = a < b
+            for x, y in zip(a[pares].tolist(), b[pares].tolist()):
+                uniao.unir(x, y)
+
+    # Um nome com um token só não forma par de tokens raros e ficaria sem bloco
+    # com as variações dele (ex.: "kingstom" x "kingston"): estes são comparados
+    # com todos os nomes. Costumam ser poucos
+    curtos = np.asarray([i for i, nome in enumerate(ordenados) if len(nome.split()) < 2], dtype=np.int64)
+    for inicio in range(0, len(curtos), LINHAS_POR_FATIA):
+        fatia = curtos[inicio:inicio + LINHAS_POR_FATIA]
+        notas = process.cdist(
+            [ordenados[i] for i in fatia.tolist()], ordenados, scorer=fuzz.ratio,
+            score_cutoff=corte, dtype=np.float32, workers=-1,
+        )
+        linhas, colunas = np.nonzero(notas)
+        for x, y in zip(fatia[linhas].tolist(), colunas.tolist()):
+            if x != y:
+                uniao.unir(x, y)
+
+    return np.array([uniao.raiz(i) for i in range(len(nomes))])
@@ -0,0 +1,249 @@
+# utils/catalogo.py
+
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import datetime
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from utils.agrupamento import TOKENS_RAROS_POR_NOME
+from utils.data_processor import limpar_nome_produto
+
+CAMINHO_CATALOGO = os.path.join("data", "catalogo.db")
+
+# Nomes lidos do índice por token (os mais recentes). Limita o custo de um nome
+# cujos tokens mais raros ainda são muito comuns; quando o limite corta a lista,
+# o nome também é comparado com a assinatura de cada grupo que tem o token
+MAX_POSTAGENS_POR_TOKEN = 256
+# Parâmetros por consulta "IN (...)"; abaixo do limite de variáveis do SQLite
+_TAMANHO_LOTE_SQL = 500
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS grupos (
+    id INTEGER PRIMARY KEY,
+    representante TEXT NOT NULL,
+    assinatura TEXT NOT NULL,
+    criado_em TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nomes (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL UNIQUE,
+    ordenado TEXT NOT NULL,
+    grupo INTEGER NOT NULL REFERENCES grupos (id)
+);
+CREATE TABLE IF NOT EXISTS tokens (
+    token TEXT NOT NULL,
+    nome INTEGER NOT NULL,
+    PRIMARY KEY (token, nome)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tokens_grupos (
+    token TEXT NOT NULL,
+    grupo INTEGER NOT NULL,
+    PRIMARY KEY (token, grupo)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS frequencias (
+    token TEXT PRIMARY KEY,
+    quantidade INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+def _em_lotes(conexao, sql, valores):
+    """Roda 'sql' (com um '{}' no lugar da lista do IN) em fatias de 'valores'."""
+    valores = list(valores)
+    for inicio in range(0, len(valores), _TAMANHO_LOTE_SQL):
+        fatia = valores[inicio:inicio + _TAMANHO_LOTE_SQL]
+        yield from conexao.execute(sql.format(", ".join("?" * len(fatia))), fatia)
+
+def _tokens_raros(tokens, outros, quantidade=TOKENS_RAROS_POR_NOME):
+    # Os tokens mais raros que algum outro nome também tem: um nome só com tokens inéditos não tem com quem comparar
+    comuns = [token for token in tokens if outros.get(token, 0) > 0]
+    return sorted(comuns, key=lambda t: (outros[t], t))[:quantidade]
+
+
+class CatalogoProdutos:
+    """
+    Catálogo persistente (SQLite, modo WAL) de grupos de produto. Cada grupo
+    tem um id fixo, o nome representativo (o primeiro nome visto) e a
+    assinatura (o nome normalizado dele). Nomes novos são comparados só com
+    os nomes do catálogo que compartilham um dos seus tokens raros, via
+    índice invertido, e com as assinaturas dos grupos desses tokens quando
+    eles são comuns demais para ler todos os nomes: o custo de um lote
+    depende do tamanho do lote, não do histórico, e um nome já agrupado
+    nunca muda de grupo.
+    """
+
+    def __init__(self, caminho=CAMINHO_CATALOGO, threshold=80):
+        pasta = os.path.dirname(caminho)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        self.caminho = caminho
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        # isolation_level=None: as transações são abertas à mão (BEGIN IMMEDIATE)
+        self._conexao = sqlite3.connect(caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.executescript(_ESQUEMA)
+        self._transacao(self._indexar_assinaturas)
+
+    @staticmethod
+    def _indexar_assinaturas(conexao):
+        # Catálogos criados antes de tokens_grupos existir
+        if conexao.execute("SELECT 1 FROM tokens_grupos LIMIT 1").fetchone() is not None:
+            return
+        conexao.executemany(
+            "INSERT OR IGNORE INTO tokens_grupos (token, grupo) VALUES (?, ?)",
+            ((token, grupo) for grupo, assinatura in conexao.execute("SELECT id, assinatura FROM grupos")
+             for token in set(assinatura.split())),
+        )
+
+    def _transacao(self, operacao):
+        # BEGIN IMMEDIATE: dois processos não criam grupos para o mesmo nome ao mesmo tempo
+        with self._lock:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = operacao(self._conexao)
+            except BaseException:
+                self._conexao.execute("ROLLBACK")
+                raise
+            self._conexao.execute("COMMIT")
+            return resultado
+
+    def atribuir(self, nomes, threshold=None):
+        """
+        Id do grupo de cada nome (como veio da loja), na mesma ordem. Um nome
+        vai para o grupo do nome mais parecido (token_sort_ratio >= threshold)
+        entre os já catalogados e os anteriores do mesmo lote; se nenhum
+        passar, abre um grupo novo. Nomes vazios depois de normalizados ficam
+        com None.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        limpos = [limpar_nome_produto(nome) for nome in nomes]
+        originais = {}
+        for nome, limpo in zip(nomes, limpos):
+            if limpo:
+                originais.setdefault(limpo, nome)
+        if not originais:
+            return [None] * len(limpos)
+        grupos = self._transacao(lambda conexao: self._atribuir(conexao, originais, threshold))
+        return [grupos.get(limpo) for limpo in limpos]
+
+    def _atribuir(self, conexao, originais, threshold):
+        grupos = dict(_em_lotes(conexao, "SELECT nome, grupo FROM nomes WHERE nome IN ({})", originais))
+        novos = [limpo for limpo in originais if limpo not in grupos]
+        if not novos:
+            return grupos
+
+        tokens_por_nome = {limpo: set(limpo.split()) for limpo in novos}
+        no_lote = defaultdict(int)
+        for tokens in tokens_por_nome.values():
+            for token in tokens:
+                no_lote[token] += 1
+        no_catalogo = dict(_em_lotes(conexao, "SELECT token, quantidade FROM frequencias WHERE token IN ({})", no_lote))
+        chaves = {}
+        for limpo, tokens in tokens_por_nome.items():
+            # Quantos outros nomes (catalogados ou do lote) têm cada token
+            outros = {token: no_catalogo.get(token, 0) + no_lote[token] - 1 for token in tokens}
+            chaves[limpo] = _tokens_raros(tokens, outros)
+
+        procurados = {token for tokens in chaves.values() for token in tokens}
+        indice = defaultdict(list)
+        for token in procurados:
+            indice[token] = [nome_id for nome_id, in conexao.execute(
+                "SELECT nome FROM tokens WHERE token = ? ORDER BY nome DESC LIMIT ?", (token, MAX_POSTAGENS_POR_TOKEN + 1)
+            )]
+            if len(indice[token]) > MAX_POSTAGENS_POR_TOKEN:
+                # Lista cortada: o nome parecido pode ter ficado de fora, mas o grupo dele não. Os grupos
+                # entram com chave negativa (-id), junto com os nomes
+                del indice[token][MAX_POSTAGENS_POR_TOKEN:]
+                indice[token].extend(-grupo for grupo, in conexao.execute(
+                    "SELECT grupo FROM tokens_grupos WHERE token = ?", (token,)
+                ))
+        ids = {nome_id for ids_token in indice.values() for nome_id in ids_token}
+        candidatos = {
+            nome_id: (ordenado, grupo)
+            for nome_id, ordenado, grupo in _em_lotes(
+                conexao, "SELECT id, ordenado, grupo FROM nomes WHERE id IN ({})", [i for i in ids if i > 0]
+            )
+        }
+        for grupo, assinatura in _em_lotes(
+            conexao, "SELECT id, assinatura FROM grupos WHERE id IN ({})", [-i for i in ids if i < 0]
+        ):
+            candidatos[-grupo] = (" ".join(sorted(assinatura.split())), grupo)
+
+        # O thefuzz arredonda a nota para inteiro; o corte com -0.5 reproduz isso (como em agrupar_nomes)
+        corte = threshold - 0.5
+        agora = datetime.now().isoformat(timespec="seconds")
+        postagens = []
+        postagens_grupos = []
+        indexados = defaultdict(int)
+        for limpo in novos:
+            ordenado = " ".join(sorted(limpo.split()))
+            ids_nome = sorted({nome_id for token in chaves[limpo] for nome_id in indice.get(token, ())})
+            melhor = None
+            if ids_nome:
+                melhor = process.extractOne(ordenado, [candidatos[i][0] for i in ids_nome],
+                                            scorer=fuzz.ratio, score_cutoff=corte)
+            if melhor is not None:
+                grupo = candidatos[ids_nome[melhor[2]]][1]
+            else:
+                grupo = conexao.execute(
+                    "INSERT INTO grupos (representante, assinatura, criado_em) VALUES (?, ?, ?)",
+                    (originais[limpo], limpo, agora),
+                ).lastrowid
+                postagens_grupos.extend((token, grupo) for token in tokens_por_nome[limpo])
+            nome_id = conexao.execute(
+                "INSERT INTO nomes (nome, ordenado, grupo) VALUES (?, ?, ?)", (limpo, ordenado, grupo)
+            ).lastrowid
+            grupos[limpo] = grupo
+            # Os próximos nomes do lote também podem cair neste. Todo nome entra no índice, mesmo os quase
+            # iguais a um já catalogado: ele pode ser o único do grupo parecido com um nome que ainda vai chegar
+            candidatos[nome_id] = (ordenado, grupo)
+            for token in tokens_por_nome[limpo]:
+                postagens.append((token, nome_id))
+                indexados[token] += 1
+                if token in procurados:
+                    indice[token].append(nome_id)
+
+        conexao.executemany("INSERT INTO tokens (token, nome) VALUES (?, ?)", postagens)
+        conexao.executemany("INSERT INTO tokens_grupos (token, grupo) VALUES (?, ?)", postagens_grupos)
+        conexao.executemany(
+            "INSERT INTO frequencias (token, quantidade) VALUES (?, ?) "
+            "ON CONFLICT (token) DO UPDATE SET quantidade = quantidade + excluded.quantidade",
+            indexados.items(),
+        )
+        return grupos
+
+    def _coluna_dos_grupos(self, grupos, coluna):
+        ids = {grupo for grupo in grupos if grupo is not None}
+        with self._lock:
+            return dict(_em_lotes(self._conexao, f"SELECT id, {coluna} FROM grupos WHERE id IN ({{}})", ids))
+
+    def representantes(self, grupos):
+        """Nome representativo de cada id de grupo: dict id -> nome."""
+        return self._coluna_dos_grupos(grupos, "representante")
+
+    def assinaturas(self, grupos):
+        """Assinatura (nome normalizado do representante) de cada id de grupo: dict id -> assinatura."""
+        return self._coluna_dos_grupos(grupos, "assinatura")
+
+    def _da_serie(self, nomes, threshold, coluna):
+        codigos, unicos = pd.factorize(nomes, use_na_sentinel=False)
+        grupos = self.atribuir([nome if isinstance(nome, str) else "" for nome in unicos], threshold)
+        valores = self._coluna_dos_grupos(grupos, coluna)
+        por_unico = pd.Series([valores.get(grupo) for grupo in grupos], dtype=object)
+        return pd.Series(por_unico.to_numpy()[codigos], index=nomes.index)
+
+    def representantes_da_serie(self, nomes, threshold=None):
+        """Nome representativo do grupo de cada nome, numa Series alinhada a 'nomes'."""
+        return self._da_serie(nomes, threshold, "representante")
+
+    def assinaturas_da_serie(self, nomes, threshold=None):
+        """Assinatura do grupo de cada nome, numa Series alinhada a 'nomes'."""
+        return self._da_serie(nomes, threshold, "assinatura")
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
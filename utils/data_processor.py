@@ -1,14 +1,37 @@
 # utils/data_processor.py
 
 import pandas as pd
+import numpy as np
 import re
 import os
-from thefuzz import fuzz
-from thefuzz import process
+import io
+import pickle
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 
 import resultados
-
+from utils.agrupamento import agrupar_nomes
+from utils.metricas import cronometrado
+
+# Primeiro número do texto, já separado pelo formato:
+#   br      -> "1.299,90", "1.299", "49,90"  (ponto de milhar, vírgula decimal)
+#   us      -> "1,234.56", "12.5"            (vírgula de milhar, ponto decimal)
+#   inteiro -> "2"
+_PADRAO_NUMERO = (
+    r'(?P<br>\d{1,3}(?:\.\d{3})+(?:,\d+)?|\d+,\d+)(?![.,]?\d)'
+    r'|(?P<us>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+\.\d+)(?![.,]?\d)'
+    r'|(?P<inteiro>\d+)(?![.,]?\d)'
+)
+
+@cronometrado("limpar_e_converter_preco")
 def limpar_e_converter_preco(df):
+    """
+    Converte 'Preço Bruto' em 'Preço Numérico' com operações de coluna do
+    pandas, processando cada texto distinto uma única vez. Também preenche
+    'Moeda' (BRL/USD) e marca em 'Falha Preço' o que não pôde ser convertido.
+    """
     if df.empty or 'Preço Bruto' not in df.columns:
         print("Aviso: DataFrame vazio ou sem a coluna 'Preço Bruto' para limpeza.")
         df['Preço Numérico'] = None 
@@ -16,216 +39,391 @@ def limpar_e_converter_preco(df):
 
     df['Preço Bruto'] = df['Preço Bruto'].astype(str)
 
-    def _limpar_preco_individual(preco_str):
-        if not isinstance(preco_str, str): 
-            return None
+    # O histórico repete muito os mesmos textos de preço: trabalha só nos distintos
+    codigos, unicos = pd.factorize(df['Preço Bruto'], use_na_sentinel=False)
+    precos = pd.Series(unicos, dtype=object)
 
-        preco_str = preco_str.replace('R$', '').replace('US$', '').strip()
+    partes = precos.str.extract(_PADRAO_NUMERO)
+    br = partes['br'].str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    us = partes['us'].str.replace(',', '', regex=False)
+    valores = br.fillna(us).fillna(partes['inteiro']).astype(float)
 
-        if ',' in preco_str and '.' in preco_str:
-            preco_limpo = preco_str.replace('.', '').replace(',', '.')
-        elif ',' in preco_str:
-            preco_limpo = preco_str.replace(',', '.')
-        else:
-            preco_limpo = preco_str
+    moeda = pd.Series(None, index=precos.index, dtype=object)
+    moeda = moeda.mask(precos.str.contains('R$', regex=False, na=False), 'BRL')
+    moeda = moeda.mask(precos.str.contains('US$', regex=False, na=False), 'USD')
 
-        preco_limpo = re.sub(r'[^\d.]', '', preco_limpo)
-
-        try:
-            return float(preco_limpo)
-        except ValueError:
-            print(f"Não foi possível converter o preço: '{preco_str}' para numérico.")
-            return None
-
-    df['Preço Numérico'] = df['Preço Bruto'].apply(_limpar_preco_individual)
+    df['Moeda'] = moeda.to_numpy()[codigos]
+    df['Preço Numérico'] = valores.to_numpy()[codigos]
+    df['Falha Preço'] = df['Preço Numérico'].isna()
 
     return df
 
+ARQUIVO_CACHE_DADOS = os.path.join(".cache", "dados_raspados.pkl")
+
+# Último resultado por diretório, para recargas no mesmo processo nem tocarem no disco
+_cache_dados = {}
+
+def _ler_csv(filepath):
+    # Lê os bytes uma vez só e decide a codificação antes de chamar o pandas
+    with open(filepath, "rb") as f:
+        conteudo = f.read()
+    try:
+        texto = conteudo.decode("utf-8")
+    except UnicodeDecodeError:
+        texto = conteudo.decode("latin1")
+    return pd.read_csv(io.StringIO(texto))
+
+def _ler_csv_seguro(filepath):
+    try:
+        return filepath, _ler_csv(filepath), None
+    except Exception as e:
+        return filepath, None, e
+
+def _manifesto(diretorio_dados):
+    manifesto = {}
+    with os.scandir(diretorio_dados) as entradas:
+        for entrada in entradas:
+            if entrada.is_file() and entrada.name.endswith(".csv"):
+                info = entrada.stat()
+                manifesto[entrada.name] = (info.st_mtime_ns, info.st_size)
+    return manifesto
+
+def _carregar_cache_disco(caminho_cache):
+    try:
+        with open(caminho_cache, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+def _salvar_cache_disco(caminho_cache, cache):
+    os.makedirs(os.path.dirname(caminho_cache), exist_ok=True)
+    temporario = caminho_cache + ".tmp"
+    with open(temporario, "wb") as f:
+        pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, caminho_cache)
+
+@cronometrado("carregar_dados_raspados")
 def carregar_dados_raspados(diretorio_dados="data"):
-    todos_os_dfs = []
+    """
+    Junta todos os CSVs do diretório num DataFrame. Guarda um manifesto
+    (mtime e tamanho de cada arquivo) e o resultado em cache no disco, e só
+    lê de novo os arquivos novos ou alterados, em processos paralelos.
+    """
     if not os.path.exists(diretorio_dados):
         print(f"Diretório de dados '{diretorio_dados}' não encontrado.")
         return pd.DataFrame() 
 
-    for filename in os.listdir(diretorio_dados):
-        if filename.endswith(".csv"):
-            filepath = os.path.join(diretorio_dados, filename)
-            try:
-                df = pd.read_csv(filepath, encoding='utf-8')
-                todos_os_dfs.append(df)
-            except UnicodeDecodeError:
-                try:
-                    df = pd.read_csv(filepath, encoding='latin1')
-                    todos_os_dfs.append(df)
-                except Exception as e:
-                    print(f"Erro de decodificação ao carregar {filepath}: {e}")
-            except Exception as e:
-                print(f"Erro ao carregar {filepath}: {e}")
-
-    if todos_os_dfs:
-        df_consolidado = pd.concat(todos_os_dfs, ignore_index=True)
-        return df_consolidado
-    print(f"Nenhum arquivo CSV encontrado em '{diretorio_dados}'.")
-    return pd.DataFrame()
+    chave = os.path.abspath(diretorio_dados)
+    caminho_cache = os.path.join(diretorio_dados, ARQUIVO_CACHE_DADOS)
+    manifesto = _manifesto(diretorio_dados)
+
+    cache = _cache_dados.get(chave)
+    if cache is None:
+        cache = _carregar_cache_disco(caminho_cache) or {"manifesto": {}, "frames": {}, "consolidado": None}
+
+    if cache["manifesto"] == manifesto and cache["consolidado"] is not None:
+        _cache_dados[chave] = cache
+        consolidado = cache["consolidado"].copy(deep=False)
+        consolidado.attrs["versao"] = _versao_manifesto(manifesto)
+        return consolidado
+
+    frames = {nome: df for nome, df in cache["frames"].items() if cache["manifesto"].get(nome) == manifesto.get(nome)}
+    alterados = [os.path.join(diretorio_dados, nome) for nome in manifesto if nome not in frames]
+
+    if len(alterados) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(alterados), os.cpu_count() or 1)) as executor:
+            lidos = list(executor.map(_ler_csv_seguro, alterados))
+    else:
+        lidos = [_ler_csv_seguro(filepath) for filepath in alterados]
+
+    manifesto_valido = dict(manifesto)
+    for filepath, df, erro in lidos:
+        nome = os.path.basename(filepath)
+        if erro is not None:
+            print(f"Erro ao carregar {filepath}: {erro}")
+            # Fica fora do manifesto para ser tentado de novo na próxima carga
+            manifesto_valido.pop(nome, None)
+            continue
+        frames[nome] = df
+
+    if frames:
+        consolidado = pd.concat([frames[nome] for nome in sorted(frames)], ignore_index=True)
+    else:
+        print(f"Nenhum arquivo CSV encontrado em '{diretorio_dados}'.")
+        consolidado = pd.DataFrame()
+
+    cache = {"manifesto": manifesto_valido, "frames": frames, "consolidado": consolidado}
+    _cache_dados[chave] = cache
+    try:
+        _salvar_cache_disco(caminho_cache, cache)
+    except OSError as e:
+        print(f"Aviso: não foi possível salvar o cache de dados: {e}")
+    consolidado = consolidado.copy(deep=False)
+    # Identifica o conteúdo carregado (ex.: para o cache das médias do gráfico)
+    consolidado.attrs["versao"] = _versao_manifesto(manifesto_valido)
+    return consolidado
+
+TERMOS_A_REMOVER = [
+    'new', 'novo', 'em oferta', 'com', 'para',
+    'avulso', 'unidade', 'oferta', 'frete grátis',
+    'pronta entrega', 'teclado', 'iluminado', 'som',
+    'em', 'de', 'nvme', 'sata', 'm.2',
+    'diferenciada', 'promoção', 'exclusivo', 'plus'
+]
+
+# Uma única alternação pré-compilada; termos mais longos primeiro para
+# "em oferta" ganhar de "em" na mesma posição
+_PADRAO_TERMOS = re.compile(r'\b(?:' + '|'.join(sorted(TERMOS_A_REMOVER, key=len, reverse=True)) + r')\b')
+_PADRAO_UNIDADES = re.compile(r'(\d+)(tb|gb|ghz|hz|cm|mm)')
+_PADRAO_PONTUACAO = re.compile(r'[^\w\s]')
+_PADRAO_ESPACOS = re.compile(r'\s+')
+
+@lru_cache(maxsize=65536)
+def _normalizar_nome(nome):
+    nome = _PADRAO_TERMOS.sub('', nome.lower())
+    nome = _PADRAO_UNIDADES.sub(r'\1 \2', nome)
+    nome = _PADRAO_PONTUACAO.sub('', nome)
+    return _PADRAO_ESPACOS.sub(' ', nome).strip()
 
 def limpar_nome_produto(nome_produto_sujo):
     if not isinstance(nome_produto_sujo, str):
         return ""
-    
-    nome = nome_produto_sujo.lower()
-    
-    termos_a_remover = [
-        r'\bnew\b', r'\bnovo\b', r'\bem oferta\b', r'\bcom\b', r'\bpara\b',
-        r'\bavulso\b', r'\bunidade\b', r'\boferta\b', r'\bfrete grátis\b',
-        r'\bpronta entrega\b', r'\bteclado\b', r'\biluminado\b', r'\bsom\b',
-        r'\bem\b', r'\bde\b', r'\bnvme\b', r'\bsata\b', r'\bm.2\b',
-        r'\bdiferenciada\b', r'\bpromoção\b', r'\bexclusivo\b', r'\bplus\b'
-    ]
-    for termo in termos_a_remover:
-        nome = re.sub(termo, '', nome) # CORREÇÃO AQUI: era termo, não termos_a_remover
-    
-    nome = re.sub(r'(\d+)tb', r'\1 tb', nome)
-    nome = re.sub(r'(\d+)gb', r'\1 gb', nome)
-    nome = re.sub(r'(\d+)ghz', r'\1 ghz', nome)
-    nome = re.sub(r'(\d+)hz', r'\1 hz', nome)
-    nome = re.sub(r'(\d+)cm', r'\1 cm', nome)
-    nome = re.sub(r'(\d+)mm', r'\1 mm', nome)
-    
-    nome = re.sub(r'[^\w\s]', '', nome)
-    nome = re.sub(r'\s+', ' ', nome).strip()
-
-    return nome
-
-def agrupar_produtos_similares(df_limpo, threshold=80):
+    return _normalizar_nome(nome_produto_sujo)
+
+@cronometrado("limpar_nomes_serie")
+def limpar_nomes_serie(nomes):
+    """Normaliza cada nome distinto da Series uma vez só e devolve o resultado alinhado ao índice original."""
+    codigos, unicos = pd.factorize(nomes, use_na_sentinel=False)
+    limpos = np.array([limpar_nome_produto(nome) for nome in unicos], dtype=object)
+    return pd.Series(limpos[codigos], index=nomes.index)
+
+@cronometrado("agrupar_produtos_similares")
+def agrupar_produtos_similares(df_limpo, threshold=80, catalogo=None):
+    """
+    Preenche 'Grupo de Produto' com o nome representativo de cada grupo. Sem
+    'catalogo', reagrupa todos os nomes do DataFrame do zero; com um
+    CatalogoProdutos (utils/catalogo.py), os grupos ficam estáveis entre
+    execuções e só os nomes ainda desconhecidos são comparados.
+    """
     if df_limpo.empty or 'Nome do Produto' not in df_limpo.columns:
         print("Aviso: DataFrame vazio ou sem a coluna 'Nome do Produto' para agrupamento.")
         return df_limpo
 
-    df_limpo['Nome do Produto Limpo'] = df_limpo['Nome do Produto'].apply(limpar_nome_produto)
+    df_limpo['Nome do Produto Limpo'] = limpar_nomes_serie(df_limpo['Nome do Produto'])
+
+    if catalogo is not None:
+        representantes = catalogo.representantes_da_serie(df_limpo['Nome do Produto'], threshold=threshold)
+        df_limpo['Grupo de Produto'] = representantes.fillna(df_limpo['Nome do Produto Limpo'])
+        return df_limpo
 
     nomes_unicos_limpos = [n for n in df_limpo['Nome do Produto Limpo'].dropna().unique().tolist() if n]
-    
-    grupos_de_produto = []
-    nomes_processados_no_grupo = set()
+    if not nomes_unicos_limpos:
+        df_limpo['Grupo de Produto'] = df_limpo['Nome do Produto Limpo']
+        return df_limpo
 
-    for nome_principal_limpo in nomes_unicos_limpos:
-        if nome_principal_limpo in nomes_processados_no_grupo:
-            continue
-        
-        matches = process.extract(nome_principal_limpo, nomes_unicos_limpos, scorer=fuzz.token_sort_ratio)
-        current_group_members = [match[0] for match in matches if match[1] >= threshold]
-        
-        nomes_originais_do_grupo = df_limpo[df_limpo['Nome do Produto Limpo'].isin(current_group_members)]['Nome do Produto'].tolist()
-        if nomes_originais_do_grupo:
-            nome_representativo_do_grupo = max(set(nomes_originais_do_grupo), key=nomes_originais_do_grupo.count)
-        else:
-            nome_representativo_do_grupo = nome_principal_limpo
-
-        for member_name_limpo in current_group_members:
-            df_limpo.loc[df_limpo['Nome do Produto Limpo'] == member_name_limpo, 'Grupo de Produto'] = nome_representativo_do_grupo
-            nomes_processados_no_grupo.add(member_name_limpo)
-            
-    df_limpo['Grupo de Produto'] = df_limpo['Grupo de Produto'].fillna(df_limpo['Nome do Produto Limpo'])
-    return df_limpo
+    # Índice invertido para achar candidatos + matriz de similaridade em C + union-find
+    raizes = agrupar_nomes(nomes_unicos_limpos, threshold=threshold)
+    raiz_por_nome = pd.Series(raizes, index=nomes_unicos_limpos)
+    raiz = df_limpo['Nome do Produto Limpo'].map(raiz_por_nome)
 
-def gerar_grafico_linha_com_destaques(ax, df, grupo_col="Grupo de Produto", preco_col="Preço Numérico"):
-    """
-    Gera um gráfico de linha nos eixos (ax) fornecidos, com destaques.
-    ATENÇÃO: Não cria uma nova figura/eixos. Espera receber 'ax'.
-    """
-    ax.clear() # Limpa o conteúdo anterior dos eixos
+    # Nome representativo: o nome original mais frequente dentro de cada grupo
+    contagem = pd.DataFrame({'raiz': raiz, 'nome': df_limpo['Nome do Produto']}).dropna()
+    contagem = contagem.groupby(['raiz', 'nome']).size().sort_values(ascending=False)
+    representante = contagem.reset_index().drop_duplicates('raiz').set_index('raiz')['nome']
 
-    if df.empty or grupo_col not in df.columns or preco_col not in df.columns:
-        ax.text(0.5, 0.5, "DataFrame inválido ou colunas ausentes para gráfico de linha.",
-                horizontalalignment='center', verticalalignment='center',
-                transform=ax.transAxes, color='#B0B0B0', fontsize=12)
-        ax.set_xticks([])
-        ax.set_yticks([])
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['bottom'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        ax.set_title("") # Limpa o título se não houver dados
-        return
+    df_limpo['Grupo de Produto'] = raiz.map(representante)
+    df_limpo['Grupo de Produto'] = df_limpo['Grupo de Produto'].fillna(df_limpo['Nome do Produto Limpo'])
+    return df_limpo
 
-    # Certifica-se de que a coluna de preço é numérica
-    df[preco_col] = pd.to_numeric(df[preco_col], errors='coerce')
-    df = df.dropna(subset=[preco_col]) # Remove NAs após conversão
-
-    if df.empty:
-        ax.text(0.5, 0.5, "Nenhum dado numérico válido para exibir no gráfico de linha.",
-                horizontalalignment='center', verticalalignment='center',
-                transform=ax.transAxes, color='#B0B0B0', fontsize=12)
-        ax.set_xticks([])
-        ax.set_yticks([])
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['bottom'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        ax.set_title("")
-        return
+LIMITE_GRUPOS_GRAFICO = 40
+MAX_MEDIAS_EM_CACHE = 8
 
-    media_por_grupo = df.groupby(grupo_col)[preco_col].mean().sort_values()
+# Médias por grupo já calculadas, por (versão dos dados, coluna do grupo, coluna do preço)
+_cache_medias = OrderedDict()
 
-    if media_por_grupo.empty:
-        ax.text(0.5, 0.5, "Nenhum dado válido para exibir no gráfico de linha após agrupamento.",
-                horizontalalignment='center', verticalalignment='center',
-                transform=ax.transAxes, color='#B0B0B0', fontsize=12)
-        ax.set_xticks([])
-        ax.set_yticks([])
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['bottom'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        ax.set_title("")
-        return
+def _versao_manifesto(manifesto):
+    return hashlib.sha1(repr(sorted(manifesto.items())).encode("utf-8")).hexdigest()
 
-    # Plotagem
-    # media_por_grupo.plot(kind="line", marker="o", ax=ax, color="#007BFF") # ORIGINAL - removido
+def _media_por_grupo(df, grupo_col, preco_col, versao):
+    chave = None if versao is None else (versao, grupo_col, preco_col)
+    if chave is not None and chave in _cache_medias:
+        _cache_medias.move_to_end(chave)
+        return _cache_medias[chave]
 
-    # --- CORREÇÃO AQUI: Usar ax.plot() explicitamente com x e y para garantir categórico ---
-    x_labels = media_por_grupo.index.astype(str) # Garante que os rótulos do eixo X são strings
-    y_values = media_por_grupo.values # Os valores de preço
-    
-    ax.plot(x_labels, y_values, marker="o", color="#007BFF") # Plotar no ax
-    # --- FIM DA CORREÇÃO ---
+    # Converte numa Series à parte: o DataFrame de quem chamou não é alterado
+    precos = pd.to_numeric(df[preco_col], errors='coerce')
+    media_por_grupo = precos.groupby(df[grupo_col]).mean().dropna().sort_values()
+    media_por_grupo.index = media_por_grupo.index.astype(str)
 
+    if chave is not None:
+        _cache_medias[chave] = media_por_grupo
+        while len(_cache_medias) > MAX_MEDIAS_EM_CACHE:
+            _cache_medias.popitem(last=False)
+    return media_por_grupo
 
-    # Destaques
-    mais_barato = media_por_grupo.idxmin()
-    mais_caro = media_por_grupo.idxmax()
+def _selecionar_grupos(media_por_grupo, limite):
+    """Com muitos grupos, fica só com os mais baratos, os mais caros e o mais próximo da média geral."""
     media_geral = media_por_grupo.mean()
-    mais_proximo_media = (media_por_grupo - media_geral).abs().idxmin()
-
-    # Adicionar anotações para os destaques
-    ax.annotate(f'Min: R${media_por_grupo[mais_barato]:.2f}', 
-                xy=(mais_barato, media_por_grupo[mais_barato]), # x,y do ponto
-                xytext=(-15, 15), textcoords='offset points', # Deslocamento do texto
-                arrowprops=dict(facecolor='green', shrink=0.05), fontsize=9, color='green')
-    ax.annotate(f'Max: R${media_por_grupo[mais_caro]:.2f}', 
-                xy=(mais_caro, media_por_grupo[mais_caro]), 
-                xytext=(15, -15), textcoords='offset points', 
-                arrowprops=dict(facecolor='red', shrink=0.05), fontsize=9, color='red')
-    
-    # Linha para a média geral
-    ax.axhline(media_geral, color='gray', linestyle='--', linewidth=0.8, label=f'Média Geral: R${media_geral:.2f}')
-    ax.legend(facecolor='#3A3A3A', edgecolor='#4A4A4A', labelcolor='#E0E0E0') # Estilo para a legenda
+    posicao_media = int(np.abs(media_por_grupo.to_numpy() - media_geral).argmin())
+    if len(media_por_grupo) <= limite:
+        return media_por_grupo, media_geral, posicao_media
+
+    baratos = limite // 2
+    caros = limite - baratos
+    posicoes = sorted(set(range(baratos)) | set(range(len(media_por_grupo) - caros, len(media_por_grupo))) | {posicao_media})
+    selecionados = media_por_grupo.iloc[posicoes]
+    return selecionados, media_geral, posicoes.index(posicao_media)
+
+def _mensagem_sem_dados(ax, texto):
+    _descartar_estado(ax)
+    ax.clear()
+    ax.text(0.5, 0.5, texto,
+            horizontalalignment='center', verticalalignment='center',
+            transform=ax.transAxes, color='#B0B0B0', fontsize=12)
+    ax.set_xticks([])
+    ax.set_yticks([])
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['bottom'].set_visible(False)
+    ax.spines['left'].set_visible(False)
+    ax.set_title("") # Limpa o título se não houver dados
+
+def _descartar_estado(ax):
+    estado = getattr(ax, "_estado_grafico_linha", None)
+    if estado is not None and estado["conexao"] is not None:
+        ax.figure.canvas.mpl_disconnect(estado["conexao"])
+    ax._estado_grafico_linha = None
+
+def _desenhar_animados(ax, estado):
+    for artista in (estado["media"], estado["linha"], estado["min"], estado["max"], estado["legenda"]):
+        if artista is not None:
+            ax.draw_artist(artista)
+
+def _montar_grafico(ax):
+    """Cria os artistas uma vez só; as próximas chamadas só trocam os dados deles."""
+    _descartar_estado(ax)
+    ax.clear()
+
+    # Artistas 'animated' ficam fora do fundo salvo e são redesenhados por cima dele (blitting)
+    linha, = ax.plot([], [], marker="o", color="#007BFF", animated=True)
+    anotacao_min = ax.annotate('', xy=(0, 0), xytext=(-15, 15), textcoords='offset points',
+                               arrowprops=dict(facecolor='green', shrink=0.05), fontsize=9, color='green',
+                               animated=True)
+    anotacao_max = ax.annotate('', xy=(0, 0), xytext=(15, -15), textcoords='offset points',
+                               arrowprops=dict(facecolor='red', shrink=0.05), fontsize=9, color='red',
+                               animated=True)
+    linha_media = ax.axhline(0, color='gray', linestyle='--', linewidth=0.8, animated=True)
 
     # Estilo do gráfico
-    ax.set_title("Preço Médio por Grupo de Produto (Linha)", color='#E0E0E0', fontsize=12)
     ax.set_ylabel("Preço (R$)", color='#B0B0B0')
     ax.set_xlabel("Grupo de Produto", color='#B0B0B0')
-    
-    # CORREÇÃO: Assegura que os labels do eixo X são rotacionados e visíveis
-    ax.set_xticks(range(len(x_labels))) # Define os ticks numéricos
-    ax.set_xticklabels(x_labels, rotation=45, ha='right', fontsize=10) # Define os labels textuais
-
     ax.tick_params(axis='x', colors='#B0B0B0')
     ax.tick_params(axis='y', colors='#B0B0B0')
-
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
     ax.spines['bottom'].set_color('#4A4A4A')
     ax.spines['left'].set_color('#4A4A4A')
-    
-    return
\ No newline at end of file
+
+    estado = {
+        "linha": linha, "min": anotacao_min, "max": anotacao_max, "media": linha_media,
+        "legenda": None, "fundo": None, "rotulos": None, "assinatura": None, "conexao": None,
+    }
+    canvas = ax.figure.canvas
+    if getattr(canvas, "supports_blit", False):
+        def _ao_desenhar(evento):
+            # Depois de cada desenho completo guarda o fundo e põe os artistas animados por cima.
+            # Num savefig a figura é desenhada por outro canvas (SVG, PDF...), sem blitting, ou
+            # desenha os artistas animados junto com o resto: não há fundo para guardar
+            if evento.canvas is not canvas or canvas.is_saving():
+                return
+            estado["fundo"] = canvas.copy_from_bbox(ax.bbox)
+            _desenhar_animados(ax, estado)
+        estado["conexao"] = canvas.mpl_connect("draw_event", _ao_desenhar)
+    ax._estado_grafico_linha = estado
+    return estado
+
+@cronometrado("gerar_grafico_linha")
+def gerar_grafico_linha_com_destaques(ax, df, grupo_col="Grupo de Produto", preco_col="Preço Numérico",
+                                      limite_grupos=LIMITE_GRUPOS_GRAFICO, versao=None):
+    """
+    Gera um gráfico de linha nos eixos (ax) fornecidos, com destaques.
+    ATENÇÃO: Não cria uma nova figura/eixos. Espera receber 'ax'.
+    Não altera o DataFrame. Com 'versao' (qualquer valor que mude quando os
+    dados mudam, ex.: df.attrs["versao"] de carregar_dados_raspados junto
+    com o threshold do agrupamento), as médias por grupo ficam em cache.
+    Mostra no máximo 'limite_grupos' grupos: os extremos de preço e o mais
+    próximo da média. Chamadas seguintes no mesmo 'ax' só atualizam os dados
+    e, quando os eixos não mudam, redesenham por blitting.
+    """
+    if df.empty or grupo_col not in df.columns or preco_col not in df.columns:
+        _mensagem_sem_dados(ax, "DataFrame inválido ou colunas ausentes para gráfico de linha.")
+        return
+
+    estado = getattr(ax, "_estado_grafico_linha", None)
+    assinatura = None if versao is None else (versao, grupo_col, preco_col, limite_grupos)
+    if estado is not None and estado["linha"] in ax.lines and assinatura is not None and estado["assinatura"] == assinatura:
+        return # Mesmos dados já desenhados
+
+    media_por_grupo = _media_por_grupo(df, grupo_col, preco_col, versao)
+    if media_por_grupo.empty:
+        _mensagem_sem_dados(ax, "Nenhum dado numérico válido para exibir no gráfico de linha.")
+        return
+
+    if estado is None or estado["linha"] not in ax.lines:
+        estado = _montar_grafico(ax)
+    estado["assinatura"] = assinatura
+
+    selecionados, media_geral, posicao_media = _selecionar_grupos(media_por_grupo, limite_grupos)
+    x = np.arange(len(selecionados))
+    y = selecionados.to_numpy()
+    desenho_completo = estado["fundo"] is None
+
+    estado["linha"].set_data(x, y)
+    estado["media"].set_ydata([media_geral, media_geral])
+    estado["media"].set_label(f'Média Geral: R${media_geral:.2f}')
+    # Os grupos vêm ordenados por preço: o mais barato é o primeiro e o mais caro, o último
+    estado["min"].xy = (x[0], y[0])
+    estado["min"].set_text(f'Min: R${y[0]:.2f}')
+    estado["max"].xy = (x[-1], y[-1])
+    estado["max"].set_text(f'Max: R${y[-1]:.2f}')
+
+    if estado["legenda"] is None:
+        estado["legenda"] = ax.legend(facecolor='#3A3A3A', edgecolor='#4A4A4A', labelcolor='#E0E0E0') # Estilo para a legenda
+        estado["legenda"].set_animated(True)
+    else:
+        estado["legenda"].get_texts()[0].set_text(estado["media"].get_label())
+
+    # Rótulos, título e limites fazem parte do fundo: se mudarem, o desenho tem de ser completo
+    rotulos = tuple(selecionados.index)
+    if rotulos != estado["rotulos"]:
+        estado["rotulos"] = rotulos
+        ax.set_xticks(x)
+        ax.set_xticklabels(rotulos, rotation=45, ha='right', fontsize=10)
+        desenho_completo = True
+
+    titulo = "Preço Médio por Grupo de Produto (Linha)"
+    if len(selecionados) < len(media_por_grupo):
+        titulo += f" - {len(selecionados)} de {len(media_por_grupo)} grupos"
+    if ax.get_title() != titulo:
+        ax.set_title(titulo, color='#E0E0E0', fontsize=12)
+        desenho_completo = True
+
+    if tuple(ax.get_xlim()) != (-0.5, len(x) - 0.5):
+        ax.set_xlim(-0.5, len(x) - 0.5)
+        desenho_completo = True
+
+    # O eixo Y só muda quando os dados saem dele ou passam a ocupar menos da metade dele
+    minimo, maximo = min(y.min(), media_geral), max(y.max(), media_geral)
+    baixo, alto = ax.get_ylim()
+    if minimo < baixo or maximo > alto or (maximo - minimo) < (alto - baixo) / 2:
+        margem = (maximo - minimo) * 0.1 or abs(maximo) * 0.1 or 1
+        ax.set_ylim(minimo - margem, maximo + margem)
+        desenho_completo = True
+
+    canvas = ax.figure.canvas
+    if desenho_completo or estado["conexao"] is None:
+        canvas.draw_idle()
+    else:
+        canvas.restore_region(estado["fundo"])
+        _desenhar_animados(ax, estado)
+        canvas.blit(ax.bbox)
@@ -0,0 +1,389 @@
+# utils/fila.py
+#
+# Fila durável de trabalhos de raspagem para vários processos (e máquinas):
+# o coordenador enfileira (loja, termo, páginas) e cada trabalhador reserva um
+# trabalho por vez com um lease. Enquanto raspa, o trabalhador renova o lease
+# (batimento); se ele morrer, o lease expira e o trabalho volta para a fila.
+# A entrega é "pelo menos uma vez": uma busca pode rodar de novo, nunca se perde.
+#
+# Dois backends com a mesma interface:
+#   FilaSQLite - padrão, um arquivo (data/fila.db) para processos da mesma máquina
+#   FilaRedis  - para trabalhadores em várias máquinas; aceita qualquer cliente
+#                compatível com o redis-py (ex.: fakeredis como substituto local)
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+from utils.produto import Produto
+
+CAMINHO_FILA = os.environ.get("PRICEWATCHER_FILA", os.path.join("data", "fila.db"))
+
+# Segundos que um trabalho fica reservado sem batimento antes de voltar para a fila
+DURACAO_LEASE = 120
+# Tentativas (reservas) de um trabalho antes de ele ser dado como falho
+MAX_TENTATIVAS = 3
+
+PENDENTE = "pendente"
+EM_ANDAMENTO = "em_andamento"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabalhos (
+    id INTEGER PRIMARY KEY,
+    lote TEXT,
+    loja TEXT NOT NULL,
+    termo TEXT NOT NULL,
+    paginas TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendente',
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    trabalhador TEXT,
+    lease_ate REAL,
+    resultado TEXT,
+    erro TEXT,
+    coletado INTEGER NOT NULL DEFAULT 0,
+    criado_em TEXT NOT NULL,
+    atualizado_em TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_trabalhos_estado ON trabalhos (estado, id);
+CREATE INDEX IF NOT EXISTS idx_trabalhos_lote ON trabalhos (lote, coletado, estado);
+"""
+
+
+def _agora_iso():
+    return datetime.now().isoformat(timespec="seconds")
+
+def _para_json(resultados):
+    return json.dumps([dict(item) for item in resultados], ensure_ascii=False)
+
+def _de_json(texto):
+    return [Produto.de_dict(item) for item in json.loads(texto)] if texto else []
+
+
+class FilaSQLite:
+    """
+    Fila em SQLite (modo WAL). A reserva roda numa transação BEGIN IMMEDIATE,
+    então dois processos nunca pegam o mesmo trabalho. Serve para vários
+    processos na mesma máquina; entre máquinas, use a FilaRedis.
+    """
+
+    def __init__(self, caminho=CAMINHO_FILA, duracao_lease=DURACAO_LEASE, max_tentativas=MAX_TENTATIVAS):
+        pasta = os.path.dirname(caminho)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        self.caminho = caminho
+        self.duracao_lease = duracao_lease
+        self.max_tentativas = max_tentativas
+        self._lock = threading.Lock()
+        # isolation_level=None: as transações são abertas à mão (BEGIN IMMEDIATE)
+        self._conexao = sqlite3.connect(caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.executescript(_ESQUEMA)
+
+    def _transacao(self, operacao):
+        with self._lock:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = operacao(self._conexao)
+            except BaseException:
+                self._conexao.execute("ROLLBACK")
+                raise
+            self._conexao.execute("COMMIT")
+            return resultado
+
+    def enfileirar(self, trabalhos, lote=None):
+        """'trabalhos': lista de (loja, termo, paginas). Retorna os ids criados."""
+        agora = _agora_iso()
+
+        def _inserir(conexao):
+            ids = []
+            for loja, termo, paginas in trabalhos:
+                cursor = conexao.execute(
+                    "INSERT INTO trabalhos (lote, loja, termo, paginas, criado_em) VALUES (?, ?, ?, ?, ?)",
+                    (lote, loja, termo, json.dumps(list(paginas)), agora),
+                )
+                ids.append(cursor.lastrowid)
+            return ids
+        return self._transacao(_inserir)
+
+    def _recolocar_expirados(self, conexao, agora):
+        conexao.execute(
+            "UPDATE trabalhos SET estado = ?, erro = 'lease expirado', atualizado_em = ? "
+            "WHERE estado = ? AND lease_ate < ? AND tentativas >= ?",
+            (FALHOU, _agora_iso(), EM_ANDAMENTO, agora, self.max_tentativas),
+        )
+        conexao.execute(
+            "UPDATE trabalhos SET estado = ?, trabalhador = NULL, lease_ate = NULL "
+            "WHERE estado = ? AND lease_ate < ?",
+            (PENDENTE, EM_ANDAMENTO, agora),
+        )
+
+    def reservar(self, trabalhador):
+        """Reserva o trabalho pendente mais antigo. Retorna um dict ou None se a fila estiver vazia."""
+        def _reservar(conexao):
+            agora = time.time()
+            self._recolocar_expirados(conexao, agora)
+            linha = conexao.execute(
+                "SELECT id, lote, loja, termo, paginas, tentativas FROM trabalhos "
+                "WHERE estado = ? ORDER BY id LIMIT 1", (PENDENTE,)
+            ).fetchone()
+            if linha is None:
+                return None
+            conexao.execute(
+                "UPDATE trabalhos SET estado = ?, trabalhador = ?, lease_ate = ?, tentativas = tentativas + 1, "
+                "atualizado_em = ? WHERE id = ?",
+                (EM_ANDAMENTO, trabalhador, agora + self.duracao_lease, _agora_iso(), linha[0]),
+            )
+            id_, lote, loja, termo, paginas, tentativas = linha
+            return {"id": id_, "lote": lote, "loja": loja, "termo": termo,
+                    "paginas": json.loads(paginas), "tentativas": tentativas + 1}
+        return self._transacao(_reservar)
+
+    def _do_trabalhador(self, conexao, id_, trabalhador):
+        linha = conexao.execute(
+            "SELECT tentativas FROM trabalhos WHERE id = ? AND estado = ? AND trabalhador = ?",
+            (id_, EM_ANDAMENTO, trabalhador),
+        ).fetchone()
+        return None if linha is None else linha[0]
+
+    def renovar(self, id_, trabalhador):
+        """Batimento: estende o lease. False se o trabalho não é mais deste trabalhador."""
+        with self._lock:
+            cursor = self._conexao.execute(
+                "UPDATE trabalhos SET lease_ate = ? WHERE id = ? AND estado = ? AND trabalhador = ?",
+                (time.time() + self.duracao_lease, id_, EM_ANDAMENTO, trabalhador),
+            )
+            return cursor.rowcount == 1
+
+    def concluir(self, id_, trabalhador, resultados):
+        """Grava os resultados. False se o lease foi perdido (o trabalho já voltou para a fila)."""
+        corpo = _para_json(resultados)
+        with self._lock:
+            cursor = self._conexao.execute(
+                "UPDATE trabalhos SET estado = ?, resultado = ?, erro = NULL, lease_ate = NULL, atualizado_em = ? "
+                "WHERE id = ? AND estado = ? AND trabalhador = ?",
+                (CONCLUIDO, corpo, _agora_iso(), id_, EM_ANDAMENTO, trabalhador),
+            )
+            return cursor.rowcount == 1
+
+    def falhar(self, id_, trabalhador, erro):
+        """Devolve o trabalho para a fila, ou o marca como falho depois de MAX_TENTATIVAS."""
+        def _falhar(conexao):
+            tentativas = self._do_trabalhador(conexao, id_, trabalhador)
+            if tentativas is None:
+                return False
+            estado = FALHOU if tentativas >= self.max_tentativas else PENDENTE
+            conexao.execute(
+                "UPDATE trabalhos SET estado = ?, erro = ?, trabalhador = NULL, lease_ate = NULL, atualizado_em = ? "
+                "WHERE id = ?",
+                (estado, str(erro), _agora_iso(), id_),
+            )
+            return True
+        return self._transacao(_falhar)
+
+    def coletar(self, lote=None):
+        """Trabalhos do lote (ou sem lote) concluídos ou falhos e ainda não coletados."""
+        def _coletar(conexao):
+            # Também aqui, não só em reservar: sem nenhum trabalhador vivo, os leases vencidos
+            # ainda chegam a MAX_TENTATIVAS e aparecem como falhos para o coordenador
+            self._recolocar_expirados(conexao, time.time())
+            linhas = conexao.execute(
+                "SELECT id, lote, loja, termo, paginas, estado, tentativas, resultado, erro FROM trabalhos "
+                "WHERE lote IS ? AND coletado = 0 AND estado IN (?, ?) ORDER BY id", (lote, CONCLUIDO, FALHOU)
+            ).fetchall()
+            conexao.executemany("UPDATE trabalhos SET coletado = 1 WHERE id = ?", [(linha[0],) for linha in linhas])
+            return [
+                {"id": id_, "lote": lote_, "loja": loja, "termo": termo, "paginas": json.loads(paginas),
+                 "estado": estado, "tentativas": tentativas,
+                 "resultados": _de_json(resultado), "erro": erro}
+                for id_, lote_, loja, termo, paginas, estado, tentativas, resultado, erro in linhas
+            ]
+        return self._transacao(_coletar)
+
+    def contagem(self):
+        """Quantos trabalhos há em cada estado."""
+        with self._lock:
+            contagem = dict.fromkeys((PENDENTE, EM_ANDAMENTO, CONCLUIDO, FALHOU), 0)
+            contagem.update(self._conexao.execute("SELECT estado, COUNT(*) FROM trabalhos GROUP BY estado"))
+            return contagem
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+
+def _texto(valor):
+    return valor.decode("utf-8") if isinstance(valor, bytes) else valor
+
+
+class FilaRedis:
+    """
+    Mesma fila sobre Redis, para trabalhadores em várias máquinas. Os
+    pendentes ficam numa lista, os leases num sorted set (id -> prazo) e cada
+    trabalho num hash; reserva e conclusão são transações WATCH/MULTI.
+    'cliente' pode ser qualquer objeto compatível com o redis-py.
+    """
+
+    def __init__(self, url=None, cliente=None, prefixo="pricewatcher:fila",
+                 duracao_lease=DURACAO_LEASE, max_tentativas=MAX_TENTATIVAS):
+        if cliente is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError("A fila em Redis precisa do pacote 'redis' (pip install redis).") from e
+            cliente = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.cliente = cliente
+        self.prefixo = prefixo
+        self.duracao_lease = duracao_lease
+        self.max_tentativas = max_tentativas
+        self._pendentes = f"{prefixo}:pendentes"
+        self._leases = f"{prefixo}:leases"
+        self._totais = f"{prefixo}:totais"
+
+    def _chave(self, id_):
+        return f"{self.prefixo}:trabalho:{id_}"
+
+    def _finalizados(self, lote):
+        return f"{self.prefixo}:finalizados:{lote or ''}"
+
+    def enfileirar(self, trabalhos, lote=None):
+        trabalhos = list(trabalhos)
+        if not trabalhos:
+            return []
+        agora = _agora_iso()
+        ultimo = int(self.cliente.incrby(f"{self.prefixo}:sequencia", len(trabalhos)))
+        ids = list(range(ultimo - len(trabalhos) + 1, ultimo + 1))
+        pipe = self.cliente.pipeline()
+        for id_, (loja, termo, paginas) in zip(ids, trabalhos):
+            pipe.hset(self._chave(id_), mapping={
+                "lote": lote or "", "loja": loja, "termo": termo, "paginas": json.dumps(list(paginas)),
+                "estado": PENDENTE, "tentativas": 0, "criado_em": agora,
+            })
+            pipe.lpush(self._pendentes, id_)
+        pipe.execute()
+        return ids
+
+    def _ler(self, id_):
+        dados = {_texto(chave): _texto(valor) for chave, valor in self.cliente.hgetall(self._chave(id_)).items()}
+        return {
+            "id": int(id_), "lote": dados.get("lote") or None, "loja": dados.get("loja"),
+            "termo": dados.get("termo"), "paginas": json.loads(dados.get("paginas", "[]")),
+            "estado": dados.get("estado"), "tentativas": int(dados.get("tentativas", 0)),
+            "resultados": _de_json(dados.get("resultado")),
+            "erro": dados.get("erro"),
+        }
+
+    def _finalizar(self, pipe, id_, lote, estado, campos):
+        pipe.hset(self._chave(id_), mapping={"estado": estado, "atualizado_em": _agora_iso(), **campos})
+        pipe.hdel(self._chave(id_), "trabalhador")
+        pipe.zrem(self._leases, id_)
+        pipe.lpush(self._finalizados(lote), id_)
+        pipe.hincrby(self._totais, estado, 1)
+
+    def _recolocar_expirados(self):
+        for id_ in self.cliente.zrangebyscore(self._leases, "-inf", time.time()):
+            id_ = _texto(id_)
+
+            def _recolocar(pipe, id_=id_):
+                prazo = pipe.zscore(self._leases, id_)
+                if prazo is None or prazo >= time.time():
+                    return
+                tentativas = int(pipe.hget(self._chave(id_), "tentativas") or 0)
+                lote = _texto(pipe.hget(self._chave(id_), "lote"))
+                pipe.multi()
+                if tentativas >= self.max_tentativas:
+                    self._finalizar(pipe, id_, lote, FALHOU, {"erro": "lease expirado"})
+                else:
+                    pipe.hset(self._chave(id_), "estado", PENDENTE)
+                    pipe.hdel(self._chave(id_), "trabalhador")
+                    pipe.zrem(self._leases, id_)
+                    pipe.rpush(self._pendentes, id_)
+            self.cliente.transaction(_recolocar, self._leases, self._chave(id_))
+
+    def reservar(self, trabalhador):
+        self._recolocar_expirados()
+
+        def _reservar(pipe):
+            ultimo = pipe.lrange(self._pendentes, -1, -1)
+            if not ultimo:
+                return None
+            id_ = _texto(ultimo[0])
+            pipe.multi()
+            pipe.rpop(self._pendentes)
+            pipe.hset(self._chave(id_), mapping={"estado": EM_ANDAMENTO, "trabalhador": trabalhador,
+                                                 "atualizado_em": _agora_iso()})
+            pipe.hincrby(self._chave(id_), "tentativas", 1)
+            pipe.zadd(self._leases, {id_: time.time() + self.duracao_lease})
+            return id_
+        id_ = self.cliente.transaction(_reservar, self._pendentes, value_from_callable=True)
+        if id_ is None:
+            return None
+        trabalho = self._ler(id_)
+        del trabalho["estado"], trabalho["resultados"], trabalho["erro"]
+        return trabalho
+
+    def _como_dono(self, id_, trabalhador, operacao):
+        # Executa 'operacao(pipe, dados)' só se o trabalho ainda estiver com este trabalhador
+        chave = self._chave(id_)
+
+        def _transacao(pipe):
+            dados = {_texto(c): _texto(v) for c, v in pipe.hgetall(chave).items()}
+            if dados.get("estado") != EM_ANDAMENTO or dados.get("trabalhador") != trabalhador:
+                return False
+            pipe.multi()
+            operacao(pipe, dados)
+            return True
+        return self.cliente.transaction(_transacao, chave, value_from_callable=True)
+
+    def renovar(self, id_, trabalhador):
+        return self._como_dono(id_, trabalhador, lambda pipe, dados: pipe.zadd(
+            self._leases, {id_: time.time() + self.duracao_lease}))
+
+    def concluir(self, id_, trabalhador, resultados):
+        corpo = _para_json(resultados)
+        return self._como_dono(id_, trabalhador, lambda pipe, dados: self._finalizar(
+            pipe, id_, dados.get("lote"), CONCLUIDO, {"resultado": corpo}))
+
+    def falhar(self, id_, trabalhador, erro):
+        def _falhar(pipe, dados):
+            if int(dados.get("tentativas", 0)) >= self.max_tentativas:
+                self._finalizar(pipe, id_, dados.get("lote"), FALHOU, {"erro": str(erro)})
+            else:
+                pipe.hset(self._chave(id_), mapping={"estado": PENDENTE, "erro": str(erro)})
+                pipe.hdel(self._chave(id_), "trabalhador")
+                pipe.zrem(self._leases, id_)
+                pipe.lpush(self._pendentes, id_)
+        return self._como_dono(id_, trabalhador, _falhar)
+
+    def coletar(self, lote=None):
+        self._recolocar_expirados()
+        trabalhos = []
+        while True:
+            id_ = self.cliente.rpop(self._finalizados(lote))
+            if id_ is None:
+                return trabalhos
+            trabalhos.append(self._ler(_texto(id_)))
+
+    def contagem(self):
+        totais = {_texto(c): int(v) for c, v in self.cliente.hgetall(self._totais).items()}
+        return {
+            PENDENTE: self.cliente.llen(self._pendentes),
+            EM_ANDAMENTO: self.cliente.zcard(self._leases),
+            CONCLUIDO: totais.get(CONCLUIDO, 0),
+            FALHOU: totais.get(FALHOU, 0),
+        }
+
+    def fechar(self):
+        self.cliente.close()
+
+
+def abrir_fila(endereco=CAMINHO_FILA, **opcoes):
+    """'redis://...' abre a FilaRedis; qualquer outro valor é o caminho do arquivo SQLite."""
+    if endereco.startswith(("redis://", "rediss://", "unix://")):
+        return FilaRedis(url=endereco, **opcoes)
+    return FilaSQLite(endereco, **opcoes)
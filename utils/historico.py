@@ -0,0 +1,115 @@
+# utils/historico.py
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+import pandas as pd
+
+from utils.data_processor import limpar_e_converter_preco, limpar_nomes_serie
+from utils.catalogo import CatalogoProdutos
+from utils.produto import para_dataframe
+
+CAMINHO_HISTORICO = os.path.join("data", "historico_precos.db")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS precos (
+    id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    grupo TEXT NOT NULL,
+    nome TEXT,
+    link TEXT,
+    termo TEXT,
+    preco_bruto TEXT,
+    preco REAL,
+    moeda TEXT,
+    coletado_em TEXT NOT NULL,
+    hora_scraping TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_precos_site_grupo_data ON precos (site, grupo, coletado_em);
+CREATE INDEX IF NOT EXISTS idx_precos_grupo_data ON precos (grupo, coletado_em);
+"""
+
+_COLUNAS = ("site", "grupo", "nome", "link", "termo", "preco_bruto", "preco", "moeda", "coletado_em", "hora_scraping")
+
+
+class HistoricoPrecos:
+    """
+    Histórico de preços em SQLite (modo WAL), só com inserções. Cada busca
+    é gravada em lote numa única transação, e as consultas por loja/grupo/
+    período usam os índices em vez de varrer a tabela. O grupo gravado é a
+    assinatura do grupo no CatalogoProdutos (utils/catalogo.py), então as
+    variações de nome de um mesmo produto ficam no mesmo grupo entre buscas,
+    seja qual for o programa que gravou. Sem 'catalogo', abre o catalogo.db
+    da mesma pasta do histórico.
+    """
+
+    def __init__(self, caminho=CAMINHO_HISTORICO, catalogo=None):
+        pasta = os.path.dirname(caminho)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        self.caminho = caminho
+        self._fechar_catalogo = catalogo is None
+        self.catalogo = CatalogoProdutos(os.path.join(pasta, "catalogo.db")) if catalogo is None else catalogo
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.executescript(_ESQUEMA)
+
+    def adicionar(self, registros, termo=None, coletado_em=None):
+        """Grava os registros raspados (Produto dos scrapers ou dicts). Retorna quantos foram gravados."""
+        if not registros:
+            return 0
+        coletado_em = (coletado_em or datetime.now()).isoformat(timespec="seconds")
+
+        df = para_dataframe(registros)
+        # Registros que vêm do pipeline (scrapers/pipeline.py) já chegam normalizados
+        if "Preço Numérico" not in df.columns:
+            df = limpar_e_converter_preco(df)
+        if "Link do Produto" not in df.columns:
+            df["Link do Produto"] = None
+        if "Data do Scraping" not in df.columns:
+            df["Data do Scraping"] = None
+        if "Nome Normalizado" in df.columns:
+            grupos = df["Nome Normalizado"]
+        else:
+            grupos = limpar_nomes_serie(df["Nome do Produto"])
+        grupos = self.catalogo.assinaturas_da_serie(df["Nome do Produto"]).fillna(grupos)
+
+        linhas = pd.DataFrame({
+            "site": df["Site"],
+            "grupo": grupos,
+            "nome": df["Nome do Produto"],
+            "link": df["Link do Produto"],
+            "termo": termo,
+            "preco_bruto": df["Preço Bruto"],
+            "preco": df["Preço Numérico"],
+            "moeda": df["Moeda"],
+            "coletado_em": coletado_em,
+            "hora_scraping": df["Data do Scraping"],
+        }, columns=_COLUNAS)
+        linhas = linhas.astype(object).where(linhas.notna(), None)
+
+        sql = f"INSERT INTO precos ({', '.join(_COLUNAS)}) VALUES ({', '.join('?' * len(_COLUNAS))})"
+        with self._lock, self._conexao:
+            self._conexao.executemany(sql, linhas.itertuples(index=False, name=None))
+        return len(linhas)
+
+    def consultar(self, grupo, dias=30, site=None):
+        """Preços de um grupo de produto nos últimos 'dias' dias (opcionalmente de uma loja só)."""
+        desde = (datetime.now() - timedelta(days=dias)).isoformat(timespec="seconds")
+        sql = "SELECT * FROM precos WHERE grupo = ? AND coletado_em >= ?"
+        parametros = [grupo, desde]
+        if site is not None:
+            sql += " AND site = ?"
+            parametros.append(site)
+        sql += " ORDER BY coletado_em"
+        with self._lock:
+            return pd.read_sql_query(sql, self._conexao, params=parametros)
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+        if self._fechar_catalogo:
+            self.catalogo.fechar()
@@ -0,0 +1,206 @@
+# utils/metricas.py
+#
+# Instrumentação leve: spans (duração de cada etapa), contadores e
+# observações (ex.: itens por página). Exporta em JSON (um evento por linha)
+# e no formato texto do Prometheus (endpoint /metrics do app_site.py).
+#
+# Desligada por padrão; liga com PRICEWATCHER_METRICAS=1 ou ativar(). Com ela
+# desligada, span() devolve sempre o mesmo contexto vazio e contar()/observar()
+# retornam na primeira linha.
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+
+_ativas = os.environ.get("PRICEWATCHER_METRICAS", "0") == "1"
+ARQUIVO_LOG = os.environ.get("PRICEWATCHER_METRICAS_LOG", os.path.join("data", "metricas.jsonl"))
+
+PREFIXO = "pricewatcher"
+LIMITES_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_SPAN_NULO = nullcontext()
+
+
+class _Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.baldes = [0] * len(limites)
+        self.soma = 0.0
+        self.quantidade = 0
+
+    def observar(self, valor):
+        self.soma += valor
+        self.quantidade += 1
+        for i, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.baldes[i] += 1
+                break
+
+
+class Registro:
+    """Guarda contadores, histogramas de duração e resumos (soma/quantidade) por nome e rótulos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.contadores = {}
+        self.duracoes = {}
+        self.resumos = {}
+        self._arquivo = None
+
+    def contar(self, nome, valor, rotulos):
+        chave = (nome, rotulos)
+        with self._lock:
+            self.contadores[chave] = self.contadores.get(chave, 0) + valor
+
+    def observar(self, nome, valor, rotulos):
+        chave = (nome, rotulos)
+        with self._lock:
+            resumo = self.resumos.setdefault(chave, [0.0, 0])
+            resumo[0] += valor
+            resumo[1] += 1
+
+    def duracao(self, etapa, segundos, rotulos):
+        chave = (etapa, rotulos)
+        with self._lock:
+            if chave not in self.duracoes:
+                self.duracoes[chave] = _Histograma(LIMITES_DURACAO)
+            self.duracoes[chave].observar(segundos)
+
+    def registrar_evento(self, evento):
+        linha = json.dumps(evento, ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                if self._arquivo is None:
+                    pasta = os.path.dirname(ARQUIVO_LOG)
+                    if pasta:
+                        os.makedirs(pasta, exist_ok=True)
+                    self._arquivo = open(ARQUIVO_LOG, "a", encoding="utf-8", buffering=1)
+                self._arquivo.write(linha + "\n")
+            except OSError as e:
+                print(f"Aviso: não foi possível gravar métricas em {ARQUIVO_LOG}: {e}")
+
+    def limpar(self):
+        with self._lock:
+            self.contadores.clear()
+            self.duracoes.clear()
+            self.resumos.clear()
+
+
+_registro = Registro()
+
+def ativar(ativas=True):
+    global _ativas
+    _ativas = ativas
+
+def ativas():
+    return _ativas
+
+def _rotulos(rotulos):
+    return tuple(sorted((chave, str(valor)) for chave, valor in rotulos.items()))
+
+@contextmanager
+def _span(etapa, rotulos):
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        yield
+    except BaseException as e:
+        erro = type(e).__name__
+        raise
+    finally:
+        duracao = time.perf_counter() - inicio
+        chave = _rotulos(rotulos)
+        _registro.duracao(etapa, duracao, chave)
+        if erro is not None:
+            _registro.contar("falhas", 1, _rotulos(dict(rotulos, etapa=etapa)))
+        _registro.registrar_evento({
+            "momento": datetime.now().isoformat(timespec="milliseconds"),
+            "tipo": "span", "etapa": etapa, "duracao": round(duracao, 6), "erro": erro, **rotulos,
+        })
+
+def span(etapa, **rotulos):
+    """Mede a duração do bloco 'with' como uma etapa (navegacao, espera, extracao...)."""
+    if not _ativas:
+        return _SPAN_NULO
+    return _span(etapa, rotulos)
+
+def contar(nome, valor=1, **rotulos):
+    """Soma 'valor' no contador 'nome' (vira pricewatcher_<nome>_total)."""
+    if not _ativas:
+        return
+    _registro.contar(nome, valor, _rotulos(rotulos))
+    if nome in ("falhas", "retentativas"):
+        _registro.registrar_evento({
+            "momento": datetime.now().isoformat(timespec="milliseconds"),
+            "tipo": nome, "valor": valor, **rotulos,
+        })
+
+def observar(nome, valor, **rotulos):
+    """Registra um valor (ex.: itens por página); exporta soma e quantidade."""
+    if not _ativas:
+        return
+    _registro.observar(nome, valor, _rotulos(rotulos))
+
+def cronometrado(etapa):
+    """Decorador: mede cada chamada da função como um span da etapa."""
+    def decorador(funcao):
+        @wraps(funcao)
+        def wrapper(*args, **kwargs):
+            if not _ativas:
+                return funcao(*args, **kwargs)
+            with _span(etapa, {}):
+                return funcao(*args, **kwargs)
+        return wrapper
+    return decorador
+
+def _escapar(valor):
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _formatar_rotulos(rotulos, extra=()):
+    pares = list(rotulos) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{chave}="{_escapar(valor)}"' for chave, valor in pares) + "}"
+
+def texto_prometheus():
+    """Métricas no formato de exposição em texto do Prometheus."""
+    with _registro._lock:
+        contadores = sorted(_registro.contadores.items())
+        duracoes = sorted((chave, (list(h.baldes), h.soma, h.quantidade)) for chave, h in _registro.duracoes.items())
+        resumos = sorted((chave, tuple(valores)) for chave, valores in _registro.resumos.items())
+
+    linhas = []
+    vistos = set()
+    for (nome, rotulos), valor in contadores:
+        metrica = f"{PREFIXO}_{nome}_total"
+        if metrica not in vistos:
+            vistos.add(metrica)
+            linhas.append(f"# TYPE {metrica} counter")
+        linhas.append(f"{metrica}{_formatar_rotulos(rotulos)} {valor}")
+
+    metrica = f"{PREFIXO}_etapa_duracao_segundos"
+    if duracoes:
+        linhas.append(f"# TYPE {metrica} histogram")
+    for (etapa, rotulos), (baldes, soma, quantidade) in duracoes:
+        base = (("etapa", etapa),) + rotulos
+        acumulado = 0
+        for limite, quantidade_balde in zip(LIMITES_DURACAO, baldes):
+            acumulado += quantidade_balde
+            linhas.append(f"{metrica}_bucket{_formatar_rotulos(base, [('le', str(limite))])} {acumulado}")
+        linhas.append(f"{metrica}_bucket{_formatar_rotulos(base, [('le', '+Inf')])} {quantidade}")
+        linhas.append(f"{metrica}_sum{_formatar_rotulos(base)} {soma}")
+        linhas.append(f"{metrica}_count{_formatar_rotulos(base)} {quantidade}")
+
+    vistos = set()
+    for (nome, rotulos), (soma, quantidade) in resumos:
+        metrica = f"{PREFIXO}_{nome}"
+        if metrica not in vistos:
+            vistos.add(metrica)
+            linhas.append(f"# TYPE {metrica} summary")
+        linhas.append(f"{metrica}_sum{_formatar_rotulos(rotulos)} {soma}")
+        linhas.append(f"{metrica}_count{_formatar_rotulos(rotulos)} {quantidade}")
+    return "\n".join(linhas) + "\n"
@@ -0,0 +1,130 @@
+# utils/mudancas.py
+
+import sqlite3
+import threading
+from datetime import datetime
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ultimos_precos (
+    chave TEXT PRIMARY KEY,
+    site TEXT NOT NULL,
+    preco_bruto TEXT,
+    visto_em TEXT NOT NULL,
+    ultima_confirmacao TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+_AUSENTE = object()
+
+
+def chave_anuncio(item):
+    """
+    Site + id do anúncio (ASIN, href do card) ou link. Sem nenhum dos dois,
+    site + nome só com caixa e espaços normalizados: limpar_nome_produto tira
+    palavras como "Plus" e juntaria anúncios diferentes numa chave só.
+    """
+    site = item.get("Site") or ""
+    identificador = item.get("ID do Anúncio")
+    if identificador:
+        return f"{site}|{identificador}"
+    link = item.get("Link do Produto")
+    if link and link != "N/A":
+        return f"{site}|{link}"
+    nome = item.get("Nome do Produto")
+    nome = " ".join(nome.split()).casefold() if isinstance(nome, str) else ""
+    return f"{site}|{nome}"
+
+
+class DetectorMudancas:
+    """
+    Fica entre os scrapers e o histórico: compara cada anúncio com o último
+    preço visto e só grava no histórico os anúncios novos e os que mudaram
+    de preço. Os repetidos só atualizam a 'ultima_confirmacao' no índice.
+    Para cada novidade gera um evento, entregue a quem assinar.
+    """
+
+    def __init__(self, historico):
+        self.historico = historico
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(historico.caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.executescript(_ESQUEMA)
+        # Índice compacto em memória: chave -> último preço bruto
+        self._ultimos = dict(self._conexao.execute("SELECT chave, preco_bruto FROM ultimos_precos"))
+        self._ouvintes = []
+
+    def assinar(self, ouvinte):
+        """'ouvinte(evento)' é chamado para cada anúncio novo ou preço alterado."""
+        self._ouvintes.append(ouvinte)
+
+    def processar(self, registros, termo=None, coletado_em=None):
+        """Processa uma busca. Retorna a lista de eventos (vazia se nada mudou)."""
+        if not registros:
+            return []
+        coletado_em = coletado_em or datetime.now()
+        agora = coletado_em.isoformat(timespec="seconds")
+
+        # Um anúncio repetido na busca (patrocinado e orgânico, várias páginas) conta uma vez: vale o primeiro
+        por_chave = {}
+        for item in registros:
+            por_chave.setdefault(chave_anuncio(item), item)
+
+        alterados, eventos, gravar, confirmar = [], [], [], []
+        # Só entram no índice depois de gravados
+        vistos = {}
+        with self._lock:
+            for chave, item in por_chave.items():
+                preco = item.get("Preço Bruto")
+                anterior = self._ultimos.get(chave, _AUSENTE)
+                if anterior == preco:
+                    confirmar.append((agora, chave))
+                    continue
+
+                vistos[chave] = preco
+                alterados.append(item)
+                gravar.append((chave, item.get("Site") or "", preco, agora, agora))
+                eventos.append({
+                    "tipo": "novo" if anterior is _AUSENTE else "preco",
+                    "chave": chave,
+                    "site": item.get("Site"),
+                    "nome": item.get("Nome do Produto"),
+                    "link": item.get("Link do Produto"),
+                    "preco_anterior": None if anterior is _AUSENTE else anterior,
+                    "preco": preco,
+                    "termo": termo,
+                    "coletado_em": agora,
+                })
+
+            if alterados:
+                self.historico.adicionar(alterados, termo=termo, coletado_em=coletado_em)
+            with self._conexao:
+                self._conexao.executemany(
+                    "INSERT INTO ultimos_precos (chave, site, preco_bruto, visto_em, ultima_confirmacao) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (chave) DO UPDATE SET "
+                    "preco_bruto = excluded.preco_bruto, ultima_confirmacao = excluded.ultima_confirmacao",
+                    gravar,
+                )
+                self._conexao.executemany(
+                    "UPDATE ultimos_precos SET ultima_confirmacao = ? WHERE chave = ?", confirmar
+                )
+            self._ultimos.update(vistos)
+
+        for evento in eventos:
+            for ouvinte in self._ouvintes:
+                try:
+                    ouvinte(evento)
+                except Exception as e:
+                    print(f"Erro ao avisar sobre mudança de preço: {e}")
+        return eventos
+
+    def ultima_confirmacao(self, chave):
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT ultima_confirmacao FROM ultimos_precos WHERE chave = ?", (chave,)
+            ).fetchone()
+        return linha[0] if linha else None
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
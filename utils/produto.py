@@ -0,0 +1,129 @@
+# utils/produto.py
+
+from operator import attrgetter
+from collections.abc import MutableMapping
+import numpy as np
+import pandas as pd
+
+# Nome do campo (o mesmo das colunas dos DataFrames e do CSV) -> atributo
+CAMPOS = {
+    "Site": "site",
+    "Nome do Produto": "nome",
+    "Preço Bruto": "preco_bruto",
+    "Link do Produto": "link",
+    "Data do Scraping": "data_scraping",
+    # Id estável do anúncio nas lojas sem link (scrapers/extracao.py)
+    "ID do Anúncio": "identificador",
+    # Acrescentados pela normalização do pipeline (scrapers/pipeline.py)
+    "Preço Numérico": "preco",
+    "Moeda": "moeda",
+    "Nome Normalizado": "nome_normalizado",
+}
+
+_AUSENTE = object()
+
+
+class Produto(MutableMapping):
+    """
+    Um anúncio raspado. Guarda os campos em __slots__ (sem um dict por item)
+    mas se comporta como o dict antigo: produto["Preço Bruto"], .get(),
+    .items(), dict(produto). Campo não preenchido conta como chave ausente;
+    só os campos de CAMPOS existem.
+    """
+
+    __slots__ = tuple(CAMPOS.values())
+
+    def __init__(self, site, nome, preco_bruto, data_scraping):
+        self.site = site
+        self.nome = nome
+        self.preco_bruto = preco_bruto
+        self.data_scraping = data_scraping
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Converte um dict no formato antigo (cache em disco, JSON da fila). Campos desconhecidos são ignorados."""
+        produto = cls.__new__(cls)
+        for chave, valor in dados.items():
+            atributo = CAMPOS.get(chave)
+            if atributo is not None:
+                setattr(produto, atributo, valor)
+        return produto
+
+    def __getitem__(self, chave):
+        valor = getattr(self, CAMPOS.get(chave, "_"), _AUSENTE)
+        if valor is _AUSENTE:
+            raise KeyError(chave)
+        return valor
+
+    def get(self, chave, padrao=None):
+        # Sem passar por __getitem__/KeyError: é chamado por célula na tabela do app
+        valor = getattr(self, CAMPOS.get(chave, "_"), _AUSENTE)
+        return padrao if valor is _AUSENTE else valor
+
+    def __setitem__(self, chave, valor):
+        try:
+            setattr(self, CAMPOS[chave], valor)
+        except KeyError:
+            raise KeyError(f"Campo desconhecido: {chave!r}") from None
+
+    def __delitem__(self, chave):
+        try:
+            delattr(self, CAMPOS[chave])
+        except (KeyError, AttributeError):
+            raise KeyError(chave) from None
+
+    def __contains__(self, chave):
+        return getattr(self, CAMPOS.get(chave, "_"), _AUSENTE) is not _AUSENTE
+
+    def __iter__(self):
+        for chave, atributo in CAMPOS.items():
+            if getattr(self, atributo, _AUSENTE) is not _AUSENTE:
+                yield chave
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self):
+        copia = Produto.__new__(Produto)
+        for atributo in Produto.__slots__:
+            valor = getattr(self, atributo, _AUSENTE)
+            if valor is not _AUSENTE:
+                setattr(copia, atributo, valor)
+        return copia
+
+    def __repr__(self):
+        return f"Produto({dict(self)!r})"
+
+
+def _coluna(registros, chave, atributo):
+    # Caminho rápido: todos são Produto com o campo preenchido
+    try:
+        return list(map(attrgetter(atributo), registros))
+    except AttributeError:
+        pass
+    valores = [getattr(r, atributo, _AUSENTE) if type(r) is Produto else r.get(chave, _AUSENTE) for r in registros]
+    if all(valor is _AUSENTE for valor in valores):
+        return None
+    return [None if valor is _AUSENTE else valor for valor in valores]
+
+def para_dataframe(registros):
+    """
+    DataFrame com uma coluna por campo presente em algum registro, montado
+    coluna a coluna (sem passar por um dict por linha). Aceita Produto e os
+    dicts antigos misturados. Os textos não são copiados nem reinterpretados:
+    cada coluna é um array de objetos apontando para as strings dos registros;
+    só 'Preço Numérico' vira float.
+    """
+    if not registros:
+        return pd.DataFrame()
+    colunas = {}
+    for chave, atributo in CAMPOS.items():
+        valores = _coluna(registros, chave, atributo)
+        if valores is None:
+            continue
+        if chave == "Preço Numérico":
+            colunas[chave] = np.array(valores, dtype=float)
+        else:
+            colunas[chave] = np.empty(len(valores), dtype=object)
+            colunas[chave][:] = valores
+    return pd.DataFrame(colunas, index=pd.RangeIndex(len(registros)), copy=False)
@@ -0,0 +1,83 @@
+# vigia.py
+# Vigia a watchlist sem interface gráfica: python vigia.py --watchlist watchlist.json
+
+import json
+import argparse
+from datetime import datetime
+
+from scrapers.executor import LOJAS
+from scrapers.crawler import interpretar_paginas, planejar, rastrear
+from utils.agendador import Agendador, TarefaVigia
+from utils.historico import HistoricoPrecos
+from utils.mudancas import DetectorMudancas
+
+INTERVALO_PADRAO = 60 * 60
+
+def carregar_watchlist(caminho):
+    """
+    Lê a watchlist e gera uma tarefa por (termo, loja). Formato:
+    {"intervalo_padrao": 3600,
+     "itens": [{"termo": "rtx 4060", "lojas": ["Kabum", "Pichau"], "intervalo": 1800, "paginas": "1"}]}
+    Sem "lojas", o termo é vigiado em todas.
+    """
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+
+    intervalo_padrao = dados.get("intervalo_padrao", INTERVALO_PADRAO)
+    tarefas = []
+    for item in dados.get("itens", []):
+        lojas = item.get("lojas") or list(LOJAS)
+        for loja in lojas:
+            if loja not in LOJAS:
+                raise ValueError(f"Loja inválida na watchlist: {loja}")
+            paginas = str(item.get("paginas", "1"))
+            chamadas, _ = planejar(LOJAS[loja], interpretar_paginas(paginas))
+            tarefas.append(TarefaVigia(
+                item["termo"], loja,
+                intervalo=item.get("intervalo", intervalo_padrao),
+                paginas=paginas,
+                requisicoes=len(chamadas),
+            ))
+    return tarefas
+
+def avisar_mudanca(evento):
+    if evento["tipo"] == "preco":
+        print(f"  {evento['site']}: {evento['nome']} {evento['preco_anterior']} -> {evento['preco']}")
+
+def criar_executor(mudancas):
+    def executar(tarefa):
+        # O vigia quer o preço atual, então passa por fora do cache de buscas
+        funcao = LOJAS[tarefa.loja]
+        funcao = getattr(funcao, "sem_cache", funcao)
+        tempo = datetime.now().strftime("%H:%M:%S")
+        resultados = rastrear(funcao, tarefa.termo, tarefa.paginas, tempo)
+        eventos = mudancas.processar(resultados, termo=tarefa.termo)
+        print(f"[{tempo}] {tarefa.loja} / '{tarefa.termo}': {len(resultados)} produtos, "
+              f"{len(eventos)} novidades (volatilidade {tarefa.volatilidade:.2f})")
+        # O agendador mede a volatilidade pelas mudanças de preço, não pela página inteira
+        return eventos
+    return executar
+
+def main():
+    parser = argparse.ArgumentParser(description="Vigia os preços da watchlist continuamente.")
+    parser.add_argument("--watchlist", default="watchlist.json")
+    parser.add_argument("--trabalhadores", type=int, default=4, help="buscas simultâneas no total")
+    args = parser.parse_args()
+
+    tarefas = carregar_watchlist(args.watchlist)
+    historico = HistoricoPrecos()
+    mudancas = DetectorMudancas(historico)
+    mudancas.assinar(avisar_mudanca)
+    agendador = Agendador(tarefas, criar_executor(mudancas), trabalhadores=args.trabalhadores)
+    print(f"Vigiando {len(tarefas)} buscas. Ctrl+C para sair.")
+    try:
+        agendador.executar_para_sempre()
+    except KeyboardInterrupt:
+        agendador.parar()
+    finally:
+        mudancas.fechar()
+        historico.fechar()
+
+
+if __name__ == "__main__":
+    main()